@@ -1,11 +1,30 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Callable
 from app.ai.azure_foundry_client import AzureFoundryClient, AIResult
+from app.ai.concurrency import AIConcurrencyConfig, is_retryable, run_concurrent
+from app.ai.telemetry import AITelemetry
+from app.ai.scheduler import DEFAULT_SEVERITY_WEIGHT, SEVERITY_WEIGHT, AIBudget, Candidate, prioritize
+from app.ai.verdict_cache import CachedClient, VerdictCache, normalize_value, prompt_group_key
 
 DEFAULT_MAX_CALLS = 200  # para no gastar de más: solo IA sobre sospechosos
 
+# Columnas de salida de la pasada de IA y el campo de AIResult que va en cada una
+AI_COLUMNS = {
+    "ai_category": "category",
+    "ai_reason": "reason",
+    "ai_severity": "severity",
+    "ai_web_evidence": "web_evidence",
+}
+
+# Campos de la fila que viajan en el prompt (incluye todos los KEY_FIELDS de la caché)
+PAYLOAD_FIELDS = ("merchant", "mcc", "mcc_description", "description", "amount", "date", "country", "flag", "reasons")
+
+GENERIC_MERCHANTS = ("bar", "alcohol", "casino")
+
 def should_send_to_ai(row: pd.Series) -> bool:
     # Solo enviar a IA si ya es warning o si merchant es “raro” (sin matches allowlist)
     flag = str(row.get("flag", ""))
@@ -15,47 +34,304 @@ def should_send_to_ai(row: pd.Series) -> bool:
     m = str(row.get("merchant", "")).strip()
     if len(m) <= 4:
         return True
-    if m.lower() in ("bar", "alcohol", "casino"):
+    if m.lower() in GENERIC_MERCHANTS:
         return True
     return False
 
-def apply_ai_explanations(df: pd.DataFrame, max_calls: int = DEFAULT_MAX_CALLS) -> pd.DataFrame:
+def ai_candidate_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    should_send_to_ai vectorizado: bool por posición. La heurística de merchant corre
+    sobre los valores distintos (categorías / factorize), no fila por fila.
+    """
+    n = len(df)
+    mask = np.zeros(n, dtype=bool)
+    if "flag" in df.columns:
+        mask |= df["flag"].isin(["DIRECT_WARN", "POSSIBLE_WARN"]).to_numpy()
+    if "merchant" in df.columns:
+        s = df["merchant"]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+        else:
+            codes, uniques = pd.factorize(s)
+        text = pd.Index(uniques).astype(str).str.strip()
+        odd = (text.str.len() <= 4) | text.str.lower().isin(GENERIC_MERCHANTS)
+        mask |= np.append(np.asarray(odd, dtype=bool), True)[codes]  # NaN -> "nan" (corto), como antes
+    else:
+        mask[:] = True  # merchant "" -> corto
+    return mask
+
+def ai_done_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    Filas que ya tienen veredicto de una pasada anterior (ai_category no vacío).
+    """
+    if "ai_category" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    s = df["ai_category"]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        filled = np.asarray(s.cat.categories.astype(str) != "", dtype=bool)
+        return np.append(filled, False)[s.cat.codes.to_numpy()]
+    return (s.fillna("").astype(str) != "").to_numpy()
+
+
+@dataclass
+class AIVerdicts:
+    """
+    Resultado disperso de una pasada de IA: veredictos por row-id (posición en el df),
+    solo para las filas evaluadas. No copia el df; write_into / assign_to lo vuelcan
+    en columnas ai_* categóricas ("" = sin veredicto).
+    """
+    n: int
+    candidates: int = 0                       # filas candidatas de esta pasada
+    parts: list[tuple[np.ndarray, AIResult]] = field(default_factory=list)
+
+    def add(self, rows: np.ndarray, res: AIResult) -> None:
+        self.parts.append((rows, res))
+
+    def rows(self) -> np.ndarray:
+        """
+        Row-ids con veredicto nuevo, ordenados.
+        """
+        if not self.parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate([rows for rows, _ in self.parts]))
+
+    def columns(self, df: pd.DataFrame) -> dict[str, pd.Categorical]:
+        """
+        Columnas ai_* de df con estos veredictos aplicados. Costo por fila: copiar los
+        códigos (int) de la columna anterior; el texto se guarda una vez por categoría.
+        """
+        rows = np.concatenate([r for r, _ in self.parts]) if self.parts else np.zeros(0, dtype=np.int64)
+        out: dict[str, pd.Categorical] = {}
+        for col, attr in AI_COLUMNS.items():
+            values = [getattr(res, attr) or "" for _, res in self.parts]
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                prev = df[col].array
+            elif col in df.columns:
+                prev = pd.Categorical(df[col].fillna("").astype(str))
+            else:
+                prev = pd.Categorical.from_codes(np.zeros(self.n, dtype=np.int32), categories=[""])
+            categories = prev.categories.append(pd.Index([""] + values).unique().difference(prev.categories))
+            codes = prev.codes.astype(np.int32)
+            codes[codes < 0] = categories.get_loc("")
+            if len(rows):
+                per_part = categories.get_indexer(values)
+                codes[rows] = np.repeat(per_part, [len(r) for r, _ in self.parts])
+            out[col] = pd.Categorical.from_codes(codes, categories=categories)
+        return out
+
+    def assign_to(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        df con las columnas ai_* actualizadas (con Copy-on-Write el resto no se copia).
+        """
+        return df.assign(**self.columns(df))
+
+    def write_into(self, df: pd.DataFrame) -> None:
+        for col, values in self.columns(df).items():
+            df[col] = values
+
+def apply_ai_explanations(
+    df: pd.DataFrame,
+    max_calls: int = DEFAULT_MAX_CALLS,
+    config: AIConcurrencyConfig | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    cache: VerdictCache | None = None,
+    budget: AIBudget | None = None,
+    telemetry: AITelemetry | None = None,
+) -> pd.DataFrame:
     """
     Agrega columnas:
       - ai_category
       - ai_reason
       - ai_severity (recomendación IA)
       - ai_web_evidence
+
+    Envoltorio de evaluate_ai_candidates que devuelve el df con las columnas ai_*.
+    """
+    verdicts = evaluate_ai_candidates(df, max_calls, config, progress, cancelled, cache, budget, telemetry)
+    return verdicts.assign_to(df)
+
+def evaluate_ai_candidates(
+    df: pd.DataFrame,
+    max_calls: int = DEFAULT_MAX_CALLS,
+    config: AIConcurrencyConfig | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    cache: VerdictCache | None = None,
+    budget: AIBudget | None = None,
+    telemetry: AITelemetry | None = None,
+) -> AIVerdicts:
+    """
+    Pasada de IA sobre df sin copiarlo: los candidatos salen de una máscara vectorizada
+    y los veredictos vuelven como AIVerdicts (por row-id). El trabajo en Python es
+    proporcional a los candidatos, no al total de filas.
+
+    Las llamadas corren en paralelo (config.concurrency) respetando RPM/TPM; cada
+    resultado se registra en cuanto llega. progress(hechas, total) se llama por resultado,
+    con total = grupos a evaluar en esta pasada.
+    Filas con el mismo contexto de prompt comparten una sola llamada (max_calls = grupos).
+    Con cache, los veredictos ya conocidos se resuelven sin red y solo lo nuevo va al modelo.
+
+    El presupuesto (budget, o max_calls si no se pasa) se gasta por prioridad: severidad,
+    monto, ambigüedad de reglas y merchants nuevos primero. Las filas que ya traen
+    ai_category no se re-evalúan: re-ejecutar sobre el resultado retoma lo pendiente.
+
+    telemetry (opcional) junta latencia, tokens, reintentos y caché de cada request.
+    """
+    config = config or AIConcurrencyConfig.from_env()
+    budget = budget or AIBudget(max_calls=max_calls)
+    # el SDK no reintenta: los 429 los maneja run_concurrent con Retry-After + jitter
+    base_client = AzureFoundryClient(max_retries=0)
+    base_client.telemetry = telemetry
+    if telemetry is not None:
+        telemetry.deployment = base_client.model
+    on_retry = telemetry.record_retry if telemetry is not None else None
+    on_error = telemetry.record_failure if telemetry is not None else None
+    client: AzureFoundryClient | CachedClient = base_client
+    if cache is not None:
+        client = CachedClient(client, cache)
+
+    positions = np.flatnonzero(ai_candidate_mask(df) & ~ai_done_mask(df))
+    verdicts = AIVerdicts(n=len(df), candidates=len(positions))
+    sub = df.iloc[positions]
+    # NaN -> None: el cliente hace (valor or "").strip()
+    columns = {
+        f: sub[f].astype(object).where(sub[f].notna(), None).tolist() if f in sub.columns else [None] * len(positions)
+        for f in PAYLOAD_FIELDS
+    }
+
+    # Agrupar candidatos por contexto del prompt (merchant, descripción, MCC, ...):
+    # una llamada por grupo y el veredicto se copia a todas sus filas.
+    groups: dict[tuple[str, ...], tuple[list[int], dict[str, Any]]] = {}
+    for i in range(len(positions)):
+        payload: dict[str, Any] = {f: columns[f][i] for f in PAYLOAD_FIELDS}
+        members, _ = groups.setdefault(prompt_group_key(payload), ([], payload))
+        members.append(i)
+
+    jobs = [(np.asarray(members, dtype=np.int64), payload) for members, payload in groups.values()]
+    done = 0
+    total = 0
+
+    def write(job: int, res: AIResult) -> None:
+        nonlocal done
+        verdicts.add(positions[jobs[job][0]], res)
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    def on_result(job: int, res: AIResult) -> None:
+        budget.charge(1, res.total_tokens)
+        write(job, res)
+
+    # Aciertos de caché no gastan presupuesto
+    hits: list[tuple[int, AIResult]] = []
+    misses: list[tuple[int, dict[str, Any]]] = []
+    for job, (_, payload) in enumerate(jobs):
+        hit = client.lookup(payload) if isinstance(client, CachedClient) else None
+        if hit is None:
+            misses.append((job, payload))
+        else:
+            hits.append((job, hit))
+    if telemetry is not None and cache is not None:
+        telemetry.record_cache(len(hits), len(misses))
+
+    known = cache.known_merchants() if cache is not None else set()
+    stats = _CandidateStats(sub)
+    ranked = prioritize([stats.candidate(job, jobs[job][0], payload, known) for job, payload in misses])
+    calls = [(c.key, c.payload) for c in ranked[:budget.remaining_calls]]
+
+    total = len(hits) + len(calls)
+    for job, hit in hits:
+        write(job, hit)
+
+    if config.batch_size > 1 and len(calls) > 1:
+        # varios grupos por request; los items que el modelo no devolvió bien van de a uno
+        calls = _run_batches(client, calls, on_result, config, cancelled, budget, on_retry)
+    if not (cancelled is not None and cancelled()):
+        run_concurrent(
+            _within_budget(calls, budget), client.evaluate_transaction, on_result, config, cancelled, on_retry,
+            on_error,
+        )
+
+    budget.pending = len(misses) - (done - len(hits))
+    return verdicts
+
+
+class _CandidateStats:
+    """
+    Columnas de los candidatos como arrays (monto, flag, reasons) para puntuar grupos
+    sin volver a indexar el df.
     """
-    client = AzureFoundryClient()
-
-    out = df.copy()
-    out["ai_category"] = ""
-    out["ai_reason"] = ""
-    out["ai_severity"] = ""
-    out["ai_web_evidence"] = ""
-
-    calls = 0
-    for idx, row in out.iterrows():
-        if calls >= max_calls:
-            break
-        if not should_send_to_ai(row):
-            continue
-
-        payload: dict[str, Any] = {
-            "merchant": row.get("merchant"),
-            "mcc": row.get("mcc"),
-            "description": row.get("description"),
-            "amount": row.get("amount"),
-            "date": row.get("date"),
-            "country": row.get("country") if "country" in out.columns else None,
-        }
-
-        res: AIResult = client.evaluate_transaction(payload)
-        out.at[idx, "ai_category"] = res.category
-        out.at[idx, "ai_reason"] = res.reason
-        out.at[idx, "ai_severity"] = res.severity
-        out.at[idx, "ai_web_evidence"] = res.web_evidence or ""
-        calls += 1
-
-    return out
+
+    def __init__(self, sub: pd.DataFrame):
+        n = len(sub)
+        self.amount = (
+            pd.to_numeric(sub["amount"], errors="coerce").abs().fillna(0.0).to_numpy(dtype=float)
+            if "amount" in sub.columns else np.zeros(n)
+        )
+        self.flags = sub["flag"].astype(str).to_numpy() if "flag" in sub.columns else np.full(n, "OK", dtype=object)
+        self.reasons = sub["reasons"].astype(str).to_numpy() if "reasons" in sub.columns else np.full(n, "", dtype=object)
+
+    def candidate(self, job: int, members: np.ndarray, payload: dict[str, Any], known: set[str]) -> Candidate:
+        flag = max(self.flags[members], key=lambda f: SEVERITY_WEIGHT.get(f, DEFAULT_SEVERITY_WEIGHT))
+        return Candidate(
+            key=job,
+            payload=payload,
+            rows=len(members),
+            amount=float(self.amount[members].sum()),
+            flag=flag,
+            reasons=str(self.reasons[members[0]]),
+            novel=normalize_value("merchant", payload.get("merchant")) not in known,
+        )
+
+
+def _within_budget(calls: list[tuple[int, dict[str, Any]]], budget: AIBudget):
+    """
+    Entrega llamadas mientras quede presupuesto de tokens (se lee a medida que se consumen).
+    """
+    for call in calls:
+        if budget.exhausted():
+            return
+        yield call
+
+
+def _run_batches(
+    client: AzureFoundryClient | CachedClient,
+    calls: list[tuple[int, dict[str, Any]]],
+    on_result: Callable[[int, AIResult], None],
+    config: AIConcurrencyConfig,
+    cancelled: Callable[[], bool] | None,
+    budget: AIBudget,
+    on_retry: Callable[[BaseException], None] | None = None,
+) -> list[tuple[int, dict[str, Any]]]:
+    """
+    Envía calls en requests de config.batch_size items (id = número de grupo), en orden
+    de prioridad. Devuelve los (grupo, payload) sin resultado válido (también los de un
+    batch que falló del todo), para reintentarlos individualmente.
+    """
+    size = config.batch_size
+    batches = [calls[i:i + size] for i in range(0, len(calls), size)]
+    failed: list[tuple[int, dict[str, Any]]] = []
+
+    def call(payload: dict[str, Any]) -> dict[str, AIResult]:
+        try:
+            return client.evaluate_batch(payload["items"])
+        except Exception as e:
+            if is_retryable(e):
+                raise  # 429 / transitorio: lo reintenta run_concurrent
+            return {}  # p.ej. request rechazado: todos sus items caen al modo individual
+
+    def on_batch(b: int, results: dict[str, AIResult]) -> None:
+        for job, payload in batches[b]:
+            res = results.get(str(job))
+            if res is None:
+                failed.append((job, payload))
+            else:
+                on_result(job, res)
+
+    jobs = [(b, {"items": [{**payload, "id": job} for job, payload in batch]}) for b, batch in enumerate(batches)]
+    run_concurrent(
+        _within_budget(jobs, budget), call, on_batch, config, cancelled, on_retry,
+        on_error=lambda b, e: failed.extend(batches[b]),
+    )
+    return failed
@@ -3,10 +3,29 @@ from __future__ import annotations
 import json
 import os
 import re
+import time
 from dataclasses import dataclass
 from typing import Any, Optional
 
-from openai import AzureOpenAI
+from app.ai.telemetry import AITelemetry, CallRecord
+
+
+# Subir al cambiar el prompt de evaluate_transaction / evaluate_batch: invalida los veredictos cacheados
+PROMPT_VERSION = "tx-v1"
+
+SEVERITIES = ("OK", "POSSIBLE_WARN", "DIRECT_WARN")
+
+# Reglas del auditor, compartidas por el modo individual y el modo batch
+_AUDIT_RULES = (
+    "Tus objetivos:\n"
+    "1. ANÁLISIS CRUZADO: Compara el 'Merchant' con 'Description' y 'MCC Description'.\n"
+    "2. DESAMBIGUACIÓN DE DEPORTES (CRÍTICO): Muchos restaurantes se llaman como equipos (ej. 'Real Madrid Cafe', 'Cowboys Saloon', 'Manchester Diner'). "
+    "Usa tu conocimiento global para determinar si el merchant es realmente una entidad deportiva (Entradas, Merchandising, Estadio) "
+    "o simplemente un bar/restaurante temático o ubicado en esa ciudad. "
+    "Si es comida/restaurante -> OK (Categoría: Alimentación). Si son tickets/jerseys -> DIRECT_WARN (Categoría: Deportes).\n"
+    "3. DETECCIÓN DE RIESGOS: Streaming, Apuestas, Bienes Digitales -> DIRECT_WARN.\n"
+    "4. VALIDACIÓN DE REGLAS: Si el flag previo dice 'Deportes' pero tú ves que es un restaurante, CORRIGELO a 'OK'.\n"
+)
 
 
 @dataclass
@@ -15,6 +34,8 @@ class AIResult:
     severity: str  # "OK" | "POSSIBLE_WARN" | "DIRECT_WARN"
     reason: str
     web_evidence: Optional[str] = None
+    total_tokens: Optional[int] = None  # usage real de la llamada (ajusta el límite de tokens/min)
+    parsed: bool = True  # False si la respuesta no traía un veredicto válido (valores por defecto)
 
 
 class AzureFoundryClient:
@@ -23,7 +44,11 @@ class AzureFoundryClient:
     Incluye lógica avanzada de desambiguación de entidades deportivas.
     """
 
-    def __init__(self):
+    def __init__(self, max_retries: int | None = None):
+        """
+        max_retries: reintentos internos del SDK. La pasada concurrente usa 0 y maneja
+        los 429 ella misma (Retry-After + backoff con jitter, ver app.ai.concurrency).
+        """
         self.endpoint = os.getenv("AZURE_FOUNDRY_ENDPOINT", "").strip()
         self.api_key = os.getenv("AZURE_FOUNDRY_API_KEY", "").strip()
         self.model = os.getenv("AZURE_FOUNDRY_MODEL", "gpt-4.0").strip()
@@ -34,10 +59,18 @@ class AzureFoundryClient:
                 "Faltan env vars: AZURE_FOUNDRY_ENDPOINT / AZURE_FOUNDRY_API_KEY."
             )
 
+        # SDK importado recién al crear el cliente: openai tarda ~1 s en importar
+        from openai import AzureOpenAI
+
+        # Instrumentación opcional (latencia, tokens, errores por request); la setea la pasada de IA
+        self.telemetry: AITelemetry | None = None
+
+        extra: dict[str, Any] = {} if max_retries is None else {"max_retries": max_retries}
         self.client = AzureOpenAI(
             azure_endpoint=self.endpoint,
             api_key=self.api_key,
             api_version=self.api_version,
+            **extra,
         )
 
     def evaluate_transaction(self, row: dict[str, Any]) -> AIResult:
@@ -54,15 +87,8 @@ class AzureFoundryClient:
         # 2. PROMPT OPTIMIZADO PARA ANÁLISIS CRUZADO Y DESAMBIGUACIÓN DE DEPORTES
         system = (
             f"Eres el Auditor Principal de Gastos ({self.model}).\n"
-            "Tus objetivos:\n"
-            "1. ANÁLISIS CRUZADO: Compara el 'Merchant' con 'Description' y 'MCC Description'.\n"
-            "2. DESAMBIGUACIÓN DE DEPORTES (CRÍTICO): Muchos restaurantes se llaman como equipos (ej. 'Real Madrid Cafe', 'Cowboys Saloon', 'Manchester Diner'). "
-            "Usa tu conocimiento global para determinar si el merchant es realmente una entidad deportiva (Entradas, Merchandising, Estadio) "
-            "o simplemente un bar/restaurante temático o ubicado en esa ciudad. "
-            "Si es comida/restaurante -> OK (Categoría: Alimentación). Si son tickets/jerseys -> DIRECT_WARN (Categoría: Deportes).\n"
-            "3. DETECCIÓN DE RIESGOS: Streaming, Apuestas, Bienes Digitales -> DIRECT_WARN.\n"
-            "4. VALIDACIÓN DE REGLAS: Si el flag previo dice 'Deportes' pero tú ves que es un restaurante, CORRIGELO a 'OK'.\n"
-            "\n"
+            + _AUDIT_RULES
+            + "\n"
             "Salida JSON estricta: { category, severity, reason }"
         )
 
@@ -87,31 +113,93 @@ class AzureFoundryClient:
         )
 
         # 3. Llamada
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            temperature=0.1,  # Bajo para mayor determinismo
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user_msg},
-            ],
-        )
+        resp, latency = self._chat(system, user_msg, "single", 1)
 
         # 4. Parsing
         text = (resp.choices[0].message.content or "").strip()
         data = self._safe_parse_json(text)
+        self._record("single", latency, "ok", 1, 1 if data else 0, resp)
+        return _result_from_data(data, getattr(getattr(resp, "usage", None), "total_tokens", None))
 
-        # Validación de severidad segura
-        severity = str(data.get("severity", "POSSIBLE_WARN")).strip().upper()
-        if severity not in ("OK", "POSSIBLE_WARN", "DIRECT_WARN"):
-            severity = "POSSIBLE_WARN"
-
-        return AIResult(
-            category=str(data.get("category", "Uncategorized")).strip(),
-            severity=severity,
-            reason=str(data.get("reason", "Revisión manual requerida.")).strip()[:500],
-            web_evidence=None
+    def evaluate_batch(self, rows: list[dict[str, Any]]) -> dict[str, AIResult]:
+        """
+        Evalúa varias transacciones en un solo request (el prompt de sistema se paga una vez).
+        Cada row debe traer un "id"; devuelve {id: AIResult} solo con los items que el modelo
+        respondió de forma válida. Los ids que falten se reintentan individualmente afuera.
+        """
+        items = [
+            {
+                "id": str(row["id"]),
+                "merchant": (row.get("merchant") or "").strip(),
+                "description": (row.get("description") or "").strip(),
+                "mcc_description": (row.get("mcc_description") or "").strip(),
+                "mcc": str(row.get("mcc") or "").strip(),
+                "amount": row.get("amount"),
+                "pre_flag": row.get("flag", "OK"),
+                "pre_reason": row.get("reasons", ""),
+            }
+            for row in rows
+        ]
+        system = (
+            f"Eres el Auditor Principal de Gastos ({self.model}).\n"
+            + _AUDIT_RULES
+            + "\n"
+            "Recibirás VARIAS transacciones independientes, cada una con un 'id'. Evalúa cada una por separado.\n"
+            'Salida JSON estricta: {"results": [{ "id", "category", "severity", "reason" }, ...]} '
+            "con exactamente un resultado por id recibido, copiando el id tal cual."
+        )
+        user_msg = (
+            f"Analiza estos {len(items)} gastos. Verifica falsos positivos de deportes.\n"
+            f"DATA: {json.dumps(items, ensure_ascii=False, default=str)}"
         )
 
+        resp, latency = self._chat(system, user_msg, "batch", len(items))
+
+        text = (resp.choices[0].message.content or "").strip()
+        wanted = {item["id"] for item in items}
+        parsed = {str(d["id"]): d for d in parse_json_items(text) if str(d.get("id")) in wanted}
+        self._record("batch", latency, "ok", len(items), len(parsed), resp)
+
+        # Tokens del request repartidos entre los items válidos (ajuste del límite de tokens/min)
+        usage = getattr(getattr(resp, "usage", None), "total_tokens", None)
+        share = usage // max(len(parsed), 1) if usage is not None else None
+        return {i: _result_from_data(d, share) for i, d in parsed.items()}
+
+    def _chat(self, system: str, user_msg: str, kind: str, items: int) -> tuple[Any, float]:
+        """
+        Un request al deployment. Devuelve (respuesta, latencia en s); los errores HTTP
+        quedan registrados en la telemetría antes de propagarse (los reintenta el runner).
+        """
+        t0 = time.perf_counter()
+        try:
+            resp = self.client.chat.completions.create(
+                model=self.model,
+                temperature=0.1,  # Bajo para mayor determinismo
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user_msg},
+                ],
+            )
+        except Exception as e:
+            code = getattr(e, "status_code", None)
+            self._record(kind, time.perf_counter() - t0, str(code or type(e).__name__), items, 0, None)
+            raise
+        return resp, time.perf_counter() - t0
+
+    def _record(self, kind: str, latency: float, status: str, items: int, parsed: int, resp: Any) -> None:
+        if self.telemetry is None:
+            return
+        usage = getattr(resp, "usage", None)
+        self.telemetry.record_call(CallRecord(
+            kind=kind,
+            latency_s=latency,
+            status=status,
+            items=items,
+            items_parsed=parsed,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        ))
+
     def _safe_parse_json(self, text: str) -> dict[str, Any]:
         if not text: return {}
         try: return json.loads(text)
@@ -119,4 +207,56 @@ class AzureFoundryClient:
         m = re.search(r"\{.*\}", text, re.DOTALL)
         if not m: return {}
         try: return json.loads(m.group(0))
-        except: return {}
\ No newline at end of file
+        except: return {}
+
+
+def _result_from_data(data: dict[str, Any], total_tokens: Optional[int] = None) -> AIResult:
+    # Validación de severidad segura
+    severity = str(data.get("severity", "POSSIBLE_WARN")).strip().upper()
+    parsed = bool(data) and "severity" in data and severity in SEVERITIES
+    if severity not in SEVERITIES:
+        severity = "POSSIBLE_WARN"
+
+    return AIResult(
+        category=str(data.get("category", "Uncategorized")).strip(),
+        severity=severity,
+        reason=str(data.get("reason", "Revisión manual requerida.")).strip()[:500],
+        web_evidence=None,
+        total_tokens=total_tokens,
+        parsed=parsed,
+    )
+
+
+def parse_json_items(text: str) -> list[dict[str, Any]]:
+    """
+    Items {"id": ...} de una respuesta batch, tolerante a texto alrededor, code fences
+    y JSON truncado o con un item roto: si el documento completo no parsea, se recorre
+    el texto decodificando cada objeto que empieza en una '{' y se quedan los que traen id.
+    """
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        data = data.get("results", data.get("items"))
+    if isinstance(data, list):
+        return [d for d in data if isinstance(d, dict) and "id" in d]
+
+    decoder = json.JSONDecoder()
+    items: list[dict[str, Any]] = []
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            obj, end = None, pos + 1
+        if isinstance(obj, dict) and "id" in obj:
+            items.append(obj)
+        elif isinstance(obj, dict) and isinstance(obj.get("results"), list):
+            items.extend(d for d in obj["results"] if isinstance(d, dict) and "id" in d)
+        else:
+            end = pos + 1  # objeto contenedor roto: seguir buscando items adentro
+        pos = text.find("{", end)
+    return items
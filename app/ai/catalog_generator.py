@@ -2,7 +2,7 @@ from __future__ import annotations
 import json
 import pandas as pd
 from app.core.models import Catalog
-from app.ai.azure_client import get_azure_client
+from app.data.profile import DatasetProfile
 
 SYSTEM = """Eres un asistente que genera reglas conservadoras para auditoría de gastos.
 Devuelve SOLO JSON válido con schema:
@@ -10,28 +10,25 @@ Devuelve SOLO JSON válido con schema:
 No inventes MCCs: usa solo los MCCs presentes en el dataset.
 Keywords deben ser conservadoras y útiles."""
 
-def generate_catalog_from_data(df: pd.DataFrame, deployment: str) -> Catalog:
+def generate_catalog_from_data(source: pd.DataFrame | DatasetProfile, deployment: str | None = None) -> Catalog:
+    """
+    source = DataFrame o su DatasetProfile (p.ej. el que se armó al leer el archivo por
+    chunks): el modelo recibe solo el resumen — MCCs presentes, top merchants y cuantiles.
+    """
+    from app.ai.azure_foundry_client import AzureFoundryClient
+
+    profile = source if isinstance(source, DatasetProfile) else DatasetProfile.from_frame(source)
     # muestra MCCs y top merchants para limitar al modelo
-    mccs = sorted(set(df["mcc"].astype(str).dropna().unique().tolist()))[:2000]
-    top_merchants = df["merchant"].astype(str).value_counts().head(50).index.tolist()
-    amounts = pd.to_numeric(df["amount"], errors="coerce").dropna()
-    stats = {
-        "rows": int(len(df)),
-        "mccs_sample": mccs[:200],
-        "top_merchants": top_merchants,
-        "amount_p50": float(amounts.quantile(0.5)) if len(amounts) else 0,
-        "amount_p90": float(amounts.quantile(0.9)) if len(amounts) else 0,
-        "amount_p99": float(amounts.quantile(0.99)) if len(amounts) else 0,
-    }
+    stats = profile.stats(top_merchants=50, mcc_sample=200)
 
-    client = get_azure_client()
+    client = AzureFoundryClient()
     prompt = {
         "dataset_stats": stats,
         "instruction": "Genera reglas conservadoras: prioriza POSSIBLE_WARN. DIRECT_WARN solo si es muy obvio.",
     }
 
-    resp = client.chat.completions.create(
-        model=deployment,
+    resp = client.client.chat.completions.create(
+        model=deployment or client.model,
         temperature=0.2,
         messages=[
             {"role": "system", "content": SYSTEM},
@@ -42,4 +39,3 @@ def generate_catalog_from_data(df: pd.DataFrame, deployment: str) -> Catalog:
     content = resp.choices[0].message.content
     data = json.loads(content)
     return Catalog.model_validate(data)
-    
\ No newline at end of file
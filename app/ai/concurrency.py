@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Estimación de tokens por llamada cuando todavía no hay usage real:
+# prompt de sistema (~350) + salida JSON corta (~150) + payload (~4 chars por token)
+PROMPT_OVERHEAD_TOKENS = 500
+CHARS_PER_TOKEN = 4
+
+# Códigos HTTP reintentables: rate limit y errores transitorios del servicio
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+@dataclass
+class AIConcurrencyConfig:
+    """
+    Límites de la pasada de IA. rpm / tpm = 0 desactiva ese límite.
+    concurrency = 1 reproduce el modo secuencial anterior; batch_size = 1 desactiva los
+    prompts con varias transacciones.
+    """
+    concurrency: int = 4
+    batch_size: int = 20
+    rpm: int = 0
+    tpm: int = 0
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_cap: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> AIConcurrencyConfig:
+        return cls(
+            concurrency=max(1, _env_int("AZURE_FOUNDRY_CONCURRENCY", cls.concurrency)),
+            batch_size=max(1, _env_int("AZURE_FOUNDRY_BATCH_SIZE", cls.batch_size)),
+            rpm=_env_int("AZURE_FOUNDRY_RPM", cls.rpm),
+            tpm=_env_int("AZURE_FOUNDRY_TPM", cls.tpm),
+            max_retries=_env_int("AZURE_FOUNDRY_MAX_RETRIES", cls.max_retries),
+        )
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: se recarga a rate_per_minute / 60 por segundo hasta capacity.
+    Por defecto capacity = 10 s de cuota, para no gastar el minuto entero en una ráfaga.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Descuenta amount (puede quedar en negativo) y devuelve cuántos segundos hay que
+        esperar antes de usarlo. Reservar primero mantiene el orden FIFO entre threads.
+        """
+        with self._lock:
+            self._refill()
+            # un pedido más grande que el bucket no puede bloquear para siempre
+            amount = min(amount, self.capacity)
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """
+        Corrige una reserva con el consumo real (delta > 0 = se gastó más de lo estimado).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class RateLimiter:
+    """
+    Combina los límites de requests/min y tokens/min de un deployment.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+
+    def acquire(self, tokens: int, cancelled: Callable[[], bool] | None = None) -> bool:
+        """
+        Bloquea hasta tener cupo para 1 request de ~tokens tokens. False si se canceló esperando.
+        """
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return _sleep(delay, cancelled)
+
+    def record_usage(self, estimated: int, actual: int | None) -> None:
+        if self.tokens is not None and actual is not None:
+            self.tokens.adjust(actual - estimated)
+
+
+def _sleep(seconds: float, cancelled: Callable[[], bool] | None = None, step: float = 0.2) -> bool:
+    """
+    Duerme en pasos cortos para que la cancelación responda. False si se canceló.
+    """
+    end = time.monotonic() + seconds
+    while True:
+        if cancelled is not None and cancelled():
+            return False
+        left = end - time.monotonic()
+        if left <= 0:
+            return True
+        time.sleep(min(step, left))
+
+
+def estimate_tokens(payload: dict[str, Any]) -> int:
+    text = "".join(str(v) for v in payload.values() if v is not None)
+    return PROMPT_OVERHEAD_TOKENS + len(text) // CHARS_PER_TOKEN
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if _status_code(exc) in RETRYABLE_STATUS:
+        return True
+    try:
+        from openai import APIConnectionError
+    except ImportError:  # pragma: no cover - openai siempre está en requirements
+        return isinstance(exc, (ConnectionError, TimeoutError))
+    return isinstance(exc, (APIConnectionError, ConnectionError, TimeoutError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Lee Retry-After (o retry-after-ms de Azure) de la respuesta de un error HTTP.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue  # formato fecha HTTP: caemos al backoff exponencial
+    return None
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 30.0,
+    retry_after: float | None = None,
+    rng: random.Random | None = None,
+) -> float:
+    """
+    Espera antes del reintento attempt (0, 1, ...): "full jitter" exponencial, y si el
+    servidor mandó Retry-After, al menos eso más un jitter chico para no volver todos juntos.
+    """
+    rng = rng or random
+    if retry_after is not None:
+        return retry_after + rng.uniform(0, base)
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    config: AIConcurrencyConfig,
+    limiter: RateLimiter | None = None,
+    tokens: int = 0,
+    cancelled: Callable[[], bool] | None = None,
+    on_retry: Callable[[BaseException], None] | None = None,
+) -> Optional[T]:
+    """
+    Ejecuta fn respetando el rate limiter y reintentando 429 / errores transitorios.
+    Devuelve None si se canceló; relanza el error si no es reintentable o se agotaron los intentos.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None and not limiter.acquire(tokens, cancelled):
+            return None
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= config.max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, config.backoff_base, config.backoff_cap, retry_after_seconds(e))
+            attempt += 1
+            if on_retry is not None:
+                on_retry(e)
+            if not _sleep(delay, cancelled):
+                return None
+
+
+def run_concurrent(
+    jobs: Iterable[tuple[Hashable, dict[str, Any]]],
+    call: Callable[[dict[str, Any]], Any],
+    on_result: Callable[[Hashable, Any], None],
+    config: AIConcurrencyConfig | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    on_retry: Callable[[BaseException], None] | None = None,
+    on_error: Callable[[Hashable, BaseException], None] | None = None,
+) -> int:
+    """
+    Evalúa (key, payload) con hasta config.concurrency llamadas en vuelo.
+    on_result(key, resultado) se invoca en el thread que llama, a medida que cada
+    llamada termina (no en el orden de entrada). Devuelve cuántas llamadas completaron.
+
+    Una llamada que falla (error no reintentable o reintentos agotados) no corta la
+    pasada: se informa con on_error(key, error) y el resto sigue.
+
+    Solo se encolan `concurrency` llamadas a la vez: al cancelar no queda trabajo pendiente.
+    """
+    config = config or AIConcurrencyConfig.from_env()
+    limiter = RateLimiter(config.rpm, config.tpm)
+    is_cancelled = cancelled or (lambda: False)
+
+    def task(payload: dict[str, Any]) -> Any:
+        tokens = estimate_tokens(payload)
+        res = call_with_retry(lambda: call(payload), config, limiter, tokens, is_cancelled, on_retry)
+        limiter.record_usage(tokens, getattr(res, "total_tokens", None))
+        return res
+
+    done_count = 0
+    pending: dict[Future, Hashable] = {}
+    it = iter(jobs)
+    with ThreadPoolExecutor(max_workers=config.concurrency, thread_name_prefix="ai") as pool:
+        try:
+            while True:
+                while len(pending) < config.concurrency and not is_cancelled():
+                    job = next(it, None)
+                    if job is None:
+                        break
+                    key, payload = job
+                    pending[pool.submit(task, payload)] = key
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    key = pending.pop(fut)
+                    try:
+                        res = fut.result()
+                    except Exception as e:
+                        if on_error is not None:
+                            on_error(key, e)
+                        continue
+                    if res is not None:
+                        done_count += 1
+                        on_result(key, res)
+        finally:
+            for fut in pending:
+                fut.cancel()
+    return done_count
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from app.core.models import Catalog, LearnedVerdict
+from app.ai.azure_foundry_client import PROMPT_VERSION
+from app.ai.verdict_cache import VerdictCache
+
+DEFAULT_MIN_SAMPLES = 2
+DEFAULT_TTL_DAYS = 180
+
+# Valores que pone el parser cuando el modelo no devolvió el campo: no son un juicio
+FALLBACK_CATEGORIES = {"", "uncategorized"}
+
+
+@dataclass
+class PromotionReport:
+    added: list[str] = field(default_factory=list)
+    refreshed: list[str] = field(default_factory=list)
+    kept_reviewed: list[str] = field(default_factory=list)
+    conflicting: list[str] = field(default_factory=list)     # la IA no coincidió consigo misma
+    too_few: int = 0                                        # merchants con menos de min_samples
+    stale: int = 0                                          # veredictos de otro prompt / deployment
+
+    @property
+    def changed(self) -> int:
+        return len(self.added) + len(self.refreshed)
+
+    def text(self) -> str:
+        lines = [
+            f"Nuevos: {len(self.added)}",
+            f"Actualizados: {len(self.refreshed)}",
+            f"Revisados por auditor (sin tocar): {len(self.kept_reviewed)}",
+            f"Descartados por veredictos contradictorios: {len(self.conflicting)}",
+            f"Descartados por pocas muestras: {self.too_few}",
+            f"Veredictos ignorados (otro prompt / deployment): {self.stale}",
+        ]
+        if self.added:
+            sample = ", ".join(self.added[:10])
+            more = f" y {len(self.added) - 10} más" if len(self.added) > 10 else ""
+            lines.append(f"\nEjemplos nuevos: {sample}{more}")
+        return "\n".join(lines)
+
+
+def promote_cached_verdicts(
+    cache: VerdictCache,
+    catalog: Catalog,
+    min_samples: int = DEFAULT_MIN_SAMPLES,
+    ttl_days: int = DEFAULT_TTL_DAYS,
+    today: date | None = None,
+    deployment: str | None = None,
+    prompt_version: str = PROMPT_VERSION,
+) -> tuple[Catalog, PromotionReport]:
+    """
+    Convierte los veredictos de la caché en la capa `learned_verdicts` del catálogo.
+
+    Se promueve un merchant solo si tiene al menos min_samples veredictos vigentes y todos
+    coinciden en severidad (contextos distintos del mismo merchant = señal de consistencia).
+    Solo cuentan veredictos del prompt_version actual (y del deployment, si se indica).
+    Las entradas con reviewed=true no se tocan; las demás se renuevan con la caché actual.
+    Devuelve un catálogo nuevo: el llamador decide si guardarlo.
+    """
+    today = today or date.today()
+    report = PromotionReport()
+
+    by_merchant: dict[str, list[tuple]] = defaultdict(list)
+    for row in cache.verdicts():
+        if row[2].strip().lower() in FALLBACK_CATEGORIES:
+            continue
+        if row[5] != prompt_version or (deployment is not None and row[4] != deployment):
+            report.stale += 1
+            continue
+        by_merchant[row[0]].append(row)
+
+    current = {v.merchant: v for v in catalog.learned_verdicts}
+    previous = set(current)
+    for merchant, rows in by_merchant.items():
+        if merchant in current and current[merchant].reviewed:
+            report.kept_reviewed.append(merchant)
+            continue
+        if len(rows) < min_samples:
+            report.too_few += 1
+            continue
+        if len({r[1] for r in rows}) > 1:
+            # si antes era unánime y ya no, la entrada sin revisar deja de valer
+            current.pop(merchant, None)
+            report.conflicting.append(merchant)
+            continue
+
+        latest = max(rows, key=lambda r: r[6])
+        _, severity, category, reason, row_deployment, row_version, _ = latest
+        current[merchant] = LearnedVerdict(
+            merchant=merchant,
+            severity=severity,
+            category=category,
+            reason=reason,
+            source=f"ai:{row_deployment}/{row_version}",
+            samples=len(rows),
+            learned_at=today.isoformat(),
+            expires=(today + timedelta(days=ttl_days)).isoformat(),
+        )
+        (report.refreshed if merchant in previous else report.added).append(merchant)
+
+    learned = sorted(current.values(), key=lambda v: v.merchant)
+    return catalog.model_copy(update={"learned_verdicts": learned}), report
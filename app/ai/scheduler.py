@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any
+
+# Peso por flag de reglas: lo DIRECT se revisa antes que lo POSSIBLE, y eso antes que
+# los OK que entraron solo por la heurística de merchant genérico.
+SEVERITY_WEIGHT = {"DIRECT_WARN": 3.0, "POSSIBLE_WARN": 2.0}
+DEFAULT_SEVERITY_WEIGHT = 1.0
+
+REASON_SEPARATOR = " | "
+
+
+@dataclass
+class Candidate:
+    """
+    Un grupo de filas con el mismo contexto de prompt (una llamada de IA).
+    """
+    key: int
+    payload: dict[str, Any]
+    rows: int
+    amount: float             # suma de |amount| de las filas del grupo
+    flag: str
+    reasons: str = ""
+    novel: bool = True        # merchant nunca visto por la IA (no está en la caché)
+
+    @property
+    def ambiguity(self) -> float:
+        """
+        1 si las reglas dudaron: POSSIBLE_WARN o varias reglas distintas disparadas a la vez.
+        """
+        if self.flag == "POSSIBLE_WARN":
+            return 1.0
+        return 1.0 if self.reasons.count(REASON_SEPARATOR) >= 1 else 0.0
+
+    @property
+    def score(self) -> float:
+        """
+        Prioridad: severidad manda (x2), el monto suma en escala log ($5 ~0.8, $9.000 ~4),
+        y ambigüedad, novedad y filas cubiertas desempatan.
+        """
+        severity = SEVERITY_WEIGHT.get(self.flag, DEFAULT_SEVERITY_WEIGHT)
+        return (
+            2.0 * severity
+            + math.log10(1.0 + abs(self.amount))
+            + self.ambiguity
+            + (1.0 if self.novel else 0.0)
+            + 0.5 * math.log2(max(self.rows, 1))
+        )
+
+
+def prioritize(candidates: list[Candidate]) -> list[Candidate]:
+    """
+    Orden de gasto del presupuesto: mayor score primero (estable ante empates: orden del archivo).
+    """
+    return sorted(candidates, key=lambda c: -c.score)
+
+
+@dataclass
+class AIBudget:
+    """
+    Presupuesto de una pasada de IA. max_calls = transacciones (grupos) a evaluar,
+    max_tokens = tokens reportados por el servicio (0 = sin tope).
+    Lo que quede pendiente se retoma volviendo a ejecutar: lo ya evaluado no se repite.
+    """
+    max_calls: int
+    max_tokens: int = 0
+    spent_calls: int = 0
+    spent_tokens: int = 0
+    pending: int = 0          # grupos que quedaron sin evaluar en la última pasada
+
+    @classmethod
+    def from_env(cls, max_calls: int) -> AIBudget:
+        raw = os.getenv("AZURE_FOUNDRY_TOKEN_BUDGET", "").strip()
+        return cls(max_calls=max_calls, max_tokens=int(raw) if raw.isdigit() else 0)
+
+    @property
+    def remaining_calls(self) -> int:
+        return max(self.max_calls - self.spent_calls, 0)
+
+    @property
+    def remaining_tokens(self) -> int | None:
+        return None if not self.max_tokens else max(self.max_tokens - self.spent_tokens, 0)
+
+    def exhausted(self) -> bool:
+        return self.remaining_calls == 0 or self.remaining_tokens == 0
+
+    def charge(self, calls: int, tokens: int | None) -> None:
+        self.spent_calls += calls
+        self.spent_tokens += tokens or 0
+
+    def report(self) -> str:
+        tokens = f"{self.spent_tokens:,} tokens"
+        if self.max_tokens:
+            tokens += f" de {self.max_tokens:,}"
+        text = f"IA: {self.spent_calls}/{self.max_calls} transacciones evaluadas, {tokens}"
+        if self.pending:
+            text += f" — quedan {self.pending} pendientes (volver a ejecutar para continuar)"
+        return text
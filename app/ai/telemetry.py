@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+# Precios por 1K tokens (USD) para estimar el costo de una pasada. Defaults ~gpt-4o;
+# ajustar al contrato con AZURE_FOUNDRY_PRICE_INPUT_1K / AZURE_FOUNDRY_PRICE_OUTPUT_1K.
+DEFAULT_PRICE_INPUT_1K = 0.0025
+DEFAULT_PRICE_OUTPUT_1K = 0.01
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+@dataclass
+class CallRecord:
+    """
+    Un request HTTP al modelo (un intento: los reintentos quedan como registros aparte).
+    """
+    kind: str                 # "single" | "batch"
+    latency_s: float
+    status: str               # "ok" | código HTTP / nombre del error
+    items: int = 1
+    items_parsed: int = 0     # items con veredicto válido en la respuesta
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class AITelemetry:
+    """
+    Instrumentación de una pasada de IA. Thread-safe: el cliente registra cada request
+    desde los threads del pool. report() agrega todo en un dict (JSON-serializable).
+    """
+    deployment: str = ""
+    calls: list[CallRecord] = field(default_factory=list)
+    retries: int = 0
+    failed_jobs: int = 0      # llamadas que fallaron del todo (sin veredicto, quedan pendientes)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_call(self, record: CallRecord) -> None:
+        with self._lock:
+            self.calls.append(record)
+
+    def record_retry(self, exc: BaseException | None = None) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self, key: Any = None, exc: BaseException | None = None) -> None:
+        with self._lock:
+            self.failed_jobs += 1
+
+    def record_cache(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def report(
+        self,
+        price_input_1k: Optional[float] = None,
+        price_output_1k: Optional[float] = None,
+    ) -> dict[str, Any]:
+        if price_input_1k is None:
+            price_input_1k = _env_float("AZURE_FOUNDRY_PRICE_INPUT_1K", DEFAULT_PRICE_INPUT_1K)
+        if price_output_1k is None:
+            price_output_1k = _env_float("AZURE_FOUNDRY_PRICE_OUTPUT_1K", DEFAULT_PRICE_OUTPUT_1K)
+
+        with self._lock:
+            calls = list(self.calls)
+            retries, hits, misses = self.retries, self.cache_hits, self.cache_misses
+            failed_jobs = self.failed_jobs
+
+        ok = [c for c in calls if c.status == "ok"]
+        latencies = np.array([c.latency_s for c in calls]) if calls else np.zeros(0)
+        prompt = sum(c.prompt_tokens for c in calls)
+        completion = sum(c.completion_tokens for c in calls)
+        evaluated = sum(c.items_parsed for c in ok)
+        errors: dict[str, int] = {}
+        for c in calls:
+            if c.status != "ok":
+                errors[c.status] = errors.get(c.status, 0) + 1
+        cost = prompt / 1000 * price_input_1k + completion / 1000 * price_output_1k
+
+        def pct(q: float) -> Optional[float]:
+            return round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+
+        return {
+            "deployment": self.deployment,
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "requests": len(calls),
+            "requests_ok": len(ok),
+            "batch_requests": sum(1 for c in calls if c.kind == "batch"),
+            "errors": errors,
+            "retries": retries,
+            "failed_jobs": failed_jobs,
+            "transactions_evaluated": evaluated,
+            "parse_failures": sum(c.items - c.items_parsed for c in ok),
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "latency_p50_s": pct(50),
+            "latency_p95_s": pct(95),
+            "latency_p99_s": pct(99),
+            "latency_max_s": round(float(latencies.max()), 3) if len(latencies) else None,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "tokens_per_transaction": round((prompt + completion) / evaluated, 1) if evaluated else None,
+            "price_input_1k": price_input_1k,
+            "price_output_1k": price_output_1k,
+            "estimated_cost_usd": round(cost, 4),
+            "calls": [asdict(c) for c in calls],
+        }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """
+    Texto para la UI (sin el detalle por llamada).
+    """
+    def ms(key: str) -> str:
+        v = report.get(key)
+        return "-" if v is None else f"{v * 1000:.0f} ms"
+
+    errors = ", ".join(f"{k}: {v}" for k, v in report["errors"].items()) or "ninguno"
+    return (
+        f"Deployment: {report['deployment'] or '-'}\n"
+        f"Duración: {report['wall_seconds']:.1f} s\n"
+        f"Requests: {report['requests']} ({report['batch_requests']} batch), reintentos: {report['retries']}\n"
+        f"Errores: {errors} (llamadas sin veredicto: {report.get('failed_jobs', 0)})\n"
+        f"Transacciones evaluadas por la IA: {report['transactions_evaluated']} "
+        f"(respuestas inválidas: {report['parse_failures']})\n"
+        f"Caché: {report['cache_hits']} aciertos / {report['cache_misses']} fallos\n"
+        f"Latencia p50 / p95 / p99: {ms('latency_p50_s')} / {ms('latency_p95_s')} / {ms('latency_p99_s')}\n"
+        f"Tokens: {report['prompt_tokens']:,} prompt + {report['completion_tokens']:,} salida "
+        f"({report['tokens_per_transaction'] or '-'} por transacción)\n"
+        f"Costo estimado: US$ {report['estimated_cost_usd']:.4f}"
+    )
+
+
+def format_report_line(report: dict[str, Any]) -> str:
+    """
+    Resumen de una línea para la barra de estado.
+    """
+    p95 = report.get("latency_p95_s")
+    p95_text = "-" if p95 is None else f"{p95 * 1000:.0f} ms"
+    return (
+        f"IA: {report['requests']} requests, p95 {p95_text}, "
+        f"{report['prompt_tokens'] + report['completion_tokens']:,} tokens, "
+        f"~US$ {report['estimated_cost_usd']:.4f}"
+    )
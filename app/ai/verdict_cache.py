@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from app.ai.azure_foundry_client import PROMPT_VERSION, AIResult
+from app.core.text import normalize_text
+
+DEFAULT_CACHE_NAME = "ai_verdicts.sqlite"
+DEFAULT_TTL_DAYS = 90
+DEFAULT_MAX_ENTRIES = 50_000
+
+# Cada cuántos put() se re-aplica el tope de entradas
+EVICT_EVERY_PUTS = 500
+
+# Campos del payload que entran al prompt: si cambian, cambia el veredicto
+KEY_FIELDS = ("merchant", "description", "mcc_description", "mcc", "flag", "reasons")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key TEXT PRIMARY KEY,
+    merchant TEXT NOT NULL,
+    category TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    web_evidence TEXT,
+    deployment TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts(last_used);
+CREATE INDEX IF NOT EXISTS verdicts_merchant ON verdicts(merchant);
+"""
+
+
+def normalize_value(field: str, value: Any) -> str:
+    """
+    Texto canónico de un campo: sin mayúsculas ni espacios repetidos; MCC a 4 dígitos.
+    """
+    s = normalize_text(value)
+    if field == "mcc":
+        s = s.removesuffix(".0")
+        if s.isdigit():
+            s = s.zfill(4)
+    return s
+
+
+def prompt_group_key(payload: dict[str, Any]) -> tuple[str, ...]:
+    """
+    Contexto normalizado del prompt: filas con la misma clave reciben el mismo veredicto.
+    """
+    return tuple(normalize_value(f, payload.get(f)) for f in KEY_FIELDS)
+
+
+def cache_key(payload: dict[str, Any], deployment: str, prompt_version: str = PROMPT_VERSION) -> str:
+    raw = json.dumps([deployment, prompt_version, prompt_group_key(payload)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Caché local (SQLite) de veredictos de IA. Clave = hash de los inputs normalizados
+    del prompt + deployment + PROMPT_VERSION: cambiar el prompt invalida todo solo.
+    Vencimiento por TTL y tope de entradas (se descartan las menos usadas recientemente).
+    Thread-safe: la pasada concurrente guarda resultados desde varios threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_days: float = DEFAULT_TTL_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self.evict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_text(self) -> str:
+        total = self.hits + self.misses
+        return f"Caché IA: {self.hits}/{total} aciertos ({self.hit_rate:.0%})"
+
+    def known_merchants(self) -> set[str]:
+        """
+        Merchants (normalizados) que ya tienen algún veredicto vigente (TTL).
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            return {
+                m for (m,) in self._conn.execute("SELECT DISTINCT merchant FROM verdicts WHERE created >= ?", (cutoff,))
+            }
+
+    def verdicts(self) -> list[tuple[str, str, str, str, str, str, float]]:
+        """
+        Veredictos vigentes (TTL): (merchant, severity, category, reason, deployment,
+        prompt_version, created), ordenados por merchant.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            return self._conn.execute(
+                "SELECT merchant, severity, category, reason, deployment, prompt_version, created "
+                "FROM verdicts WHERE created >= ? AND merchant != '' ORDER BY merchant",
+                (cutoff,),
+            ).fetchall()
+
+    def get(self, key: str) -> Optional[AIResult]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT category, severity, reason, web_evidence, created FROM verdicts WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[4] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE verdicts SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return AIResult(category=row[0], severity=row[1], reason=row[2], web_evidence=row[3])
+
+    def put(self, key: str, result: AIResult, merchant: str, deployment: str,
+            prompt_version: str = PROMPT_VERSION) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_value("merchant", merchant), result.category, result.severity,
+                 result.reason, result.web_evidence, deployment, prompt_version, now, now),
+            )
+            self._conn.commit()
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY_PUTS == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Borra vencidos (TTL) y, si sobran, los menos usados hasta max_entries. Devuelve cuántos borró.
+        """
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM verdicts WHERE created < ?", (time.time() - self.ttl_seconds,))
+            removed = cur.rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] - self.max_entries
+            if excess > 0:
+                cur = self._conn.execute(
+                    "DELETE FROM verdicts WHERE key IN "
+                    "(SELECT key FROM verdicts ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+
+class CachedClient:
+    """
+    Envuelve AzureFoundryClient: lookup() resuelve desde la caché sin red ni rate limit;
+    evaluate_transaction() consulta el modelo y guarda el veredicto. Las respuestas que
+    no se pudieron parsear (valores por defecto) no se guardan: se reintentan la próxima vez.
+    """
+
+    def __init__(self, client: Any, cache: VerdictCache):
+        self.client = client
+        self.cache = cache
+        self.deployment = getattr(client, "model", "")
+
+    def lookup(self, payload: dict[str, Any]) -> Optional[AIResult]:
+        return self.cache.get(cache_key(payload, self.deployment))
+
+    def evaluate_transaction(self, payload: dict[str, Any]) -> AIResult:
+        res = self.client.evaluate_transaction(payload)
+        if res.parsed:
+            self.cache.put(cache_key(payload, self.deployment), res, payload.get("merchant") or "", self.deployment)
+        return res
+
+    def evaluate_batch(self, rows: list[dict[str, Any]]) -> dict[str, AIResult]:
+        results = self.client.evaluate_batch(rows)
+        for row in rows:
+            res = results.get(str(row["id"]))
+            if res is not None and res.parsed:
+                self.cache.put(cache_key(row, self.deployment), res, row.get("merchant") or "", self.deployment)
+        return results
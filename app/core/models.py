@@ -38,6 +38,23 @@ class AllowlistPattern(BaseModel):
     pattern: str
     reason: str
 
+class LearnedVerdict(BaseModel):
+    """
+    Veredicto de IA promovido a regla: se aplica por merchant normalizado (lookup exacto)
+    sobre el resultado de las reglas, hasta `expires`. Sin revisar solo puede subir la
+    severidad de las reglas; un auditor lo valida con reviewed=true (entonces reemplaza el
+    flag y las promociones siguientes no lo pisan) o lo borra del catálogo.
+    """
+    merchant: str                 # normalizado: minúsculas, espacios simples
+    severity: Severity
+    category: str = ""
+    reason: str
+    source: str                   # procedencia: "ai:<deployment>/<prompt_version>"
+    samples: int = 1              # veredictos en caché que coincidieron
+    learned_at: str               # fecha ISO
+    expires: str                  # fecha ISO; vencido = se ignora
+    reviewed: bool = False
+
 class Catalog(BaseModel):
     version: str = "1.3.0"
     
@@ -55,5 +72,20 @@ class Catalog(BaseModel):
     mcc_description_rules: List[MccDescriptionRule] = Field(default_factory=list)
     purchase_category_rules: List[PurchaseCategoryRule] = Field(default_factory=list)
 
+    # Capa aprendida: veredictos de IA confirmados, aplicados como lookup por merchant
+    learned_verdicts: List[LearnedVerdict] = Field(default_factory=list)
+
     def to_dict(self) -> Dict:
-        return self.model_dump()
\ No newline at end of file
+        return self.model_dump()
+
+class SheetLayout(BaseModel):
+    """
+    Layout conocido de una hoja (formato de banco): dónde está el header
+    y qué índice de columna corresponde a cada campo canónico.
+    """
+    fingerprint: str
+    n_columns: int
+    header_row: Optional[int] = None  # None = sin headers (posicional)
+    header_tokens: List[str] = Field(default_factory=list)
+    first_row_types: List[str] = Field(default_factory=list)
+    mapping: Dict[str, int] = Field(default_factory=dict)  # canonical -> índice de columna
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import os
+import sys
+
+def enable_copy_on_write() -> None:
+    """
+    Activa Copy-on-Write de pandas: slices, rename, reset_index, etc. comparten memoria
+    hasta que alguien escribe. Así el pipeline (ingesta -> limpieza -> reglas) no duplica
+    el dataset completo en cada paso.
+
+    Se llama una vez al arrancar (app/main.py, conftest de tests). No importa pandas: si
+    todavía no se cargó, pandas lee la variable de entorno al importarse, y los procesos
+    hijos (pool de ingesta por lotes, spawn) la heredan.
+    """
+    os.environ["PANDAS_COPY_ON_WRITE"] = "1"
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        pd.set_option("mode.copy_on_write", True)
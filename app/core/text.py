@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+_SPACES = re.compile(r"\s+")
+
+
+def is_missing(value: Any) -> bool:
+    """
+    None, NaN, NaT o pd.NA, sin importar pandas.
+    """
+    if value is None:
+        return True
+    try:
+        return bool(value != value)
+    except (TypeError, ValueError):  # pd.NA: la comparación es ambigua
+        return True
+
+
+def normalize_text(value: Any) -> str:
+    """
+    Texto canónico para comparar: sin mayúsculas ni espacios repetidos; faltantes -> "".
+    Lo comparten las claves de la caché de IA, los veredictos aprendidos y los
+    fingerprints de layouts.
+    """
+    if is_missing(value):
+        return ""
+    return _SPACES.sub(" ", str(value)).strip().lower()
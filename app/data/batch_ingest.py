@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import glob
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from app.core.models import SheetLayout
+from app.data.ingest import ingest_sheet
+from app.data.layout_registry import LayoutRegistry
+from app.data.readers import EXCEL_EXTENSIONS, CSV_EXTENSIONS, PARQUET_EXTENSIONS, NDJSON_EXTENSIONS, list_sources
+from app.data.schema import concat_compact
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = EXCEL_EXTENSIONS + CSV_EXTENSIONS + PARQUET_EXTENSIONS + NDJSON_EXTENSIONS
+
+# Cada cuánto se consulta la cancelación mientras ninguna hoja termina
+CANCEL_POLL_SECONDS = 0.2
+
+
+@dataclass
+class IngestError:
+    path: str
+    sheet: str | None
+    message: str
+
+
+@dataclass
+class SheetPartition:
+    """
+    Resultado de una (archivo, hoja): dataset canónico etiquetado o error.
+    """
+    path: str
+    sheet: str
+    df: pd.DataFrame | None = None
+    issues: list[str] = field(default_factory=list)
+    error: str | None = None
+    learned: SheetLayout | None = None  # layout nuevo (probe + mapping) para registrar
+
+
+@dataclass
+class BatchResult:
+    df: pd.DataFrame
+    errors: list[IngestError]
+    issues: list[str]
+    rows_by_source: dict[tuple[str, str], int]
+
+
+def discover_sources(source: str) -> list[str]:
+    """
+    Directorio (recursivo) o patrón glob -> archivos soportados.
+    Ignora los lock files de Excel (~$archivo.xlsx).
+    """
+    p = Path(source)
+    if p.is_dir():
+        files = sorted(f for f in p.rglob("*") if f.is_file())
+    else:
+        files = sorted(Path(f) for f in glob.glob(source, recursive=True))
+    return [
+        str(f) for f in files
+        if f.suffix.lower() in SUPPORTED_EXTENSIONS and not f.name.startswith("~$")
+    ]
+
+
+def plan_batch(paths: list[str]) -> tuple[list[tuple[str, str]], list[IngestError]]:
+    """
+    Lista las hojas de cada archivo. Un archivo corrupto se reporta y no aborta el lote.
+    """
+    tasks: list[tuple[str, str]] = []
+    errors: list[IngestError] = []
+    for path in paths:
+        try:
+            tasks.extend((path, sheet) for sheet in list_sources(path))
+        except Exception as e:
+            errors.append(IngestError(path, None, f"No se pudo abrir: {e}"))
+    return tasks, errors
+
+
+def _constant_category(value: str, n: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[value])
+
+
+def _ingest_task(path: str, sheet: str, registry_path: str | None, compact: bool) -> SheetPartition:
+    """
+    Corre en un proceso del pool: debe ser una función de módulo (picklable).
+    El registro de layouts se lee aquí pero solo el proceso principal lo escribe.
+    """
+    try:
+        registry = LayoutRegistry.load(registry_path) if registry_path else None
+        res = ingest_sheet(path, sheet, registry=registry, compact=compact)
+        df = res.df
+        df["source_file"] = _constant_category(path, len(df))
+        df["source_sheet"] = _constant_category(sheet, len(df))
+        learned = None if res.known_layout else res.probe.model_copy(update={"mapping": res.mapping})
+        return SheetPartition(path, sheet, df=df, issues=res.issues, learned=learned)
+    except Exception as e:
+        return SheetPartition(path, sheet, error=str(e))
+
+
+def iter_batch(
+    tasks: list[tuple[str, str]],
+    max_workers: int | None = None,
+    compact: bool = True,
+    registry_path: str | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[SheetPartition]:
+    """
+    Procesa cada (archivo, hoja) en un pool de procesos y entrega las particiones
+    a medida que terminan (orden de finalización, no de entrada).
+    Si cancelled() da True se deja de entregar: las hojas en cola no arrancan y solo se
+    espera a las que ya estaban corriendo.
+    """
+    # spawn: seguro aunque el proceso padre tenga threads (UI Qt)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(_ingest_task, path, sheet, registry_path, compact): (path, sheet) for path, sheet in tasks}
+        pending = set(futures)
+        while pending:
+            if cancelled is not None and cancelled():
+                pool.shutdown(wait=False, cancel_futures=True)
+                return
+            done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, sheet = futures[fut]
+                try:
+                    yield fut.result()
+                except Exception as e:  # p.ej. BrokenProcessPool: el worker murió
+                    yield SheetPartition(path, sheet, error=f"Proceso de ingesta falló: {e}")
+
+
+def ingest_batch(
+    source: str,
+    max_workers: int | None = None,
+    compact: bool = True,
+    registry_path: str | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+) -> BatchResult:
+    """
+    Ingesta de un lote (directorio o glob) a un único dataset canónico con columnas
+    source_file / source_sheet. Los errores por archivo/hoja se acumulan en BatchResult.errors.
+    Un lote cancelado devuelve un df vacío y no registra layouts.
+    """
+    tasks, errors = plan_batch(discover_sources(source))
+    parts: list[pd.DataFrame] = []
+    issues: list[str] = []
+    rows_by_source: dict[tuple[str, str], int] = {}
+    learned: list[SheetLayout] = []
+
+    for done, part in enumerate(iter_batch(tasks, max_workers, compact, registry_path, cancelled), start=1):
+        if part.error is not None:
+            errors.append(IngestError(part.path, part.sheet, part.error))
+        else:
+            parts.append(part.df)
+            issues.extend(f"{Path(part.path).name} [{part.sheet}]: {i}" for i in part.issues)
+            rows_by_source[(part.path, part.sheet)] = len(part.df)
+            if part.learned is not None:
+                learned.append(part.learned)
+        if on_progress is not None:
+            on_progress(done, len(tasks))
+
+    if cancelled is not None and cancelled():
+        return BatchResult(pd.DataFrame(), errors, issues, rows_by_source)
+
+    if registry_path and learned:
+        registry = LayoutRegistry.load(registry_path)
+        for layout in learned:
+            registry.learn(layout, layout.mapping)
+        try:
+            registry.save()
+        except OSError as e:
+            logger.warning("No se pudo guardar el registro de layouts: %s", e)
+
+    if not parts:
+        return BatchResult(pd.DataFrame(), errors, issues, rows_by_source)
+
+    # Orden estable (archivo, hoja) independientemente de qué proceso terminó primero
+    parts.sort(key=lambda d: (d["source_file"].iat[0], d["source_sheet"].iat[0]) if len(d) else ("", ""))
+    df = concat_compact(parts) if compact else pd.concat(parts, ignore_index=True)
+    return BatchResult(df, errors, issues, rows_by_source)
@@ -3,17 +3,37 @@ from __future__ import annotations
 import pandas as pd
 from dateutil import parser
 
+from app.data.schema import compact_schema
+
 UNKNOWN_MCC = "9999"
 
-def validate_and_clean(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
-    issues: list[str] = []
-    out = df.copy()
+# Problemas que se cuentan por fila al limpiar -> mensaje para el usuario
+ISSUE_MESSAGES = {
+    "merchant_missing": "{} filas sin merchant (rellenado)",
+}
+
+def validate_and_clean(df: pd.DataFrame, compact: bool = False) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Normaliza el esquema canónico. Con compact=True además reduce memoria
+    (categoricals, MCC uint16); ver app.data.schema.
+    """
+    out, counts = clean_with_counts(df, compact=compact)
+    return out, format_issues(counts)
+
+def format_issues(counts: dict[str, int]) -> list[str]:
+    return [ISSUE_MESSAGES[k].format(n) for k, n in counts.items() if n]
+
+def clean_with_counts(df: pd.DataFrame, compact: bool = False) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Igual que validate_and_clean pero devuelve los problemas como conteos, para sumarlos
+    entre chunks (lectura por chunks) y reportarlos una sola vez.
+    """
+    counts = dict.fromkeys(ISSUE_MESSAGES, 0)
+    out = df.copy(deep=False)  # Copy-on-Write: las columnas se copian solo al modificarlas
 
     # --- REQUIRED ---
     if "merchant" in out.columns:
-        miss = out["merchant"].isna().sum()
-        if miss:
-            issues.append(f"{miss} filas sin merchant (rellenado)")
+        counts["merchant_missing"] = int(out["merchant"].isna().sum())
         out["merchant"] = out["merchant"].fillna("UNKNOWN MERCHANT").astype(str).str.strip()
 
     if "mcc" in out.columns:
@@ -27,7 +47,10 @@ def validate_and_clean(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
             def _parse(x):
                 try: return parser.parse(str(x))
                 except: return pd.NaT
-            out["date"] = out["date"].apply(_parse)
+            # Las fechas se repiten muchísimo: se parsea cada valor distinto una sola vez
+            codes, uniques = pd.factorize(out["date"])
+            parsed = pd.Series([_parse(u) for u in uniques] + [pd.NaT])  # código -1 (NaN) -> NaT
+            out["date"] = pd.Series(parsed.to_numpy()[codes], index=out.index)
 
     # --- OPTIONAL COLUMNS (v1.2.0) ---
     # Aseguramos que existan description, purchase_category, etc.
@@ -44,4 +67,7 @@ def validate_and_clean(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
         # Solo copiamos si description tiene algo
         out.loc[mask_empty, "purchase_category"] = out.loc[mask_empty, "description"]
 
-    return out, issues
\ No newline at end of file
+    if compact:
+        out = compact_schema(out)
+
+    return out, counts
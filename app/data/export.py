@@ -1,9 +1,23 @@
 from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any
+
 import pandas as pd
 
+from app.data.schema import to_export_frame
+
 def export_to_excel(df: pd.DataFrame, path: str) -> None:
     with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="results")
+        to_export_frame(df).to_excel(writer, index=False, sheet_name="results")
 
 def export_to_csv(df: pd.DataFrame, path: str) -> None:
-    df.to_csv(path, index=False, encoding="utf-8")
+    to_export_frame(df).to_csv(path, index=False, encoding="utf-8")
+
+def write_ai_report(report: dict[str, Any], export_path: str) -> str:
+    """
+    Guarda el reporte de la pasada de IA junto al export: results.xlsx -> results.ai_report.json
+    """
+    path = Path(export_path).with_suffix(".ai_report.json")
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
@@ -75,6 +75,5 @@ def apply_detected_header(df_noheader: pd.DataFrame, header_row: int) -> pd.Data
     Usa la fila detectada como headers reales y retorna df desde header_row+1.
     """
     headers = df_noheader.iloc[header_row].astype(str).tolist()
-    out = df_noheader.iloc[header_row + 1:].copy()
-    out.columns = headers
+    out = df_noheader.iloc[header_row + 1:].set_axis(headers, axis=1)
     return out.reset_index(drop=True)
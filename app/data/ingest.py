@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from app.core.models import SheetLayout
+from app.data.cleaning import clean_with_counts, format_issues, validate_and_clean
+from app.data.header_detection import apply_detected_header, detect_header_row
+from app.data.layout_registry import LayoutRegistry, probe_layout
+from app.data.profile import DatasetProfile
+from app.data.mapping import REQUIRED_CANONICAL, apply_index_mapping, infer_index_mapping
+from app.data.readers import (
+    DEFAULT_CHUNK_ROWS, HEAD_ROWS, file_kind, is_self_describing, iter_body_chunks, read_head_noheader,
+)
+from app.data.schema import concat_compact
+
+
+def load_canonical(
+    path: str,
+    sheet_name: str | int | None,
+    header_row: int | None,
+    mapping: dict[str, int],
+    compact: bool = True,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    headers: list[str] | None = None,
+    profile: DatasetProfile | None = None,
+) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Lee el archivo por chunks y aplica el mismo camino que la UI (mapping por índice +
+    validate_and_clean) a cada uno. Con compact=True cada chunk se compacta antes de
+    juntarlos, así el pico de memoria es ~1 chunk crudo + el dataset compacto
+    (permite extractos de más de 1.048.576 filas, el límite de Excel).
+    Con profile, cada chunk limpio se agrega al perfil en la misma pasada.
+    """
+    parts: list[pd.DataFrame] = []
+    counts: dict[str, int] = {}
+
+    for chunk in iter_body_chunks(path, sheet_name, header_row, chunksize=chunksize, headers=headers):
+        cleaned, chunk_counts = clean_with_counts(apply_index_mapping(chunk, mapping), compact=compact)
+        parts.append(cleaned)
+        for k, n in chunk_counts.items():
+            counts[k] = counts.get(k, 0) + n
+        if profile is not None:
+            profile.update(cleaned)
+
+    # Un solo mensaje por problema con el total del archivo, igual que sin chunks
+    issues = format_issues(counts)
+    if not parts:
+        empty, _ = validate_and_clean(pd.DataFrame(columns=list(mapping)))
+        return empty, issues
+
+    df = concat_compact(parts) if compact else pd.concat(parts, ignore_index=True)
+    return df, issues
+
+
+@dataclass
+class SheetIngest:
+    df: pd.DataFrame
+    issues: list[str]
+    header_row: int | None
+    mapping: dict[str, int]
+    probe: SheetLayout
+    known_layout: bool
+
+
+def ingest_sheet(
+    path: str,
+    sheet_name: str | int | None,
+    registry: LayoutRegistry | None = None,
+    compact: bool = True,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+) -> SheetIngest:
+    """
+    Camino completo de una hoja sin UI: layout conocido o detección de header,
+    mapping canónico y limpieza por chunks. Lanza ValueError si faltan columnas requeridas.
+    """
+    head = read_head_noheader(path, sheet_name)
+
+    layout = registry.match(head) if registry is not None else None
+    if layout is not None:
+        hdr = layout.header_row
+    elif is_self_describing(path):
+        hdr = 0
+    else:
+        hdr = detect_header_row(head, max_scan_rows=HEAD_ROWS)
+
+    names = list(apply_detected_header(head, hdr).columns) if hdr is not None else list(range(head.shape[1]))
+    mapping = layout.mapping if layout is not None else infer_index_mapping(names)
+
+    miss = [c for c in REQUIRED_CANONICAL if c not in mapping]
+    if miss:
+        raise ValueError("No pude mapear columnas necesarias: " + ", ".join(miss))
+
+    # En Excel el ancho real sale de la hoja completa; en el resto, del head
+    headers = [str(c) for c in names] if hdr is not None and file_kind(path) != "excel" else None
+    df, issues = load_canonical(path, sheet_name, hdr, mapping, compact=compact, chunksize=chunksize, headers=headers)
+    return SheetIngest(
+        df=df,
+        issues=issues,
+        header_row=hdr,
+        mapping=mapping,
+        probe=probe_layout(head, hdr),
+        known_layout=layout is not None,
+    )
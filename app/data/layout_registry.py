@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import numbers
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from app.core.models import SheetLayout
+from app.core.text import normalize_text
+
+DEFAULT_REGISTRY_NAME = "layouts.json"
+
+
+def _cell_type(x) -> str:
+    if pd.isna(x) or (isinstance(x, str) and not x.strip()):
+        return "empty"
+    if isinstance(x, (datetime, date, pd.Timestamp)):
+        return "date"
+    if isinstance(x, numbers.Number):
+        return "num"
+    s = str(x).strip()
+    if s.replace(".", "", 1).replace("-", "", 1).isdigit():
+        return "num"
+    return "text"
+
+
+def fingerprint(n_columns: int, header_tokens: list[str], first_row_types: list[str]) -> str:
+    raw = json.dumps([n_columns, header_tokens, first_row_types], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def probe_layout(df_noheader: pd.DataFrame, header_row: int | None) -> SheetLayout:
+    """
+    Calcula el fingerprint de la hoja asumiendo el header en header_row
+    (None = sin headers: se usa solo la primera fila de datos).
+    El mapping queda vacío hasta que se aprende en el análisis.
+    """
+    n_columns = int(df_noheader.shape[1])
+    first_data = 0 if header_row is None else header_row + 1
+
+    tokens: list[str] = []
+    if header_row is not None and header_row < len(df_noheader):
+        tokens = [normalize_text(x) for x in df_noheader.iloc[header_row].tolist()]
+
+    types: list[str] = []
+    if first_data < len(df_noheader):
+        types = [_cell_type(x) for x in df_noheader.iloc[first_data].tolist()]
+
+    return SheetLayout(
+        fingerprint=fingerprint(n_columns, tokens, types),
+        n_columns=n_columns,
+        header_row=header_row,
+        header_tokens=tokens,
+        first_row_types=types,
+    )
+
+
+class LayoutRegistry:
+    """
+    Registro persistente (JSON) de layouts de banco ya vistos.
+    Para un layout conocido evita detect_header_row y la decisión fixed/posicional.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.layouts: list[SheetLayout] = []
+
+    @classmethod
+    def load(cls, path: str) -> "LayoutRegistry":
+        reg = cls(path)
+        p = Path(path)
+        if p.exists():
+            data = json.loads(p.read_text(encoding="utf-8"))
+            reg.layouts = [SheetLayout.model_validate(x) for x in data.get("layouts", [])]
+        return reg
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        Path(self.path).write_text(
+            json.dumps({"layouts": [x.model_dump() for x in self.layouts]}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+    def match(self, df_noheader: pd.DataFrame) -> SheetLayout | None:
+        """
+        Prueba solo las filas de header de los layouts registrados con el mismo
+        número de columnas (no escanea la hoja).
+        """
+        n_columns = int(df_noheader.shape[1])
+        for layout in self.layouts:
+            if layout.n_columns != n_columns or not layout.mapping:
+                continue
+            if layout.header_row is not None and layout.header_row >= len(df_noheader):
+                continue
+            if probe_layout(df_noheader, layout.header_row).fingerprint == layout.fingerprint:
+                return layout
+        return None
+
+    def learn(self, probe: SheetLayout, mapping: dict[str, int]) -> SheetLayout:
+        """
+        Registra (o actualiza) el layout con el mapping canónico que funcionó.
+        """
+        for layout in self.layouts:
+            if layout.fingerprint == probe.fingerprint:
+                layout.mapping = dict(mapping)
+                return layout
+        learned = probe.model_copy(update={"mapping": dict(mapping)})
+        self.layouts.append(learned)
+        return learned
@@ -1,16 +1,41 @@
 from __future__ import annotations
 import pandas as pd
 
+from app.data.fixed_mapping import fixed_mapping_for_your_headers
+from app.data.positional_mapping import POSITIONAL
+
 # Definimos las columnas canónicas que el sistema espera
 REQUIRED_CANONICAL = ["date", "merchant", "amount", "mcc"]
 # Agregamos description, purchase_category y mcc_description como opcionales
 OPTIONAL_CANONICAL = ["employee", "description", "purchase_category", "mcc_description"]
 
+# Headers del banco que indican que se puede usar el mapping fijo por nombre
+EXPECTED_BANK_HEADERS = {"Transaction Date", "Clean Merchant Name", "Total Transaction Amount", "MCC", "Purchase Category"}
+
 def apply_column_mapping(df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
     # Invierte el mapping para renombrar: {nombre_original: nombre_canonico}
     rename_map = {mapping[k]: k for k in mapping if mapping[k] in df.columns}
-    out = df.rename(columns=rename_map).copy()
-    return out
+    return df.rename(columns=rename_map)
+
+def apply_index_mapping(df: pd.DataFrame, mapping: dict[str, int]) -> pd.DataFrame:
+    """
+    Renombra por posición: {canonico: indice_columna}. Sirve igual para hojas con
+    headers y posicionales (y no se confunde con headers duplicados).
+    """
+    cols = list(df.columns)
+    for canon, idx in mapping.items():
+        if 0 <= idx < len(cols):
+            cols[idx] = canon
+    return df.set_axis(cols, axis=1)
+
+def infer_index_mapping(columns: list) -> dict[str, int]:
+    """
+    Layout desconocido: headers del banco si están, si no índices fijos (POSITIONAL).
+    """
+    cols = [str(c) for c in columns]
+    if EXPECTED_BANK_HEADERS.issubset(set(cols)):
+        return {canon: cols.index(name) for canon, name in fixed_mapping_for_your_headers().items()}
+    return {canon: idx for canon, idx in POSITIONAL.items() if idx < len(cols)}
 
 def missing_required_columns(df: pd.DataFrame) -> list[str]:
     return [c for c in REQUIRED_CANONICAL if c not in df.columns]
\ No newline at end of file
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import mcc_as_str
+
+# Filas por slice al perfilar un DataFrame que ya está en memoria
+PROFILE_CHUNK_ROWS = 250_000
+
+DEFAULT_COMPRESSION = 500          # t-digest: ~compression/2 centroides, más finos en las colas
+DEFAULT_HEAVY_HITTERS = 20_000     # merchants con conteo (exacto si hay menos distintos que esto)
+DEFAULT_HLL_PRECISION = 14         # 2^14 registros (16 KB), error estándar ~0.8%
+
+
+class TDigest:
+    """
+    t-digest mergeable para cuantiles de montos: centroides (media, peso) más finos en
+    las colas. Se agrega por lotes (vectorizado) y dos digests se combinan con merge().
+    """
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.count = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(np.concatenate((self.means, values)), np.concatenate((self.weights, np.ones(len(values)))))
+
+    def merge(self, other: TDigest) -> None:
+        if not other.count:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate((self.means, other.means)), np.concatenate((self.weights, other.weights)))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """
+        Re-agrupa puntos ordenados: un centroide por unidad de la escala k1
+        (k = δ/2π · asin(2q - 1)), que concentra resolución cerca de q=0 y q=1.
+        """
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        _, cluster = np.unique(np.floor(k), return_inverse=True)
+        w = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=means * weights) / w
+        self.weights = w
+        self.count = float(total)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate(([0.0], centers, [self.count]))
+        fp = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(q * self.count, xp, fp))
+
+
+class HeavyHitters:
+    """
+    Conteos de los valores más frecuentes (resumen de Misra-Gries por lotes): al pasar
+    `capacity` distintos se conservan los mayores y `error` acota lo que se pudo perder
+    por valor. Mientras error == 0 los conteos son exactos.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HEAVY_HITTERS):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.error == 0
+
+    def update(self, values: pd.Series) -> None:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            counts = values.value_counts(sort=False)  # por categoría, sin materializar strings por fila
+            counts = counts[counts > 0]
+            counts.index = counts.index.astype(str)
+        else:
+            counts = values.dropna().astype(str).value_counts(sort=False)
+        self._add(counts)
+
+    def merge(self, other: HeavyHitters) -> None:
+        self.error += other.error
+        self._add(other.counts)
+
+    def _add(self, counts: pd.Series) -> None:
+        if not len(counts):
+            return
+        merged = self.counts.add(counts, fill_value=0).astype("int64")
+        if len(merged) > self.capacity:
+            merged = merged.sort_values(ascending=False, kind="stable")
+            self.error += int(merged.iloc[self.capacity])
+            merged = merged.iloc[:self.capacity]
+        self.counts = merged
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        top = self.counts.sort_values(ascending=False, kind="stable").head(k)
+        return [(str(v), int(c)) for v, c in top.items()]
+
+    def values(self) -> list[str]:
+        return [str(v) for v in self.counts.index]
+
+
+class HyperLogLog:
+    """
+    Cardinalidad aproximada (HyperLogLog): 2^precision registros de un byte, se agrega
+    vectorizado por lote y dos sketches se combinan con el máximo por registro.
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> None:
+        # solo importan los valores distintos: se hashea cada uno una vez
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = pd.Series(values.cat.categories[np.unique(codes[codes >= 0])])
+        else:
+            uniques = pd.Series(pd.unique(values.dropna()))
+        if not len(uniques):
+            return
+        h = pd.util.hash_pandas_object(uniques.astype(str), index=False).to_numpy(dtype=np.uint64)
+        p = self.precision
+        idx = (h >> np.uint64(64 - p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - p)) - 1)
+        # rango = posición del primer 1 en los 64-p bits restantes (frexp da el bit_length exacto)
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: HyperLogLog) -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # rango chico: linear counting
+        return int(round(raw))
+
+
+@dataclass
+class DatasetProfile:
+    """
+    Perfil de un dataset canónico en una sola pasada por chunks y memoria acotada:
+    cuantiles de monto (t-digest), merchants frecuentes y cantidad de distintos (HLL)
+    y conteo exacto por MCC (el dominio de MCC es chico). Es mergeable: perfiles de
+    chunks, hojas o archivos se combinan con merge().
+    """
+    rows: int = 0
+    amount_missing: int = 0
+    amount: TDigest = field(default_factory=TDigest)
+    merchants: HeavyHitters = field(default_factory=HeavyHitters)
+    merchant_cardinality: HyperLogLog = field(default_factory=HyperLogLog)
+    mcc_counts: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame]) -> DatasetProfile:
+        profile = cls()
+        for chunk in chunks:
+            profile.update(chunk)
+        return profile
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, chunk_rows: int = PROFILE_CHUNK_ROWS) -> DatasetProfile:
+        return cls.from_chunks(df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows))
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.rows += len(chunk)
+        if "amount" in chunk.columns:
+            amounts = pd.to_numeric(chunk["amount"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            self.amount_missing += int(np.isnan(amounts).sum())
+            self.amount.update(amounts)
+        if "merchant" in chunk.columns:
+            self.merchants.update(chunk["merchant"])
+            self.merchant_cardinality.update(chunk["merchant"])
+        if "mcc" in chunk.columns:
+            # se cuenta sobre el valor crudo y solo los distintos pasan a texto
+            counts = chunk["mcc"].value_counts(sort=False)
+            counts = counts[counts > 0]
+            for mcc, count in zip(mcc_as_str(counts.index.to_series()), counts.to_numpy()):
+                self.mcc_counts[mcc] = self.mcc_counts.get(mcc, 0) + int(count)
+
+    def merge(self, other: DatasetProfile) -> None:
+        self.rows += other.rows
+        self.amount_missing += other.amount_missing
+        self.amount.merge(other.amount)
+        self.merchants.merge(other.merchants)
+        self.merchant_cardinality.merge(other.merchant_cardinality)
+        for mcc, count in other.mcc_counts.items():
+            self.mcc_counts[mcc] = self.mcc_counts.get(mcc, 0) + count
+
+    @property
+    def mccs(self) -> list[str]:
+        return sorted(self.mcc_counts)
+
+    def distinct_merchants(self) -> int:
+        """
+        Exacto si todos los merchants entraron en el resumen; si no, estimación HLL.
+        """
+        return len(self.merchants.counts) if self.merchants.exact else self.merchant_cardinality.estimate()
+
+    def quantile(self, q: float) -> float:
+        value = self.amount.quantile(q)
+        return 0.0 if value is None else value
+
+    def stats(self, top_merchants: int = 50, mcc_sample: int = 200) -> dict:
+        """
+        Resumen serializable (lo que se le manda al modelo al generar el catálogo).
+        """
+        return {
+            "rows": self.rows,
+            "distinct_merchants": self.distinct_merchants(),
+            "distinct_mccs": len(self.mcc_counts),
+            "mccs_sample": self.mccs[:mcc_sample],
+            "top_merchants": [m for m, _ in self.merchants.top(top_merchants)],
+            "amount_p50": self.quantile(0.5),
+            "amount_p90": self.quantile(0.9),
+            "amount_p99": self.quantile(0.99),
+        }
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from app.data.io_excel import list_sheets
+from app.data.header_detection import read_excel_noheader
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+CSV_EXTENSIONS = (".csv", ".txt")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+FILE_DIALOG_FILTER = (
+    "Extractos (*.xlsx *.xls *.csv *.txt *.parquet *.pq *.ndjson *.jsonl);;"
+    "Excel (*.xlsx *.xls);;CSV (*.csv *.txt);;Parquet (*.parquet *.pq);;NDJSON (*.ndjson *.jsonl)"
+)
+
+# Filas que se leen para detectar header / layout (igual que detect_header_row)
+HEAD_ROWS = 30
+DEFAULT_CHUNK_ROWS = 250_000
+CSV_BLOCK_SIZE = 16 * 1024 * 1024  # bloque del lector streaming de pyarrow
+
+
+def file_kind(path: str) -> str:
+    ext = Path(path).suffix.lower()
+    if ext in EXCEL_EXTENSIONS:
+        return "excel"
+    if ext in CSV_EXTENSIONS:
+        return "csv"
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    if ext in NDJSON_EXTENSIONS:
+        return "ndjson"
+    raise ValueError(f"Formato no soportado: {ext or path}")
+
+
+def is_self_describing(path: str) -> bool:
+    """
+    Parquet / NDJSON traen nombres de columna en el esquema: el header es siempre la fila 0
+    del head sintetizado (no hace falta detectarlo).
+    """
+    return file_kind(path) in ("parquet", "ndjson")
+
+
+def list_sources(path: str) -> list[str]:
+    """
+    Hojas del Excel; para el resto de formatos una única "hoja" (el nombre del archivo).
+    """
+    if file_kind(path) == "excel":
+        return list_sheets(path)
+    return [Path(path).name]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Para leer Parquet hace falta instalar pyarrow (pip install pyarrow).") from e
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow.csv  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _sniff_delimiter(path: str, encoding: str) -> str:
+    with open(path, "r", encoding=encoding, newline="", errors="replace") as f:
+        sample = f.read(64 * 1024)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _with_header_row(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte un df con nombres de columna en formato "sin header" (fila 0 = nombres),
+    para que layout / detección funcionen igual que con Excel.
+    """
+    head = pd.DataFrame([list(df.columns)], columns=df.columns)
+    out = pd.concat([head, df.astype(object)], ignore_index=True)
+    return out.set_axis(range(out.shape[1]), axis=1)
+
+
+def read_head_noheader(path: str, sheet_name: str | int | None = 0, nrows: int = HEAD_ROWS) -> pd.DataFrame:
+    """
+    Primeras filas SIN asumir header (columnas 0..N-1), para detectar header / layout
+    sin cargar el archivo completo.
+    """
+    kind = file_kind(path)
+    if kind == "excel":
+        return pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl", header=None, nrows=nrows)
+
+    if kind == "csv":
+        encoding = "utf-8-sig"
+        delimiter = _sniff_delimiter(path, encoding)
+        with open(path, "r", encoding=encoding, newline="", errors="replace") as f:
+            rows = list(islice(csv.reader(f, delimiter=delimiter), nrows))
+        width = max((len(r) for r in rows), default=0)
+        rows = [[c if c != "" else None for c in r] + [None] * (width - len(r)) for r in rows]
+        return pd.DataFrame(rows)
+
+    if kind == "parquet":
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        batch = next(pf.iter_batches(batch_size=max(nrows - 1, 1)), None)
+        df = batch.to_pandas() if batch is not None else pf.schema_arrow.empty_table().to_pandas()
+        return _with_header_row(df)
+
+    df = pd.read_json(path, lines=True, nrows=max(nrows - 1, 1), dtype=False)
+    return _with_header_row(df)
+
+
+def iter_body_chunks(
+    path: str,
+    sheet_name: str | int | None,
+    header_row: int | None,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    headers: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Itera el cuerpo del archivo (filas después del header) en chunks con columnas ya nombradas
+    (headers del archivo o COL_i si es posicional). Memoria acotada por chunksize.
+    - CSV: lector streaming de pyarrow (o pandas chunksize si no está pyarrow o el archivo no es UTF-8)
+    - Parquet: iteración por row groups / batches
+    - NDJSON: pandas lines=True + chunksize
+    """
+    kind = file_kind(path)
+
+    if kind == "excel":
+        # openpyxl no permite lectura por rangos eficiente: se lee completo y se trocea
+        df0 = read_excel_noheader(path, sheet_name=sheet_name)
+        names = headers or _names_for(df0.iloc[header_row].tolist() if header_row is not None else None, df0.shape[1])
+        body = df0.iloc[(header_row + 1) if header_row is not None else 0:].set_axis(names, axis=1)
+        for i in range(0, len(body), chunksize):
+            yield body.iloc[i:i + chunksize].reset_index(drop=True)
+        return
+
+    if kind == "csv":
+        yield from _iter_csv_chunks(path, header_row, chunksize, headers)
+        return
+
+    if kind == "parquet":
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+
+    columns: list[str] | None = None
+    for chunk in pd.read_json(path, lines=True, chunksize=chunksize, dtype=False):
+        # NDJSON puede omitir claves en algunas líneas: se alinean a las columnas del primer chunk
+        if columns is None:
+            columns = list(chunk.columns)
+        yield chunk.reindex(columns=columns)
+
+
+def _names_for(header_values: list | None, width: int) -> list[str]:
+    if header_values is None:
+        return [f"COL_{i}" for i in range(width)]
+    return [str(x) for x in header_values] + [f"COL_{i}" for i in range(len(header_values), width)]
+
+
+def _iter_csv_chunks(path: str, header_row: int | None, chunksize: int, headers: list[str] | None) -> Iterator[pd.DataFrame]:
+    encoding = "utf-8-sig"
+    delimiter = _sniff_delimiter(path, encoding)
+    head = read_head_noheader(path, nrows=(header_row or 0) + 1)
+    width = head.shape[1]
+    names = headers or _names_for(head.iloc[header_row].tolist() if header_row is not None else None, width)
+    skip = (header_row + 1) if header_row is not None else 0
+    tmp_names = [f"c{i}" for i in range(len(names))]
+
+    done = 0
+    if _has_pyarrow():
+        import pyarrow as pa
+
+        try:
+            for chunk in _iter_csv_pyarrow(path, skip, delimiter, tmp_names, chunksize):
+                yield chunk.set_axis(names, axis=1)
+                done += len(chunk)
+            return
+        except pa.ArrowInvalid:
+            # pyarrow solo acepta UTF-8 estricto: un archivo en otra codificación (p.ej. Latin-1)
+            # sigue con pandas desde la primera fila no entregada, con el mismo reemplazo de
+            # bytes inválidos que el sniffer y el head
+            pass
+
+    for chunk in pd.read_csv(
+        path, header=None, names=tmp_names, skiprows=skip + done, dtype=str,
+        sep=delimiter, encoding=encoding, encoding_errors="replace", chunksize=chunksize,
+    ):
+        yield chunk.reset_index(drop=True).set_axis(names, axis=1)
+
+
+def _iter_csv_pyarrow(path: str, skip: int, delimiter: str, column_names: list[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(
+            skip_rows=skip,
+            column_names=column_names,
+            encoding="utf8",
+            block_size=CSV_BLOCK_SIZE,
+        ),
+        parse_options=pacsv.ParseOptions(delimiter=delimiter),
+        convert_options=pacsv.ConvertOptions(
+            column_types={n: pa.string() for n in column_names},
+            strings_can_be_null=True,  # celdas vacías = NaN, igual que pandas / Excel
+        ),
+    )
+    pending: list[pd.DataFrame] = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch.to_pandas())
+        pending_rows += batch.num_rows
+        if pending_rows >= chunksize:
+            yield pd.concat(pending, ignore_index=True)
+            pending, pending_rows = [], 0
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
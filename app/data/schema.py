@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columnas de texto candidatas a categorical (se repiten mucho en extractos grandes)
+CATEGORICAL_CANDIDATES = ["merchant", "purchase_category", "mcc_description", "employee", "description"]
+
+# Solo convertimos si (valores únicos / filas) es menor a este ratio
+MAX_CATEGORY_RATIO = 0.5
+
+# Los MCC son códigos de 4 dígitos (ej. "0742"); al guardarlos como entero hay que re-rellenar
+MCC_WIDTH = 4
+
+
+def compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte el esquema canónico limpio a tipos compactos:
+    - categorical para texto de baja cardinalidad
+    - uint16 para MCC (si todos son códigos numéricos de 4 dígitos)
+    amount queda en float64: float32 no representa montos como 1234567.89 ni 10.1
+    y la diferencia llegaría a export, búsqueda e IA.
+    El resultado es compatible con reglas, búsqueda y exportación.
+    """
+    out = df.copy(deep=False)  # solo reemplazamos columnas enteras: no hace falta copiar datos
+    n = len(out)
+
+    for col in CATEGORICAL_CANDIDATES:
+        if col not in out.columns or isinstance(out[col].dtype, pd.CategoricalDtype):
+            continue
+        if n and out[col].nunique(dropna=False) / n < MAX_CATEGORY_RATIO:
+            out[col] = out[col].astype("category")
+
+    if "mcc" in out.columns and not pd.api.types.is_integer_dtype(out["mcc"]):
+        mcc = out["mcc"].astype(str)
+        if mcc.str.fullmatch(r"\d{1,%d}" % MCC_WIDTH).all():
+            out["mcc"] = mcc.astype("uint16")
+        else:
+            out["mcc"] = mcc.astype("category")
+
+    return out
+
+
+def concat_compact(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena chunks ya compactados sin pasar por object: une las categorías
+    (union_categoricals) en lugar de dejar que pd.concat las descarte.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    # Unión ordenada de columnas (hojas de layouts distintos traen columnas extra distintas)
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    if "mcc" in columns and len({str(f["mcc"].dtype) for f in frames if "mcc" in f.columns}) > 1:
+        # Algún chunk tuvo MCC no numérico: todos como categorical de texto
+        frames = [f.assign(mcc=mcc_as_str(f["mcc"]).astype("category")) if "mcc" in f.columns else f for f in frames]
+
+    def is_cat(f: pd.DataFrame, col: str) -> bool:
+        return col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype)
+
+    cat_cols = [c for c in columns if any(is_cat(f, c) for f in frames)]
+    out = pd.concat([f.drop(columns=[c for c in cat_cols if c in f.columns]) for f in frames], ignore_index=True)
+    for col in cat_cols:
+        parts = [
+            f[col] if is_cat(f, col)
+            else f[col].astype("category") if col in f.columns
+            else pd.Categorical([None] * len(f))
+            for f in frames
+        ]
+        out[col] = union_categoricals(parts, ignore_order=True)
+    return out[columns]
+
+
+def mcc_as_str(mcc: pd.Series) -> pd.Series:
+    """
+    MCC como texto, sin importar si viene como string, categorical o uint16 (compacto).
+    """
+    if pd.api.types.is_integer_dtype(mcc):
+        return mcc.astype(str).str.zfill(MCC_WIDTH)
+    return mcc.astype(str)
+
+
+def to_export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Revierte los tipos compactos que cambian la representación al exportar (MCC con ceros a la izquierda).
+    """
+    if "mcc" in df.columns and pd.api.types.is_integer_dtype(df["mcc"]):
+        return df.assign(mcc=mcc_as_str(df["mcc"]))
+    return df
+
+
+def memory_breakdown(df: pd.DataFrame) -> dict[str, int]:
+    """
+    Bytes por columna (deep=True: incluye el contenido real de los strings).
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    return {str(k): int(v) for k, v in usage.items()}
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return sum(memory_breakdown(df).values()) / (1024 * 1024)
+
+
+def format_memory_report(stages: dict[str, float]) -> str:
+    """
+    {"raw": 120.4, "limpio": 38.2} -> "Memoria: raw 120.4 MB | limpio 38.2 MB"
+    """
+    parts = [f"{name} {mb:.1f} MB" for name, mb in stages.items()]
+    return "Memoria: " + " | ".join(parts)
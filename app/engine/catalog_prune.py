@@ -1,24 +1,34 @@
 from __future__ import annotations
 import pandas as pd
-from app.core.models import Catalog, MccRule, KeywordRule, AmountRule
+from app.core.models import Catalog
+from app.data.profile import DatasetProfile
 
-def prune_catalog_for_dataset(catalog: Catalog, df: pd.DataFrame, min_keyword_matches: int = 0) -> tuple[Catalog, list[str]]:
+def prune_catalog_for_dataset(
+    catalog: Catalog,
+    data: pd.DataFrame | DatasetProfile,
+    min_keyword_matches: int = 0,
+) -> tuple[Catalog, list[str]]:
     """
     MODO COMPLIANCE: Mantiene TODAS las reglas activas.
     No elimina reglas por falta de uso, asegurando que bloqueos (ej. Apuestas)
     permanezcan activos para futuras cargas.
+
+    data puede ser el DataFrame o su DatasetProfile ya calculado (no se vuelve a
+    recorrer el dataset: MCCs del conteo exacto, keywords sobre los merchants distintos).
     """
     changes: list[str] = []
-    
+    profile = data if isinstance(data, DatasetProfile) else DatasetProfile.from_frame(data)
+
     # Solo reporte informativo (para que sepas qué se usó), pero SIN BORRAR nada.
-    if "mcc" in df.columns:
-        dataset_mccs = set(df["mcc"].dropna().astype(str).unique())
+    if profile.mcc_counts:
+        dataset_mccs = set(profile.mcc_counts)
         unused_mccs = [r.mcc for r in catalog.mcc_rules if str(r.mcc) not in dataset_mccs]
         if unused_mccs:
             changes.append(f"Info: {len(unused_mccs)} reglas MCC no se dispararon en este dataset (se mantienen activas).")
 
-    if "merchant" in df.columns:
-        merch = df["merchant"].astype(str)
+    if len(profile.merchants.counts):
+        # Cada merchant distinto una vez, no una por fila
+        merch = pd.Series(profile.merchants.values(), dtype=object)
         unused_kw = 0
         for r in catalog.keyword_rules:
             try:
@@ -28,9 +38,10 @@ def prune_catalog_for_dataset(catalog: Catalog, df: pd.DataFrame, min_keyword_ma
             except Exception:
                 pass
         if unused_kw > 0:
-            changes.append(f"Info: {unused_kw} reglas de Keyword no se dispararon (se mantienen activas).")
+            scope = "" if profile.merchants.exact else f" entre los {len(merch):,} merchants más frecuentes"
+            changes.append(f"Info: {unused_kw} reglas de Keyword no se dispararon{scope} (se mantienen activas).")
 
     changes.append("Catálogo intacto (Modo Auditoría).")
 
     # Retornamos el catálogo original EXACTO, preservando todas las reglas
-    return catalog, changes
\ No newline at end of file
+    return catalog, changes
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+# Latencia objetivo por chunk: suficiente para amortizar el overhead de cada llamada
+# a evaluate_rules, y corta para que progreso / cancelación respondan rápido.
+TARGET_CHUNK_SECONDS = 0.15
+MIN_CHUNK_ROWS = 500
+MAX_CHUNK_ROWS = 500_000
+
+
+class AdaptiveChunker:
+    """
+    Ajusta el tamaño de chunk según filas/segundo medidas en los chunks anteriores
+    (promedio exponencial), apuntando a TARGET_CHUNK_SECONDS por chunk.
+    El crecimiento por paso está acotado (x4) para no pasarse con un catálogo lento.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5000,
+        target_seconds: float = TARGET_CHUNK_SECONDS,
+        min_rows: int = MIN_CHUNK_ROWS,
+        max_rows: int = MAX_CHUNK_ROWS,
+        smoothing: float = 0.5,
+        max_growth: float = 4.0,
+    ):
+        self.target_seconds = target_seconds
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.smoothing = smoothing
+        self.max_growth = max_growth
+        self.size = self._clamp(initial)
+        self.rows_per_second: float | None = None
+
+    def _clamp(self, rows: float) -> int:
+        return int(min(max(rows, self.min_rows), self.max_rows))
+
+    def next_size(self) -> int:
+        return self.size
+
+    def record(self, rows: int, seconds: float) -> None:
+        """
+        Registra un chunk procesado y recalcula el tamaño del siguiente.
+        """
+        if rows <= 0:
+            return
+        rate = rows / max(seconds, 1e-6)
+        if self.rows_per_second is None:
+            self.rows_per_second = rate
+        else:
+            self.rows_per_second = self.smoothing * rate + (1 - self.smoothing) * self.rows_per_second
+
+        wanted = self.rows_per_second * self.target_seconds
+        self.size = self._clamp(min(wanted, self.size * self.max_growth))
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+FLAGS = ["OK", "POSSIBLE_WARN", "DIRECT_WARN"]
+
+# Filtro de la UI -> flags que deja pasar (None / "ALL" = sin filtro)
+FLAG_FILTERS = {
+    "OK": ["OK"],
+    "POSSIBLE_WARN": ["POSSIBLE_WARN"],
+    "DIRECT_WARN": ["DIRECT_WARN"],
+    "WARNINGS": ["DIRECT_WARN", "POSSIBLE_WARN"],
+}
+
+
+class ResultStore:
+    """
+    Índices del resultado armados una vez al terminar el análisis:
+    row-ids ordenados por flag (y por filtro compuesto, p.ej. WARNINGS).
+    Un toggle de filtro es un lookup; la búsqueda se cruza con intersect1d.
+    Las vistas son arrays de posiciones sobre el df base, nunca copias del df.
+    """
+
+    def __init__(self, flags: pd.Series):
+        self.n = len(flags)
+        self._orders: dict[str, tuple[np.ndarray, int]] = {}  # columna -> (argsort asc, n válidos)
+        codes = pd.Categorical(flags.astype(str), categories=FLAGS).codes
+        # un solo argsort estable: row-ids agrupados por flag y ordenados dentro de cada grupo
+        order = np.argsort(codes, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(codes[order], np.arange(-1, len(FLAGS) + 1))
+
+        self._rows: dict[str, np.ndarray] = {
+            flag: order[bounds[i + 1]:bounds[i + 2]] for i, flag in enumerate(FLAGS)
+        }
+        for name, members in FLAG_FILTERS.items():
+            if name not in self._rows:
+                self._rows[name] = np.sort(np.concatenate([self._rows[f] for f in members]))
+
+    @classmethod
+    def from_result(cls, df: pd.DataFrame) -> "ResultStore":
+        return cls(df["flag"])
+
+    def counts(self) -> dict[str, int]:
+        return {flag: len(self._rows[flag]) for flag in FLAGS}
+
+    def rows(self, flag_filter: str | None) -> np.ndarray | None:
+        """
+        Row-ids del filtro (ordenados). None = sin filtro (todas las filas).
+        """
+        return self._rows.get(flag_filter or "")
+
+    def view(
+        self,
+        flag_filter: str | None,
+        hits: np.ndarray | None = None,
+        restrict: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Filtro de flag ∩ hits de búsqueda ∩ restrict (p.ej. drill-down del resumen).
+        Todos ordenados y sin repetidos.
+        """
+        if restrict is not None:
+            hits = restrict if hits is None else np.intersect1d(hits, restrict, assume_unique=True)
+        rows = self.rows(flag_filter)
+        if hits is None:
+            return np.arange(self.n, dtype=np.int64) if rows is None else rows
+        if rows is None:
+            return hits
+        return np.intersect1d(rows, hits, assume_unique=True)
+
+    def forget_orders(self, columns) -> None:
+        """
+        Descarta el orden cacheado de columnas que cambiaron (p.ej. ai_* tras la IA).
+        """
+        for column in columns:
+            self._orders.pop(column, None)
+
+    def sort_order(self, column: str, values: pd.Series) -> tuple[np.ndarray, int]:
+        """
+        argsort ascendente (estable) de la columna sobre todo el resultado, cacheado por columna.
+        Los vacíos quedan al final: devuelve (orden, cantidad de filas con valor).
+        """
+        cached = self._orders.get(column)
+        if cached is None:
+            key, missing = _sort_key(values)
+            order = np.lexsort((key, missing)).astype(np.int64)  # primero no-vacíos, luego por valor
+            cached = self._orders[column] = (order, int(self.n - missing.sum()))
+        return cached
+
+    def sorted_view(self, rows: np.ndarray, column: str, values: pd.Series, descending: bool = False) -> np.ndarray:
+        """
+        Reordena los row-ids de una vista (filtro ∩ búsqueda) según la columna, en O(n)
+        sobre el orden cacheado (sin volver a ordenar). En descendente los vacíos siguen al final.
+        """
+        order, n_valid = self.sort_order(column, values)
+        if len(rows) == self.n:
+            picked, valid = order, n_valid
+        else:
+            keep = np.zeros(self.n, dtype=bool)
+            keep[rows] = True
+            picked = order[keep[order]]
+            valid = int(keep[order[:n_valid]].sum())
+        if not descending:
+            return picked
+        return np.concatenate((picked[:valid][::-1], picked[valid:]))
+
+
+def _sort_key(s: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Columna -> (clave numérica ordenable, máscara de vacíos).
+    flag por severidad; categoricals por texto de la categoría (sin materializar strings por fila).
+    """
+    if s.name == "flag":
+        codes = pd.Categorical(s.astype(str), categories=FLAGS).codes
+        return codes, codes < 0
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        ranks = np.argsort(np.argsort(s.cat.categories.astype(str).to_numpy(), kind="stable"))
+        return np.where(codes >= 0, ranks[codes], 0), codes < 0
+    missing = s.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(s) or pd.api.types.is_timedelta64_dtype(s):
+        return s.to_numpy().view("int64"), missing
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        return np.nan_to_num(s.to_numpy(dtype="float64", na_value=np.nan)), missing
+    codes, _ = pd.factorize(s.astype("string"), sort=True)
+    return codes, codes < 0
+
+
+class PartialResults:
+    """
+    Acumula los chunks que entrega el worker mientras el análisis corre:
+    contadores por flag incrementales + las filas con warning ya evaluadas,
+    para revisarlas antes de que termine el archivo completo.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.counts: dict[str, int] = dict.fromkeys(FLAGS, 0)
+        self.rows_done = 0
+        self._parts: list[pd.DataFrame] = []
+        self._frame: pd.DataFrame | None = None
+
+    def add(self, start: int, res: pd.DataFrame) -> None:
+        """
+        res = flag/reasons de las filas start..start+len(res) de df (salida de evaluate_rules).
+        """
+        flags = res["flag"].to_numpy()
+        for flag, count in res["flag"].value_counts().items():
+            if flag in self.counts:
+                self.counts[flag] += int(count)
+        self.rows_done += len(res)
+
+        warn = np.isin(flags, FLAG_FILTERS["WARNINGS"])
+        if warn.any():
+            self._parts.append(self.df.iloc[np.flatnonzero(warn) + start].assign(
+                flag=flags[warn], reasons=res["reasons"].to_numpy()[warn],
+            ))
+            self._frame = None
+
+    def warnings_frame(self) -> pd.DataFrame:
+        """
+        Filas con warning evaluadas hasta ahora, en orden del archivo (se arma al pedirla).
+        """
+        if self._frame is None:
+            if self._parts:
+                self._parts = [pd.concat(self._parts)]  # compacta: el próximo concat parte de uno solo
+                self._frame = self._parts[0].reset_index(drop=True)
+            else:
+                self._frame = self.df.iloc[:0].assign(flag=pd.Series(dtype=object), reasons=pd.Series(dtype=object))
+        return self._frame
@@ -1,8 +1,11 @@
 from __future__ import annotations
+from datetime import date
 import pandas as pd
 import numpy as np
 from app.core.constants import Flag, FLAG_PRIORITY
 from app.core.models import Catalog
+from app.core.text import normalize_text
+from app.data.schema import mcc_as_str
 
 def _combine_flags(curr_flag: pd.Series, new_flag: Flag) -> pd.Series:
     """
@@ -26,17 +29,68 @@ def _evaluate_condition(df: pd.DataFrame, condition: str) -> pd.Series:
     except Exception:
         return pd.Series(False, index=df.index)
 
+def _apply_learned_verdicts(
+    res: pd.DataFrame,
+    col_merchant: pd.Series,
+    allow_mask: pd.Series,
+    catalog: Catalog,
+    today: str | None = None,
+) -> None:
+    """
+    Un dict por merchant normalizado; la normalización corre solo sobre los valores únicos.
+    Vencidos se ignoran; la allowlist manual sigue ganando.
+    Solo lo revisado por un auditor (reviewed) reemplaza el flag de las reglas; lo no
+    revisado puede subir la severidad pero nunca bajarla.
+    """
+    today = today or date.today().isoformat()
+    table = {normalize_text(v.merchant): v for v in catalog.learned_verdicts if v.expires >= today}
+    if not table:
+        return
+    codes, uniques = pd.factorize(col_merchant)
+    found = [table.get(normalize_text(u)) for u in uniques]
+    hit_unique = np.array([v is not None for v in found] + [False])
+    mask = hit_unique[codes] & ~allow_mask.to_numpy()  # código -1 (NaN) -> último = False
+    if not mask.any():
+        return
+    priority = {f.value: p for f, p in FLAG_PRIORITY.items()}
+    learned = np.array([priority[v.severity] if v else 0 for v in found] + [0])[codes]
+    reviewed = np.array([bool(v and v.reviewed) for v in found] + [False])[codes]
+    current = res["flag"].map(priority).to_numpy()
+    mask &= reviewed | (learned > current)
+    if not mask.any():
+        return
+    flags = np.array([v.severity if v else "" for v in found] + [""], dtype=object)
+    notes = np.array([
+        (f"IA aprendida{' (revisada)' if v.reviewed else ''} -> {v.severity}: {v.category or v.reason}" if v else "")
+        for v in found
+    ] + [""], dtype=object)
+    res.loc[mask, "flag"] = flags[codes[mask]]
+    res.loc[mask, "reasons"] = res.loc[mask, "reasons"] + " | " + notes[codes[mask]]
+
 def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
-    out = df.copy()
+    """
+    Devuelve df + columnas flag/reasons. Bajo Copy-on-Write no duplica las columnas de entrada.
+    """
+    out = df.copy(deep=False)
+    res = evaluate_rules(df, catalog)
+    out["flag"] = res["flag"]
+    out["reasons"] = res["reasons"]
+    return out
+
+def evaluate_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
+    """
+    Evalúa el catálogo sin copiar df: retorna SOLO las columnas nuevas
+    (flag, reasons) con el mismo índice, para unirlas al dataset limpio.
+    """
     
     # =========================================================================
     # PASO 1: CÁLCULO DE INMUNIDAD (ALLOWLIST)
     # =========================================================================
-    allow_mask = pd.Series(False, index=out.index)
+    allow_mask = pd.Series(False, index=df.index)
     
-    col_merchant = out["merchant"].astype(str) if "merchant" in out.columns else pd.Series("", index=out.index)
-    col_desc = out["description"].astype(str) if "description" in out.columns else pd.Series("", index=out.index)
-    col_mcc_desc = out["mcc_description"].astype(str) if "mcc_description" in out.columns else pd.Series("", index=out.index)
+    col_merchant = df["merchant"].astype(str) if "merchant" in df.columns else pd.Series("", index=df.index)
+    col_desc = df["description"].astype(str) if "description" in df.columns else pd.Series("", index=df.index)
+    col_mcc_desc = df["mcc_description"].astype(str) if "mcc_description" in df.columns else pd.Series("", index=df.index)
     
     # 1.1 Allowlist Simple
     if catalog.allowlist_merchants:
@@ -58,11 +112,10 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
     # =========================================================================
     # PASO 2: ESTADO INICIAL
     # =========================================================================
-    out["flag"] = Flag.OK.value
-    out["reasons"] = ""
-    out.loc[allow_mask, "reasons"] = "ALLOWLIST"
+    res = pd.DataFrame({"flag": Flag.OK.value, "reasons": ""}, index=df.index)
+    res.loc[allow_mask, "reasons"] = "ALLOWLIST"
 
-    content_matched = pd.Series(False, index=out.index)
+    content_matched = pd.Series(False, index=df.index)
 
     # =========================================================================
     # PASO 3: APLICACIÓN DE REGLAS ESTÁNDAR
@@ -72,7 +125,7 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
     if catalog.mcc_description_rules:
         for rule in catalog.mcc_description_rules:
             mask_pat = col_mcc_desc.str.contains(rule.pattern, case=False, na=False, regex=True)
-            mask_cond = _evaluate_condition(out, rule.condition)
+            mask_cond = _evaluate_condition(df, rule.condition)
             mask = mask_pat & mask_cond
 
             if mask.any():
@@ -83,8 +136,8 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     final_mask = mask & (~allow_mask)
 
                 if final_mask.any():
-                    out.loc[final_mask, "flag"] = _combine_flags(out.loc[final_mask, "flag"], severity)
-                    out.loc[final_mask, "reasons"] = out.loc[final_mask, "reasons"] + " | " + rule.reason
+                    res.loc[final_mask, "flag"] = _combine_flags(res.loc[final_mask, "flag"], severity)
+                    res.loc[final_mask, "reasons"] = res.loc[final_mask, "reasons"] + " | " + rule.reason
                     content_matched |= final_mask
 
     # --- 3.2 DISALLOWED KEYWORDS ---
@@ -95,13 +148,13 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     col_mcc_desc.str.contains(pat, case=False, na=False, regex=True))
             
             if mask.any():
-                out.loc[mask, "flag"] = _combine_flags(out.loc[mask, "flag"], Flag.DIRECT_WARN)
-                out.loc[mask, "reasons"] = out.loc[mask, "reasons"] + " | Prohibido: " + pat
+                res.loc[mask, "flag"] = _combine_flags(res.loc[mask, "flag"], Flag.DIRECT_WARN)
+                res.loc[mask, "reasons"] = res.loc[mask, "reasons"] + " | Prohibido: " + pat
                 content_matched |= mask
 
     # --- 3.3 MCC RULES ---
-    if catalog.mcc_rules and "mcc" in out.columns:
-        mcc_s = out["mcc"].astype(str)
+    if catalog.mcc_rules and "mcc" in df.columns:
+        mcc_s = mcc_as_str(df["mcc"])
         for rule in catalog.mcc_rules:
             mask = (mcc_s == str(rule.mcc))
             
@@ -113,8 +166,8 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     final_mask = mask & (~allow_mask)
 
                 if final_mask.any():
-                    out.loc[final_mask, "flag"] = _combine_flags(out.loc[final_mask, "flag"], severity)
-                    out.loc[final_mask, "reasons"] = out.loc[final_mask, "reasons"] + " | " + rule.reason
+                    res.loc[final_mask, "flag"] = _combine_flags(res.loc[final_mask, "flag"], severity)
+                    res.loc[final_mask, "reasons"] = res.loc[final_mask, "reasons"] + " | " + rule.reason
                     content_matched |= final_mask
 
     # --- 3.4 KEYWORD RULES ---
@@ -132,18 +185,18 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     final_mask = mask & (~allow_mask)
 
                 if final_mask.any():
-                    out.loc[final_mask, "flag"] = _combine_flags(out.loc[final_mask, "flag"], severity)
-                    out.loc[final_mask, "reasons"] = out.loc[final_mask, "reasons"] + " | " + rule.reason
+                    res.loc[final_mask, "flag"] = _combine_flags(res.loc[final_mask, "flag"], severity)
+                    res.loc[final_mask, "reasons"] = res.loc[final_mask, "reasons"] + " | " + rule.reason
                     content_matched |= final_mask
 
     # --- 3.5 PURCHASE CATEGORY RULES ---
-    if catalog.purchase_category_rules and "purchase_category" in out.columns:
-        pcat = out["purchase_category"].astype(str)
+    if catalog.purchase_category_rules and "purchase_category" in df.columns:
+        pcat = df["purchase_category"].astype(str)
         for rule in catalog.purchase_category_rules:
             mask_cat = pcat.str.lower() == rule.category.lower()
-            mask_cond = _evaluate_condition(out, rule.condition)
+            mask_cond = _evaluate_condition(df, rule.condition)
             
-            mask_excl = pd.Series(False, index=out.index)
+            mask_excl = pd.Series(False, index=df.index)
             if rule.exclude_patterns:
                 for pat in rule.exclude_patterns:
                     mask_excl |= col_merchant.str.contains(pat, case=False, na=False, regex=True)
@@ -158,19 +211,19 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     final_mask = mask & (~allow_mask)
 
                 if final_mask.any():
-                    out.loc[final_mask, "flag"] = _combine_flags(out.loc[final_mask, "flag"], severity)
-                    out.loc[final_mask, "reasons"] = out.loc[final_mask, "reasons"] + " | " + rule.reason
+                    res.loc[final_mask, "flag"] = _combine_flags(res.loc[final_mask, "flag"], severity)
+                    res.loc[final_mask, "reasons"] = res.loc[final_mask, "reasons"] + " | " + rule.reason
                     content_matched |= final_mask
 
     # --- 3.6 AMOUNT RULES ---
-    if catalog.amount_rules and "amount" in out.columns:
-        amt = pd.to_numeric(out["amount"], errors="coerce").fillna(0)
-        pcat_series = out["purchase_category"].astype(str).str.lower().str.strip() if "purchase_category" in out.columns else pd.Series("", index=out.index)
+    if catalog.amount_rules and "amount" in df.columns:
+        amt = pd.to_numeric(df["amount"], errors="coerce").fillna(0)
+        pcat_series = df["purchase_category"].astype(str).str.lower().str.strip() if "purchase_category" in df.columns else pd.Series("", index=df.index)
 
         for rule in catalog.amount_rules:
             mask_amt = amt >= float(rule.min_amount)
             
-            scope_mask = pd.Series(True, index=out.index)
+            scope_mask = pd.Series(True, index=df.index)
             rule_scope = str(rule.scope).lower().strip()
             if rule_scope.startswith("category:"):
                 target_cat = rule_scope.split(":", 1)[1].strip()
@@ -186,22 +239,30 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
                     final_mask = mask & (~allow_mask)
 
                 if final_mask.any():
-                    out.loc[final_mask, "flag"] = _combine_flags(out.loc[final_mask, "flag"], severity)
-                    out.loc[final_mask, "reasons"] = out.loc[final_mask, "reasons"] + " | " + rule.reason
+                    res.loc[final_mask, "flag"] = _combine_flags(res.loc[final_mask, "flag"], severity)
+                    res.loc[final_mask, "reasons"] = res.loc[final_mask, "reasons"] + " | " + rule.reason
+
+    # =========================================================================
+    # PASO 3.5: VEREDICTOS APRENDIDOS DE LA IA (lookup por merchant normalizado)
+    # Sin revisar solo suben la severidad; revisados por un auditor reemplazan el
+    # flag de las reglas. El override de MCC del paso 4 sigue mandando.
+    # =========================================================================
+    if catalog.learned_verdicts:
+        _apply_learned_verdicts(res, col_merchant, allow_mask, catalog)
 
     # =========================================================================
     # PASO 4: OVERRIDE ABSOLUTO (MCC DESCRIPTION - FUERZA BRUTA)
     # Requerimiento: BAR, LOUNGE, DISCO, NIGHTCLUB, TAVERN, ALCOHOLIC DRINKS
     # Sea un warn directo, sin excepciones, ignorando allowlist y reglas previas.
     # =========================================================================
-    if "mcc_description" in out.columns:
+    if "mcc_description" in df.columns:
         # Convertimos a mayúsculas para coincidencia insensible a mayúsculas/minúsculas
-        mcc_upper = out["mcc_description"].astype(str).str.upper()
+        mcc_upper = df["mcc_description"].astype(str).str.upper()
         
         # Palabras clave forzadas
         forced_keywords = ["BAR", "LOUNGE", "DISCO", "NIGHTCLUB", "TAVERN", "ALCOHOLIC"]
         
-        force_mask = pd.Series(False, index=out.index)
+        force_mask = pd.Series(False, index=df.index)
         for kw in forced_keywords:
             # Buscamos la subcadena exacta (literal)
             force_mask |= mcc_upper.str.contains(kw, regex=False, na=False)
@@ -209,10 +270,10 @@ def apply_rules(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
         if force_mask.any():
             # FORZAMOS EL FLAG Y LA RAZÓN
             # Sobreescribe lo que haya puesto el Allowlist o cualquier regla anterior
-            out.loc[force_mask, "flag"] = Flag.DIRECT_WARN.value
-            out.loc[force_mask, "reasons"] = out.loc[force_mask, "reasons"].astype(str) + " | BLOQUEO FORZADO MCC"
+            res.loc[force_mask, "flag"] = Flag.DIRECT_WARN.value
+            res.loc[force_mask, "reasons"] = res.loc[force_mask, "reasons"].astype(str) + " | BLOQUEO FORZADO MCC"
 
     # Limpieza final de strings
-    out["reasons"] = out["reasons"].str.strip(" |")
+    res["reasons"] = res["reasons"].str.strip(" |")
     
-    return out
\ No newline at end of file
+    return res
\ No newline at end of file
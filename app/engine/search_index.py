@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import mcc_as_str
+
+# Columnas buscables (si IA añadió columnas, también se indexan)
+SEARCH_COLUMNS = ["merchant", "employee", "description", "mcc", "amount", "date", "ai_category", "ai_reason", "ai_web_evidence"]
+
+# Si una búsqueda acumula más hits que esto, el resto se resuelve vectorizado
+_MAX_FIND_HITS = 50_000
+# Cada cuántos hits se consulta si la búsqueda fue reemplazada por otra
+_CANCEL_CHECK_EVERY = 1024
+
+
+def _lower_text(s: pd.Series) -> np.ndarray:
+    """
+    Texto en minúsculas por fila. Se formatea solo cada valor distinto una vez
+    (categorías / factorize) y luego se expande por código; NaN -> "nan" como astype(str).
+    """
+    if s.name == "mcc":
+        s = mcc_as_str(s)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s)
+    texts = pd.Index(uniques).astype(str).str.lower().str.replace("\n", " ", regex=False).to_numpy(dtype=object)
+    return np.append(texts, "nan")[codes]  # código -1 -> último = "nan"
+
+
+class SearchIndex:
+    """
+    Índice de búsqueda construido una vez por resultado: todas las filas en un único
+    texto en minúsculas ("fila0\\nfila1\\n...") + offset de inicio de cada fila.
+    Una consulta es str.find literal sobre ese texto y devuelve row-ids (posiciones) ordenados.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list[str] | None = None):
+        self.columns = [c for c in (columns or SEARCH_COLUMNS) if c in df.columns]
+        self.n = len(df)
+
+        hay: np.ndarray | None = None
+        for col in self.columns:
+            part = _lower_text(df[col])
+            hay = part if hay is None else hay + " | " + part
+        if hay is None:
+            hay = np.full(self.n, "", dtype=object)
+
+        lengths = np.fromiter(map(len, hay), dtype=np.int64, count=self.n) + 1
+        self._starts = np.concatenate(([0], np.cumsum(lengths)))
+        self._text = "\n".join(hay) + "\n"
+
+        self._last_query = ""
+        self._last_result: np.ndarray | None = None
+        # texto agregado después de construir el índice (row-id -> texto), ver add_rows
+        self._extra: dict[int, str] = {}
+
+    def row_text(self, row: int) -> str:
+        text = self._text[self._starts[row]:self._starts[row + 1] - 1]
+        extra = self._extra.get(row)
+        return text if extra is None else f"{text} | {extra}"
+
+    def add_rows(self, df: pd.DataFrame, rows: np.ndarray, columns: list[str]) -> None:
+        """
+        Indexa columnas nuevas solo para algunas filas (p.ej. ai_* de las filas que evaluó
+        la IA) sin reconstruir el texto completo. El costo depende de len(rows), no del total.
+        """
+        columns = [c for c in columns if c in df.columns]
+        if not len(rows) or not columns:
+            return
+        hay: np.ndarray | None = None
+        for col in columns:
+            part = _lower_text(df[col].iloc[rows])
+            hay = part if hay is None else hay + " | " + part
+        for row, text in zip(rows.tolist(), hay):
+            prev = self._extra.get(row)
+            self._extra[row] = text if prev is None else f"{prev} | {text}"
+        self._last_query, self._last_result = "", None
+
+    def search(self, query: str, cancelled: Callable[[], bool] | None = None) -> np.ndarray | None:
+        """
+        Row-ids que contienen query. Si cancelled() pasa a True durante el scan
+        (consulta reemplazada por otra), devuelve None y no se cachea nada.
+        """
+        q = (query or "").lower().strip().replace("\n", " ")
+        if not q:
+            return np.arange(self.n, dtype=np.int64)
+
+        # Refinamiento al tipear ("mar" -> "marr"): solo revisar los hits anteriores
+        if self._last_result is not None and self._last_query and q.startswith(self._last_query) \
+                and len(self._last_result) <= _MAX_FIND_HITS:
+            result = np.fromiter((r for r in self._last_result if q in self.row_text(r)), dtype=np.int64)
+        else:
+            result = self._scan(q, cancelled)
+            if result is None:
+                return None
+
+        self._last_query, self._last_result = q, result
+        return result
+
+    def _scan(self, q: str, cancelled: Callable[[], bool] | None = None) -> np.ndarray | None:
+        hits = self._scan_text(q, cancelled)
+        if hits is None or not self._extra:
+            return hits
+        extra = np.fromiter((r for r, t in self._extra.items() if q in t), dtype=np.int64)
+        return np.union1d(hits, extra) if len(extra) else hits
+
+    def _scan_text(self, q: str, cancelled: Callable[[], bool] | None = None) -> np.ndarray | None:
+        text, starts = self._text, self._starts
+        hits: list[int] = []
+        pos = text.find(q)
+        while pos != -1:
+            row = int(np.searchsorted(starts, pos, side="right")) - 1
+            hits.append(row)
+            if cancelled is not None and len(hits) % _CANCEL_CHECK_EVERY == 0 and cancelled():
+                return None
+            if len(hits) >= _MAX_FIND_HITS:
+                # Consulta poco selectiva: el resto vectorizado en vez de un find por fila
+                rest = pd.Series([self.row_text(r) for r in range(row + 1, self.n)], dtype=object)
+                more = np.flatnonzero(rest.str.contains(q, regex=False).to_numpy()) + row + 1
+                return np.concatenate((np.asarray(hits, dtype=np.int64), more.astype(np.int64)))
+            pos = text.find(q, starts[row + 1])  # siguiente fila: un hit por fila basta
+        return np.asarray(hits, dtype=np.int64)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import mcc_as_str
+from app.engine.result_store import FLAGS
+
+# Dimensiones del resumen: columna canónica -> título en la UI
+SUMMARY_DIMENSIONS = {
+    "employee": "Empleado",
+    "purchase_category": "Categoría",
+    "mcc": "MCC",
+}
+
+
+def _group_codes(s: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Columna -> (código de grupo por fila, etiquetas). Vacíos = grupo "(vacío)" al final.
+    Categoricals reusan sus códigos; el resto se factoriza una vez.
+    """
+    if s.name == "mcc":
+        s = mcc_as_str(s)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, labels = s.cat.codes.to_numpy(), s.cat.categories.astype(str).to_numpy()
+    else:
+        codes, uniques = pd.factorize(s)
+        labels = pd.Index(uniques).astype(str).to_numpy()
+    codes = codes.astype(np.int64)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels = np.append(labels, "(vacío)")
+    labels = labels.astype(object)
+    labels[labels == ""] = "(vacío)"
+    return codes, labels
+
+
+class _Pivot:
+    """
+    Una dimensión: conteos y sumas de amount por (grupo, flag) en arrays [n_grupos, n_flags].
+    """
+
+    def __init__(self, codes: np.ndarray, labels: np.ndarray, flag_codes: np.ndarray, amount: np.ndarray):
+        self.codes = codes
+        self.labels = labels
+        k = len(FLAGS)
+        key = codes * k + flag_codes
+        size = len(labels) * k
+        valid = flag_codes >= 0
+        self.counts = np.bincount(key[valid], minlength=size).reshape(-1, k).astype(np.int64)
+        self.sums = np.bincount(key[valid], weights=amount[valid], minlength=size).reshape(-1, k)
+
+    def move(self, rows: np.ndarray, old: np.ndarray, new: np.ndarray, amount: np.ndarray) -> None:
+        """
+        Filas que cambiaron de flag: resta su aporte del flag viejo y lo suma al nuevo.
+        """
+        g = self.codes[rows]
+        for flags, sign in ((old, -1), (new, 1)):
+            ok = flags >= 0
+            np.add.at(self.counts, (g[ok], flags[ok]), sign)
+            np.add.at(self.sums, (g[ok], flags[ok]), sign * amount[rows][ok])
+
+
+class SummaryCube:
+    """
+    Pivots de warnings por empleado / categoría / MCC armados en una pasada vectorizada
+    (bincount) al terminar el análisis. Cambios de flag posteriores (IA, catálogo) se
+    aplican incrementalmente con update_flags sin recalcular todo.
+    """
+
+    def __init__(self, df: pd.DataFrame, flags: pd.Series | None = None):
+        self.n = len(df)
+        flags = df["flag"] if flags is None else flags
+        self.flag_codes = pd.Categorical(flags.astype(str), categories=FLAGS).codes.astype(np.int64)
+        if "amount" in df.columns:
+            self.amount = np.nan_to_num(pd.to_numeric(df["amount"], errors="coerce").to_numpy(dtype="float64"))
+        else:
+            self.amount = np.zeros(self.n)
+        self.pivots: dict[str, _Pivot] = {
+            dim: _Pivot(*_group_codes(df[dim]), self.flag_codes, self.amount)
+            for dim in SUMMARY_DIMENSIONS
+            if dim in df.columns
+        }
+
+    @property
+    def dimensions(self) -> list[str]:
+        return list(self.pivots)
+
+    def update_flags(self, flags: pd.Series) -> int:
+        """
+        Nuevo vector de flags (mismas filas): solo las filas que cambiaron tocan los pivots.
+        Devuelve cuántas filas cambiaron.
+        """
+        new_codes = pd.Categorical(flags.astype(str), categories=FLAGS).codes.astype(np.int64)
+        rows = np.flatnonzero(new_codes != self.flag_codes)
+        if len(rows):
+            old, new = self.flag_codes[rows], new_codes[rows]
+            for pivot in self.pivots.values():
+                pivot.move(rows, old, new, self.amount)
+            self.flag_codes = new_codes
+        return len(rows)
+
+    def table(self, dim: str, top: int = 200) -> pd.DataFrame:
+        """
+        Pivot de una dimensión ordenado por DIRECT_WARN y luego POSSIBLE_WARN (descendente).
+        Columnas: grupo, n_<flag>, amount_<flag>, y 'group_code' para el drill-down.
+        """
+        p = self.pivots[dim]
+        out = pd.DataFrame({"group": p.labels, "group_code": np.arange(len(p.labels))})
+        for i, flag in enumerate(FLAGS):
+            out[f"n_{flag}"] = p.counts[:, i]
+            out[f"amount_{flag}"] = p.sums[:, i].round(2)
+        out = out[p.counts.sum(axis=1) > 0]
+        return out.sort_values(["n_DIRECT_WARN", "n_POSSIBLE_WARN"], ascending=False, kind="stable").head(top)
+
+    def rows_for(self, dim: str, group_code: int, flag: str | None = None) -> np.ndarray:
+        """
+        Drill-down: row-ids (ordenados) del grupo, opcionalmente de un solo flag.
+        """
+        mask = self.pivots[dim].codes == group_code
+        if flag is not None:
+            mask &= self.flag_codes == FLAGS.index(flag)
+        return np.flatnonzero(mask).astype(np.int64)
@@ -1,18 +1,55 @@
 from __future__ import annotations
+import time
+_T0 = time.perf_counter()
+
 from dotenv import load_dotenv
 load_dotenv()
-from app.ui.ai_worker import AIWorker
 
 import sys
+import threading
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
 from app.core.logging_config import setup_logging
-from app.ui.main_window import MainWindow
+from app.core.pandas_options import enable_copy_on_write
+from app.ui.main_window import MainWindow, preload_pipeline
+
+# Modo medición: `python -m app.main --startup-timing` imprime los tiempos de arranque
+# por etapa y sale apenas la ventana quedó pintada.
+STARTUP_TIMING_FLAG = "--startup-timing"
+
+
+def _ms(t: float) -> str:
+    return f"{(t - _T0) * 1000:.0f} ms"
+
 
 def main():
+    timing = STARTUP_TIMING_FLAG in sys.argv
+    argv = [a for a in sys.argv if a != STARTUP_TIMING_FLAG]
+    t_imports = time.perf_counter()
+
     setup_logging()
-    app = QApplication(sys.argv)
+    # El pipeline de datos asume Copy-on-Write (no hace copias defensivas)
+    enable_copy_on_write()
+    app = QApplication(argv)
+    t_app = time.perf_counter()
+
     win = MainWindow(catalog_path="catalog/catalog.json")
+    t_window = time.perf_counter()
     win.show()
+
+    def on_first_paint():
+        t_shown = time.perf_counter()
+        if timing:
+            print(
+                f"startup: imports {_ms(t_imports)} | QApplication {_ms(t_app)} | "
+                f"MainWindow {_ms(t_window)} | ventana visible {_ms(t_shown)}"
+            )
+            app.quit()
+            return
+        # Con la ventana ya visible: precargar pandas / pipeline sin bloquear la UI
+        threading.Thread(target=preload_pipeline, name="preload", daemon=True).start()
+
+    QTimer.singleShot(0, on_first_paint)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -1,31 +1,75 @@
 from __future__ import annotations
 
+from dataclasses import asdict
+
 import pandas as pd
 from PySide6.QtCore import QObject, Signal
 
-from app.ai.ai_explainer import apply_ai_explanations
+from app.ai.ai_explainer import evaluate_ai_candidates
+from app.ai.concurrency import AIConcurrencyConfig
+from app.ai.scheduler import AIBudget
+from app.ai.telemetry import AITelemetry, format_report_line
+from app.ai.verdict_cache import VerdictCache
 
 class AIWorker(QObject):
     progress = Signal(int)
     status = Signal(str)
-    finished = Signal(pd.DataFrame)
+    finished = Signal(object)  # AIVerdicts: veredictos por row-id (el df no se copia)
     failed = Signal(str)
+    run_stats = Signal(str)  # caché (aciertos/total) + presupuesto gastado, para la barra de estado
+    report = Signal(object)  # dict de AITelemetry.report(): latencias, tokens, costo
 
-    def __init__(self, df: pd.DataFrame, max_calls: int = 200):
+    def __init__(self, df: pd.DataFrame, max_calls: int = 200, cache_path: str | None = None):
         super().__init__()
         self.df = df
         self.max_calls = max_calls
+        self.cache_path = cache_path
         self._cancel = False
 
     def cancel(self):
         self._cancel = True
 
     def run(self):
+        cache = None
         try:
-            self.status.emit("IA: generando explicaciones...")
-            # (Para progreso real, habría que instrumentar loop; aquí simple)
-            out = apply_ai_explanations(self.df, max_calls=self.max_calls)
+            cache = VerdictCache(self.cache_path) if self.cache_path else None
+            config = AIConcurrencyConfig.from_env()
+            budget = AIBudget.from_env(self.max_calls)
+            telemetry = AITelemetry()
+            self.status.emit(f"IA: generando explicaciones ({config.concurrency} en paralelo)...")
+
+            def on_progress(done: int, total: int):
+                # relativo a los grupos candidatos de esta pasada, no a las filas del archivo
+                self.progress.emit(int(done * 100 / max(total, 1)))
+                self.status.emit(f"IA: {done}/{total} transacciones evaluadas")
+
+            verdicts = evaluate_ai_candidates(
+                self.df,
+                max_calls=self.max_calls,
+                config=config,
+                progress=on_progress,
+                cancelled=lambda: self._cancel,
+                cache=cache,
+                budget=budget,
+                telemetry=telemetry,
+            )
+            report = telemetry.report()
+            report["budget"] = asdict(budget)
+            self.report.emit(report)
+            stats = f"{budget.report()} · {format_report_line(report)}"
+            if cache is not None:
+                stats = f"{cache.stats_text()} · {stats}"
+            self.run_stats.emit(stats)
+            if self._cancel:
+                self.status.emit("IA: cancelado (se conservan los resultados ya recibidos)")
+            elif report["failed_jobs"]:
+                self.status.emit(
+                    f"IA: {report['failed_jobs']} llamadas fallaron (se conservan los resultados ya recibidos)"
+                )
             self.progress.emit(100)
-            self.finished.emit(out)
+            self.finished.emit(verdicts)
         except Exception as e:
             self.failed.emit(str(e))
+        finally:
+            if cache is not None:
+                cache.close()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import traceback
+from PySide6.QtCore import QObject, Signal, Slot
+
+from app.data.batch_ingest import ingest_batch
+
+
+class BatchIngestWorker(QObject):
+    progress = Signal(int)
+    status = Signal(str)
+    finished = Signal(object)  # BatchResult
+    failed = Signal(str)
+
+    def __init__(self, source: str, compact: bool = True, registry_path: str | None = None, max_workers: int | None = None):
+        super().__init__()
+        self.source = source
+        self.compact = compact
+        self.registry_path = registry_path
+        self.max_workers = max_workers
+        self._cancel = False
+
+    @Slot()
+    def run(self) -> None:
+        try:
+            self.status.emit("Lote: listando archivos y hojas...")
+            res = ingest_batch(
+                self.source,
+                max_workers=self.max_workers,
+                compact=self.compact,
+                registry_path=self.registry_path,
+                on_progress=self._on_progress,
+                cancelled=lambda: self._cancel,
+            )
+            if self._cancel:
+                self.failed.emit("Lote cancelado por el usuario.")
+                return
+            self.finished.emit(res)
+        except Exception as e:
+            self.failed.emit(f"{e}\n\n{traceback.format_exc()}")
+
+    def cancel(self) -> None:
+        self._cancel = True
+
+    def _on_progress(self, done: int, total: int) -> None:
+        self.progress.emit(int(done / total * 100) if total else 100)
+        self.status.emit(f"Lote: {done}/{total} hojas procesadas")
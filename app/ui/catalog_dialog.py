@@ -1,12 +1,37 @@
 from __future__ import annotations
 import json
+import pandas as pd
+from PySide6.QtCore import QThread, QTimer, Signal
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel
 from app.engine.catalog import save_catalog
+from app.engine.impact import CatalogImpact
 from app.core.models import Catalog
+from app.ui.catalog_preview_worker import CatalogPreviewWorker
+
+# Pausa de tipeo antes de re-evaluar el catálogo editado
+PREVIEW_DEBOUNCE_MS = 400
+
+
+def format_impact(impact: CatalogImpact) -> str:
+    if impact.exact:
+        head = f"Impacto: {impact.changed_sample} de {impact.total_rows} filas cambiarían de flag"
+    else:
+        head = (
+            f"Impacto estimado: ~{impact.changed_estimate} de {impact.total_rows} filas cambiarían de flag "
+            f"(muestra estratificada: {impact.changed_sample} de {impact.sample_rows})"
+        )
+    lines = [head]
+    if impact.transitions:
+        lines.append("  " + " | ".join(f"{a} → {b}: {n}" for (a, b), n in impact.transitions.items()))
+    if impact.top_merchants:
+        lines.append("  Merchants más afectados: " + ", ".join(f"{m} ({n})" for m, n in impact.top_merchants))
+    return "\n".join(lines)
 
 
 class CatalogDialog(QDialog):
-    def __init__(self, parent, catalog: Catalog, catalog_path: str):
+    preview_requested = Signal(int, str)  # (generación, JSON editado) -> CatalogPreviewWorker
+
+    def __init__(self, parent, catalog: Catalog, catalog_path: str, df_result: pd.DataFrame | None = None):
         super().__init__(parent)
         self.setWindowTitle("Catálogo de reglas (JSON)")
         self.resize(900, 650)
@@ -25,6 +50,11 @@ class CatalogDialog(QDialog):
         self.editor.setPlainText(json.dumps(self._catalog.to_dict(), ensure_ascii=False, indent=2))
         layout.addWidget(self.editor, 1)
 
+        # Preview de impacto contra el resultado actual (sin re-analizar todo)
+        self.impact_lbl = QLabel("Impacto: analiza un archivo para ver cómo cambian los flags al editar.")
+        self.impact_lbl.setWordWrap(True)
+        layout.addWidget(self.impact_lbl)
+
         btn_row = QHBoxLayout()
         self.btn_cancel = QPushButton("Cerrar")
         self.btn_save = QPushButton("Guardar")
@@ -41,6 +71,53 @@ class CatalogDialog(QDialog):
         self.saved_ok = False
         self.error_msg = ""
 
+        self._preview_gen = 0
+        self._preview_thread: QThread | None = None
+        self._preview_worker: CatalogPreviewWorker | None = None
+        if df_result is not None and "flag" in df_result.columns and len(df_result):
+            self._start_preview(df_result)
+
+    def _start_preview(self, df_result: pd.DataFrame):
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self._preview_timer.timeout.connect(self._request_preview)
+        self.editor.textChanged.connect(self._preview_timer.start)
+
+        self._preview_thread = QThread(self)
+        self._preview_worker = CatalogPreviewWorker(df_result)
+        self._preview_worker.moveToThread(self._preview_thread)
+        self.preview_requested.connect(self._preview_worker.preview)
+        self._preview_worker.result.connect(self._on_preview_result)
+        self._preview_worker.invalid.connect(self._on_preview_invalid)
+        self._preview_worker.failed.connect(self._on_preview_invalid)
+        self._preview_thread.finished.connect(self._preview_worker.deleteLater)
+        self._preview_thread.start()
+
+        self.impact_lbl.setText("Impacto: edita el catálogo para ver cuántas filas cambiarían de flag.")
+
+    def _request_preview(self):
+        self._preview_gen += 1
+        self._preview_worker.supersede(self._preview_gen)
+        self.impact_lbl.setText("Impacto: evaluando…")
+        self.preview_requested.emit(self._preview_gen, self.editor.toPlainText())
+
+    def _on_preview_result(self, generation: int, impact: CatalogImpact):
+        if generation == self._preview_gen:
+            self.impact_lbl.setText(format_impact(impact))
+
+    def _on_preview_invalid(self, generation: int, msg: str):
+        if generation == self._preview_gen:
+            self.impact_lbl.setText(f"Impacto: catálogo inválido — {msg}")
+
+    def done(self, result: int):
+        # close / Escape / Guardar terminan acá: corta el thread del preview
+        if self._preview_thread is not None and self._preview_thread.isRunning():
+            self._preview_worker.supersede(self._preview_gen + 1)
+            self._preview_thread.quit()
+            self._preview_thread.wait(5000)
+        super().done(result)
+
     def on_save(self):
         try:
             data = json.loads(self.editor.toPlainText())
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import traceback
+
+import pandas as pd
+from PySide6.QtCore import QObject, Signal, Slot
+from pydantic import ValidationError
+
+from app.core.models import Catalog
+from app.engine.impact import estimate_catalog_impact, stratified_sample
+
+
+class CatalogPreviewWorker(QObject):
+    """
+    Vive en un QThread mientras el CatalogDialog está abierto: parsea el JSON editado
+    y evalúa el catálogo sobre una muestra estratificada del resultado actual.
+    Igual que SearchWorker, los pedidos viejos (generación menor) se descartan.
+    """
+    result = Signal(int, object)   # (generación, CatalogImpact)
+    invalid = Signal(int, str)     # (generación, error de JSON / schema)
+    failed = Signal(int, str)
+
+    def __init__(self, df_result: pd.DataFrame):
+        super().__init__()
+        self.df_result = df_result
+        self._sample: pd.DataFrame | None = None
+        self._population: dict[str, int] = {}
+        self._latest = 0
+
+    def supersede(self, generation: int) -> None:
+        self._latest = generation
+
+    def _ensure_sample(self) -> None:
+        if self._sample is None:
+            flags = self.df_result["flag"]
+            self._sample = self.df_result.iloc[stratified_sample(flags)]
+            self._population = {str(k): int(v) for k, v in flags.astype(str).value_counts().items()}
+
+    @Slot(int, str)
+    def preview(self, generation: int, text: str) -> None:
+        if generation < self._latest:
+            return
+        try:
+            catalog = Catalog.model_validate(json.loads(text))
+        except (json.JSONDecodeError, ValidationError) as e:
+            self.invalid.emit(generation, str(e).splitlines()[0])
+            return
+        try:
+            self._ensure_sample()
+            impact = estimate_catalog_impact(
+                self._sample,
+                self._sample["flag"],
+                catalog,
+                total_rows=len(self.df_result),
+                population_flags=self._population,
+            )
+            if generation >= self._latest:
+                self.result.emit(generation, impact)
+        except Exception as e:
+            self.failed.emit(generation, f"{e}\n\n{traceback.format_exc()}")
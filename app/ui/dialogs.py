@@ -9,3 +9,7 @@ def warn(parent: QWidget, title: str, text: str) -> None:
 
 def error(parent: QWidget, title: str, text: str) -> None:
     QMessageBox.critical(parent, title, text)
+
+def confirm(parent: QWidget, title: str, text: str) -> bool:
+    answer = QMessageBox.question(parent, title, text, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+    return answer == QMessageBox.Yes
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import traceback
+from PySide6.QtCore import QObject, Signal, Slot
+
+from app.data.ingest import load_canonical
+from app.data.profile import DatasetProfile
+
+
+class CanonicalLoadWorker(QObject):
+    """
+    Lectura por chunks (mapping + limpieza + perfil) de un archivo grande fuera del hilo de la UI.
+    """
+    status = Signal(str)
+    finished = Signal(object)  # (df limpio, issues, DatasetProfile)
+    failed = Signal(str)
+
+    def __init__(self, path: str, sheet, header_row: int | None, mapping: dict[str, int],
+                 headers: list[str] | None = None, compact: bool = True):
+        super().__init__()
+        self.path = path
+        self.sheet = sheet
+        self.header_row = header_row
+        self.mapping = mapping
+        self.headers = headers
+        self.compact = compact
+
+    @Slot()
+    def run(self) -> None:
+        try:
+            self.status.emit("leyendo archivo por chunks...")
+            profile = DatasetProfile()  # se arma en la misma lectura por chunks
+            cleaned, issues = load_canonical(
+                self.path, self.sheet, self.header_row, self.mapping,
+                compact=self.compact, headers=self.headers, profile=profile,
+            )
+            self.finished.emit((cleaned, issues, profile))
+        except Exception as e:
+            self.failed.emit(f"{e}\n\n{traceback.format_exc()}")
@@ -1,33 +1,86 @@
 from __future__ import annotations
 
-import pandas as pd
-from app.ui.ai_worker import AIWorker
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from PySide6.QtCore import QThread, Qt, QEvent
-from PySide6.QtGui import QAction, QColor, QCloseEvent
+import numpy as np
+
+from PySide6.QtCore import QThread, QTimer, Qt, QEvent, Signal
+from PySide6.QtGui import QAction, QCloseEvent
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFileDialog, QComboBox, QProgressBar,
-    QTableWidget, QTableWidgetItem, QFrame, QLineEdit, 
+    QTableView, QFrame, QLineEdit, QHeaderView, QDockWidget,
     QAbstractItemView  # <--- IMPORT NECESARIO AGREGADO
 )
 
-from app.data.io_excel import list_sheets
-from app.data.header_detection import read_excel_noheader, detect_header_row, apply_detected_header
-from app.data.positional_mapping import build_mapping_from_positions
-from app.data.fixed_mapping import fixed_mapping_for_your_headers
-from app.data.mapping import apply_column_mapping, missing_required_columns
-from app.data.cleaning import validate_and_clean
-from app.data.export import export_to_excel, export_to_csv
+from app.ui.dialogs import confirm, info, warn, error
+from app.ui.summary_panel import SummaryPanel
+
+# Arranque rápido: todo lo que importa pandas / openpyxl (data, engine, workers)
+# se importa recién dentro del handler que lo usa; preload_pipeline() lo precarga
+# en segundo plano una vez que la ventana ya está visible.
+if TYPE_CHECKING:
+    import pandas as pd
+    from app.core.models import Catalog
+    from app.data.layout_registry import LayoutRegistry
+    from app.data.profile import DatasetProfile
+    from app.engine.result_store import PartialResults, ResultStore
+    from app.engine.summary import SummaryCube
+    from app.ui.ai_worker import AIWorker
+    from app.ui.batch_worker import BatchIngestWorker
+    from app.ui.load_worker import CanonicalLoadWorker
+    from app.ui.search_worker import SearchWorker
+    from app.ui.table_model import DataFrameTableModel
+    from app.ui.worker import ProcessingWorker
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_MODULES = [
+    "pandas",
+    "app.data.readers",
+    "app.data.ingest",
+    "app.data.cleaning",
+    "app.data.layout_registry",
+    "app.engine.catalog",
+    "app.engine.rules",
+    "app.engine.catalog_prune",
+    "app.engine.validator",
+    "app.ui.table_model",
+    "app.ui.search_worker",
+    "app.ui.worker",
+    "app.ui.load_worker",
+]
+
+
+def preload_pipeline() -> None:
+    """
+    Importa los módulos pesados del pipeline (pensado para un thread en segundo plano
+    después de mostrar la ventana): el primer "Cargar archivo" ya no paga el import.
+    """
+    import importlib
+
+    for name in PIPELINE_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:  # el handler real reportará el error al usarse
+            logger.warning("Preload de %s falló: %s", name, e)
+
 
-from app.engine.catalog import load_catalog
-from app.engine.validator import validate_generated_catalog
-from app.engine.catalog_prune import prune_catalog_for_dataset
+def _is_running(thread: QThread | None) -> bool:
+    # los threads terminados se liberan con deleteLater: el wrapper puede quedar sin objeto C++
+    try:
+        return thread is not None and thread.isRunning()
+    except RuntimeError:
+        return False
 
-from app.ui.worker import ProcessingWorker
-from app.ui.dialogs import info, warn, error
-from app.ui.catalog_dialog import CatalogDialog
 
+# Pausa de tipeo antes de lanzar la búsqueda (un pedido por palabra, no por tecla)
+SEARCH_DEBOUNCE_MS = 250
+# Cada cuánto se refresca la tabla con los warnings parciales mientras corre el análisis
+LIVE_REFRESH_MS = 400
 
 STYLE = """
 QMainWindow { background: #0b1220; }
@@ -56,10 +109,11 @@ QProgressBar {
 }
 QProgressBar::chunk { background: #2563eb; border-radius: 10px; }
 
-QTableWidget {
+QTableView {
     background: #0f1b33; color: #e7eefc; gridline-color: #1c2e55;
     border: 1px solid #223b6a; border-radius: 10px;
 }
+QStatusBar { color: #9fb2d6; }
 QHeaderView::section {
     background: #0b1730; color: #e7eefc; border: 1px solid #1c2e55;
     padding: 6px;
@@ -100,6 +154,13 @@ def _small_button(text: str) -> QPushButton:
 
 
 class MainWindow(QMainWindow):
+    # Pedidos al SearchWorker (conexión encolada: corren en su thread, en orden)
+    search_frame_changed = Signal(object, object)  # (df, ResultStore)
+    search_frame_updated = Signal(object, object)  # (df con columnas ai_*, row-ids que cambiaron)
+    search_index_requested = Signal()
+    # (generación, filtro flag, texto, columna orden, desc, row-ids del drill-down o None)
+    search_requested = Signal(int, object, str, object, bool, object)
+
     def __init__(self, catalog_path: str):
         super().__init__()
         self.setWindowTitle("Corporate Expense Auditor (Flags)")
@@ -107,18 +168,38 @@ class MainWindow(QMainWindow):
         self.setStyleSheet(STYLE)
 
         self.catalog_path = catalog_path
-        self.catalog = load_catalog(catalog_path)
+        self._catalog: Catalog | None = None  # se carga al primer uso (ver propiedad catalog)
+
+        # layouts de banco ya vistos (header + mapping) junto al catálogo; carga al primer uso
+        self._layouts: LayoutRegistry | None = None
+        self._layout = None        # SheetLayout reconocido para la hoja actual
+        self._layout_probe = None  # fingerprint de la hoja actual (para aprenderla)
 
         self.df_raw: pd.DataFrame | None = None
         self.df_ready: pd.DataFrame | None = None
         self.df_result: pd.DataFrame | None = None
+        self._result_store: ResultStore | None = None  # row-ids por flag del resultado
+        self._partial: PartialResults | None = None     # chunks ya evaluados mientras corre el análisis
+        self._summary: SummaryCube | None = None          # pivots empleado / categoría / MCC
+        self._summary_source: pd.DataFrame | None = None  # dataset (raw o lote) del que salió el cubo
+        self._ai_report: dict | None = None               # telemetría de la última pasada de IA
 
-        # dataset actualmente mostrado (resultado + filtros)
-        self._view_df: pd.DataFrame | None = None
+        # vista actual = row-ids del resultado (filtro + búsqueda), sin copiar el df
+        self._view_rows: np.ndarray | None = None
 
         # filtros
         self._active_flag_filter: str | None = None  # "OK" | "POSSIBLE_WARN" | "DIRECT_WARN" | "WARNINGS" | "ALL"
         self._search_text: str = ""
+        self._search_gen = 0  # generación del último pedido de vista; resultados viejos se descartan
+        # orden por columna (click en header): None = orden del archivo
+        self._sort_column: str | None = None
+        self._sort_descending = False
+        # drill-down desde el resumen: row-ids del grupo clickeado (None = sin restricción)
+        self._drill_rows: np.ndarray | None = None
+
+        # esquema compacto (categoricals / uint16) + memoria por etapa
+        self.compact_schema = True
+        self._mem_stages: dict[str, float] = {}
 
         # paginación
         self.page_size = 60
@@ -127,12 +208,23 @@ class MainWindow(QMainWindow):
         # IA references
         self._ai_thread: QThread | None = None
         self._ai_worker: AIWorker | None = None
+        self._ai_source: pd.DataFrame | None = None        # df_result sobre el que corre la IA
+        self._profile: tuple[pd.DataFrame, DatasetProfile] | None = None  # (df_ready, su perfil)
 
         self.excel_path: str | None = None
+        # CSV / Parquet / NDJSON: solo se carga un preview; el análisis lee el archivo por chunks
+        self._stream_source: tuple[str, str, int | None, list[str]] | None = None
         # Processing references
         self._thread: QThread | None = None
         self._worker: ProcessingWorker | None = None
-
+        self._batch_thread: QThread | None = None
+        self._batch_worker: BatchIngestWorker | None = None
+        self._load_thread: QThread | None = None
+        self._load_worker: CanonicalLoadWorker | None = None
+        self._search_thread: QThread | None = None
+        self._search_worker: SearchWorker | None = None
+
+        self._build_summary_dock()
         self._build_menu()
 
         root = QWidget()
@@ -142,7 +234,7 @@ class MainWindow(QMainWindow):
 
         # --- Row 1: load + sheet + analyze
         row1 = QHBoxLayout()
-        self.btn_load = QPushButton("Cargar Excel")
+        self.btn_load = QPushButton("Cargar archivo")
         self.sheet_combo = QComboBox()
         self.sheet_combo.setEnabled(False)
         self.btn_load_sheet = QPushButton("Cargar hoja")
@@ -234,7 +326,18 @@ class MainWindow(QMainWindow):
         layout.addWidget(div)
 
         layout.addWidget(QLabel("Tabla: usa filtros + búsqueda + paginación para navegar el dataset."))
-        self.table = QTableWidget(0, 0)
+        # Tabla virtual: el modelo solo entrega las celdas visibles (sin QTableWidgetItem por celda)
+        self._table_model: DataFrameTableModel | None = None  # se crea con el primer dataset
+        self.table = QTableView()
+        # Orden "server-side": el click en el header pide la vista ordenada al SearchWorker
+        # (argsort cacheado por columna), no ordena el modelo
+        self.table.setSortingEnabled(False)
+        self.table.horizontalHeader().setSortIndicatorShown(False)
+        self.table.horizontalHeader().sectionClicked.connect(self._on_header_clicked)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # altura fija por fila: Qt no necesita medir filas para calcular el scroll
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         
         # --- MEJORA DE SCROLLING ---
         # Scroll por pixeles en lugar de por ítems (columnas/filas) para navegación fluida
@@ -242,6 +345,7 @@ class MainWindow(QMainWindow):
         self.table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
         
         layout.addWidget(self.table, 1)
+        self.table.verticalScrollBar().valueChanged.connect(self._on_table_scrolled)
 
         # --- events
         self.btn_load.clicked.connect(self.on_load_excel)
@@ -266,8 +370,97 @@ class MainWindow(QMainWindow):
         self.btn_prev.clicked.connect(self.on_prev_page)
         self.btn_next.clicked.connect(self.on_next_page)
 
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._recompute_view_and_render)
+
+        self._live_timer = QTimer(self)
+        self._live_timer.setSingleShot(True)
+        self._live_timer.setInterval(LIVE_REFRESH_MS)
+        self._live_timer.timeout.connect(self._refresh_live_view)
+
         self._enable_table_controls(False)
 
+    @property
+    def catalog(self) -> Catalog:
+        if self._catalog is None:
+            from app.engine.catalog import load_catalog
+
+            self._catalog = load_catalog(self.catalog_path)
+        return self._catalog
+
+    @catalog.setter
+    def catalog(self, value: Catalog) -> None:
+        self._catalog = value
+
+    @property
+    def layouts(self) -> LayoutRegistry:
+        if self._layouts is None:
+            from app.data.layout_registry import LayoutRegistry, DEFAULT_REGISTRY_NAME
+
+            self._layouts = LayoutRegistry.load(str(Path(self.catalog_path).with_name(DEFAULT_REGISTRY_NAME)))
+        return self._layouts
+
+    @layouts.setter
+    def layouts(self, value: LayoutRegistry) -> None:
+        self._layouts = value
+
+    @property
+    def table_model(self) -> DataFrameTableModel:
+        if self._table_model is None:
+            from app.ui.table_model import DataFrameTableModel
+
+            self._table_model = DataFrameTableModel(self)
+            self.table.setModel(self._table_model)
+        return self._table_model
+
+    def _ensure_search_thread(self):
+        """
+        Thread persistente para índice + filtro + búsqueda: la UI solo recibe row-ids.
+        Se arranca con el primer resultado.
+        """
+        if self._search_thread is not None:
+            return
+        from app.ui.search_worker import SearchWorker
+
+        self._search_thread = QThread(self)
+        self._search_worker = SearchWorker()
+        self._search_worker.moveToThread(self._search_thread)
+
+        self.search_frame_changed.connect(self._search_worker.set_frame)
+        self.search_frame_updated.connect(self._search_worker.update_frame)
+        self.search_index_requested.connect(self._search_worker.build_index)
+        self.search_requested.connect(self._search_worker.search)
+        self._search_worker.result.connect(self._on_view_rows)
+        self._search_worker.index_ready.connect(lambda: logger.info("Índice de búsqueda listo"))
+        self._search_worker.failed.connect(lambda msg: error(self, "Búsqueda error", msg))
+        self._search_thread.finished.connect(self._search_worker.deleteLater)
+
+        self._search_thread.start()
+
+    def _set_search_frame(self, df: pd.DataFrame):
+        """
+        Entrega el resultado al worker: primero la vista sin texto (rápida),
+        después se arma el índice (en el mismo thread, en orden).
+        """
+        self._ensure_search_thread()
+        self.search_frame_changed.emit(df, self._result_store)
+        self._recompute_view_and_render()
+        self.search_index_requested.emit()
+
+    def _invalidate_view(self):
+        """
+        Descarta búsquedas en curso (p.ej. al cargar otro archivo).
+        """
+        self._search_timer.stop()
+        self._live_timer.stop()
+        self._partial = None
+        self._search_gen += 1
+        if self._search_worker is not None:
+            self._search_worker.supersede(self._search_gen)
+        self._view_rows = None
+
     def _build_menu(self):
         menubar = self.menuBar()
         tools = menubar.addMenu("Herramientas")
@@ -276,8 +469,70 @@ class MainWindow(QMainWindow):
         act_catalog.triggered.connect(self.open_catalog_dialog)
         tools.addAction(act_catalog)
 
+        act_batch = QAction("Cargar lote (carpeta)…", self)
+        act_batch.triggered.connect(self.on_load_batch)
+        tools.addAction(act_batch)
+
+        self.act_compact = QAction("Esquema compacto (menos memoria)", self)
+        self.act_compact.setCheckable(True)
+        self.act_compact.setChecked(True)
+        self.act_compact.toggled.connect(self._on_compact_toggled)
+        tools.addAction(self.act_compact)
+
+        self.act_ai_report = QAction("Reporte de la última pasada de IA…", self)
+        self.act_ai_report.setEnabled(False)
+        self.act_ai_report.triggered.connect(self.on_show_ai_report)
+        tools.addAction(self.act_ai_report)
+
+        act_learn = QAction("Promover veredictos de IA al catálogo…", self)
+        act_learn.triggered.connect(self.on_promote_ai_verdicts)
+        tools.addAction(act_learn)
+
+        act_summary = self.summary_dock.toggleViewAction()
+        act_summary.setText("Resumen por empleado / categoría / MCC")
+        tools.addAction(act_summary)
+
+    def _build_summary_dock(self):
+        self.summary_panel = SummaryPanel()
+        self.summary_panel.drill_requested.connect(self._on_summary_drill)
+        self.summary_dock = QDockWidget("Resumen de warnings", self)
+        self.summary_dock.setWidget(self.summary_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.summary_dock)
+        self.summary_dock.hide()
+
+    def _on_summary_drill(self, rows: np.ndarray, label: str):
+        """
+        Click en el resumen: la tabla muestra solo ese grupo (se combina con búsqueda y orden).
+        """
+        if self.df_result is None:
+            return
+        self._drill_rows = rows
+        self._active_flag_filter = None
+        self.filter_lbl.setText(f"Filtro: {label} — click en un filtro de flag para salir")
+        self.page_index = 0
+        self._recompute_view_and_render()
+
+    def _on_compact_toggled(self, checked: bool):
+        self.compact_schema = checked
+
+    def _record_memory(self, stage: str, df: pd.DataFrame, detail: bool = False):
+        """
+        Registra memoria usada por el dataset en una etapa y la muestra en la barra de estado.
+        """
+        from app.data.schema import memory_breakdown, memory_mb, format_memory_report
+
+        self._mem_stages[stage] = memory_mb(df)
+        report = format_memory_report(self._mem_stages)
+        self.statusBar().showMessage(report)
+        logger.info(report)
+        if detail:
+            cols = ", ".join(f"{c}={b / (1024 * 1024):.1f}MB" for c, b in memory_breakdown(df).items())
+            logger.info("Memoria %s por columna: %s", stage, cols)
+
     def open_catalog_dialog(self):
-        dlg = CatalogDialog(self, self.catalog, self.catalog_path)
+        from app.ui.catalog_dialog import CatalogDialog
+
+        dlg = CatalogDialog(self, self.catalog, self.catalog_path, df_result=self.df_result)
         dlg.exec()
 
         if dlg.saved_ok:
@@ -291,41 +546,73 @@ class MainWindow(QMainWindow):
     # ---------------------------
 
     def on_load_excel(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Selecciona Excel", "", "Excel (*.xlsx *.xls)")
+        from app.data.readers import FILE_DIALOG_FILTER, list_sources
+
+        path, _ = QFileDialog.getOpenFileName(self, "Selecciona extracto", "", FILE_DIALOG_FILTER)
         if not path:
             return
 
         self.excel_path = path
-        sheets = list_sheets(path)
+        sheets = list_sources(path)
         self.sheet_combo.clear()
         self.sheet_combo.addItems(sheets)
         self.sheet_combo.setEnabled(True)
         self.btn_load_sheet.setEnabled(True)
 
-        self.status_lbl.setText("Estado: Excel cargado. Selecciona hoja.")
+        self.status_lbl.setText("Estado: archivo cargado. Selecciona hoja.")
         self.progress.setValue(0)
 
     def on_load_sheet(self):
+        from app.data.readers import file_kind, is_self_describing, read_head_noheader
+        from app.data.header_detection import read_excel_noheader, detect_header_row, apply_detected_header
+        from app.data.layout_registry import probe_layout
+
         if not self.excel_path:
             return
 
         sheet = self.sheet_combo.currentText()
 
-        df0 = read_excel_noheader(self.excel_path, sheet_name=sheet)
-        hdr = detect_header_row(df0, max_scan_rows=30)
+        streamed = file_kind(self.excel_path) != "excel"
+        if streamed:
+            # Formatos grandes: solo el head para detectar layout y mostrar preview
+            df0 = read_head_noheader(self.excel_path, sheet_name=sheet)
+        else:
+            df0 = read_excel_noheader(self.excel_path, sheet_name=sheet)
+
+        # Layout conocido => header y mapping inmediatos (sin escanear filas)
+        self._layout = self.layouts.match(df0)
+        if self._layout is not None:
+            hdr = self._layout.header_row
+        elif is_self_describing(self.excel_path):
+            hdr = 0
+        else:
+            hdr = detect_header_row(df0, max_scan_rows=30)
+        self._layout_probe = probe_layout(df0, hdr)
 
         if hdr is not None:
             df_raw = apply_detected_header(df0, hdr)
             self.status_lbl.setText(f"Estado: headers detectados en fila {hdr + 1} | filas: {len(df_raw)}")
         else:
-            df_raw = df0.copy()
-            df_raw.columns = [f"COL_{i}" for i in range(df_raw.shape[1])]
+            df_raw = df0.set_axis([f"COL_{i}" for i in range(df0.shape[1])], axis=1)
             self.status_lbl.setText(f"Estado: sin headers (posicional) | filas: {len(df_raw)}")
+        if self._layout is not None:
+            self.status_lbl.setText(self.status_lbl.text() + " | layout conocido")
+
+        self._stream_source = (self.excel_path, sheet, hdr, [str(c) for c in df_raw.columns]) if streamed else None
+        if streamed:
+            self.status_lbl.setText(self.status_lbl.text().replace("filas:", "preview filas:") + " | lectura por chunks")
 
         self.df_raw = df_raw
+        self._mem_stages = {}
+        self._record_memory("raw", df_raw)
         self.df_ready = None
         self.df_result = None
-        self._view_df = None
+        self._result_store = None
+        self._summary = None
+        self.summary_panel.set_cube(None)
+        self._ai_report = None
+        self.act_ai_report.setEnabled(False)
+        self._invalidate_view()
 
         self.btn_ai.setEnabled(False)
 
@@ -342,41 +629,113 @@ class MainWindow(QMainWindow):
         self._enable_table_controls(False)
 
     def on_analyze(self):
+        from app.data.mapping import apply_index_mapping, infer_index_mapping, missing_required_columns
+        from app.data.cleaning import validate_and_clean
+
         if self.df_raw is None:
+            # Lote ya ingerido (sin df_raw): re-analizar el dataset canónico
+            if self.df_ready is not None:
+                self._start_analysis([])
             return
 
         df_raw = self.df_raw
 
-        expected = {"Transaction Date", "Clean Merchant Name", "Total Transaction Amount", "MCC", "Purchase Category"}
-
-        if expected.issubset(set(df_raw.columns)):
-            mapping = fixed_mapping_for_your_headers()
-            df = apply_column_mapping(df_raw, mapping)
+        if self._layout is not None:
+            mapping = self._layout.mapping
         else:
-            pos_map = build_mapping_from_positions(list(df_raw.columns))
-            mapping = {
-                "date": pos_map["date"],
-                "merchant": pos_map["merchant"],
-                "amount": pos_map["amount"],
-                "mcc": pos_map["mcc"],
-                "description": pos_map["description"],
-            }
-            df = df_raw.rename(columns={
-                pos_map.get("first_name", ""): "first_name",
-                pos_map.get("last_name", ""): "last_name",
-            }).copy()
-            df = apply_column_mapping(df, mapping)
+            mapping = infer_index_mapping(list(df_raw.columns))
+        df = apply_index_mapping(df_raw, mapping)
 
         miss = missing_required_columns(df)
         if miss:
             warn(self, "Archivo no compatible", "No pude mapear columnas necesarias:\n" + ", ".join(miss))
             return
 
-        cleaned, issues = validate_and_clean(df)
+        # Layout nuevo que mapeó bien: se aprende para las próximas cargas
+        if self._layout is None and self._layout_probe is not None:
+            self._layout = self.layouts.learn(self._layout_probe, mapping)
+            try:
+                self.layouts.save()
+            except OSError as e:
+                logger.warning("No se pudo guardar el registro de layouts: %s", e)
+
+        if self._stream_source is not None:
+            self._start_canonical_load(mapping)
+            return
+
+        self._record_memory("mapeado", df)
+        cleaned, issues = validate_and_clean(df, compact=self.compact_schema)
+        self.df_ready = cleaned
+        self._record_memory("limpio", cleaned, detail=True)
+        self._start_analysis(issues)
+
+    def _start_canonical_load(self, mapping: dict[str, int]):
+        """
+        Archivo grande: la lectura por chunks corre en un worker; al terminar arranca el análisis.
+        """
+        from app.ui.load_worker import CanonicalLoadWorker
+
+        path, sheet, hdr, headers = self._stream_source
+        self.progress.setValue(0)
+        self.btn_load.setEnabled(False)
+        self.btn_load_sheet.setEnabled(False)
+        self.btn_analyze.setEnabled(False)
+        self.status_lbl.setText("Estado: leyendo archivo por chunks...")
+
+        self._load_thread = QThread()
+        self._load_worker = CanonicalLoadWorker(path, sheet, hdr, mapping, headers=headers, compact=self.compact_schema)
+        self._load_worker.moveToThread(self._load_thread)
+
+        self._load_thread.started.connect(self._load_worker.run)
+        self._load_worker.status.connect(lambda s: self.status_lbl.setText(f"Estado: {s}"))
+        self._load_worker.finished.connect(self.on_canonical_loaded)
+        self._load_worker.failed.connect(self.on_canonical_load_failed)
+
+        self._load_worker.finished.connect(self._load_thread.quit)
+        self._load_worker.failed.connect(self._load_thread.quit)
+        self._load_thread.finished.connect(self._load_thread.deleteLater)
+
+        self._load_thread.start()
+
+    def on_canonical_loaded(self, res):
+        cleaned, issues, profile = res
+        self.btn_load.setEnabled(True)
+        self.btn_load_sheet.setEnabled(True)
         self.df_ready = cleaned
+        self._record_memory("limpio", cleaned, detail=True)
+        self._start_analysis(issues, profile)
+
+    def on_canonical_load_failed(self, msg: str):
+        self.btn_load.setEnabled(True)
+        self.btn_load_sheet.setEnabled(True)
+        self.btn_analyze.setEnabled(True)
+        error(self, "Error leyendo archivo", msg)
+        self.status_lbl.setText("Estado: error leyendo archivo")
+
+    def _dataset_profile(self, profile: DatasetProfile | None = None) -> DatasetProfile:
+        """
+        Perfil de self.df_ready (MCCs, merchants, cuantiles de monto): se calcula una vez
+        por dataset y lo reusan la poda del catálogo y la generación de catálogo.
+        """
+        from app.data.profile import DatasetProfile
+
+        if profile is not None:
+            self._profile = (self.df_ready, profile)
+        elif self._profile is None or self._profile[0] is not self.df_ready:
+            self._profile = (self.df_ready, DatasetProfile.from_frame(self.df_ready))
+        return self._profile[1]
+
+    def _start_analysis(self, issues: list[str], profile: DatasetProfile | None = None):
+        """
+        Corre las reglas sobre self.df_ready (ya canónico y limpio) en el worker.
+        """
+        from app.engine.catalog_prune import prune_catalog_for_dataset
+        from app.engine.validator import validate_generated_catalog
+        from app.engine.result_store import PartialResults
+        from app.ui.worker import ProcessingWorker
 
         # Podar catálogo (evita MCC inexistentes / keywords sin matches)
-        pruned, changes = prune_catalog_for_dataset(self.catalog, self.df_ready, min_keyword_matches=3)
+        pruned, changes = prune_catalog_for_dataset(self.catalog, self._dataset_profile(profile), min_keyword_matches=3)
         catalog_to_use = pruned
 
         # Puedes silenciar esto luego si lo prefieres
@@ -401,12 +760,14 @@ class MainWindow(QMainWindow):
         self.btn_ai.setEnabled(False)
         self.status_lbl.setText("Estado: procesando...")
 
+        self._partial = PartialResults(self.df_ready)
         self._thread = QThread()
         self._worker = ProcessingWorker(self.df_ready, catalog_to_use, chunk_size=5000)
         self._worker.moveToThread(self._thread)
 
         self._thread.started.connect(self._worker.run)
         self._worker.progress.connect(self.progress.setValue)
+        self._worker.partial.connect(self._on_partial_result)
         self._worker.status.connect(lambda s: self.status_lbl.setText(f"Estado: {s}"))
         self._worker.finished.connect(self.on_finished)
         self._worker.failed.connect(self.on_failed)
@@ -417,13 +778,127 @@ class MainWindow(QMainWindow):
 
         self._thread.start()
 
+    def on_load_batch(self):
+        from app.ui.batch_worker import BatchIngestWorker
+
+        folder = QFileDialog.getExistingDirectory(self, "Selecciona carpeta del lote")
+        if not folder:
+            return
+
+        self.progress.setValue(0)
+        self.btn_load.setEnabled(False)
+        self.btn_analyze.setEnabled(False)
+        self.status_lbl.setText("Estado: ingiriendo lote...")
+
+        self._batch_thread = QThread()
+        self._batch_worker = BatchIngestWorker(folder, compact=self.compact_schema, registry_path=self.layouts.path)
+        self._batch_worker.moveToThread(self._batch_thread)
+
+        self._batch_thread.started.connect(self._batch_worker.run)
+        self._batch_worker.progress.connect(self.progress.setValue)
+        self._batch_worker.status.connect(lambda s: self.status_lbl.setText(f"Estado: {s}"))
+        self._batch_worker.finished.connect(self.on_batch_finished)
+        self._batch_worker.failed.connect(self.on_batch_failed)
+
+        self._batch_worker.finished.connect(self._batch_thread.quit)
+        self._batch_worker.failed.connect(self._batch_thread.quit)
+        self._batch_thread.finished.connect(self._batch_thread.deleteLater)
+
+        self._batch_thread.start()
+
+    def on_batch_finished(self, res):
+        from app.data.layout_registry import LayoutRegistry
+
+        self.btn_load.setEnabled(True)
+        # Los workers pudieron aprender layouts nuevos
+        self.layouts = LayoutRegistry.load(self.layouts.path)
+
+        if res.errors:
+            lines = [f"{Path(e.path).name} [{e.sheet or '-'}]: {e.message}" for e in res.errors]
+            warn(self, "Lote: archivos con error", "\n".join(lines[:20]) + ("\n..." if len(lines) > 20 else ""))
+
+        if res.df.empty:
+            self.status_lbl.setText("Estado: el lote no produjo filas")
+            return
+
+        self.df_raw = None
+        self.df_ready = res.df
+        self.df_result = None
+        self._result_store = None
+        self._summary = None
+        self.summary_panel.set_cube(None)
+        self._ai_report = None
+        self.act_ai_report.setEnabled(False)
+        self._invalidate_view()
+        self._stream_source = None
+        self._mem_stages = {}
+        self._record_memory("limpio", res.df, detail=True)
+
+        self._reset_counts()
+        self._reset_filters_and_paging()
+        self.status_lbl.setText(f"Estado: lote cargado | {len(res.rows_by_source)} hojas | filas: {len(res.df)}")
+        self._start_analysis(res.issues)
+
+    def on_batch_failed(self, msg: str):
+        self.btn_load.setEnabled(True)
+        error(self, "Lote error", msg)
+        self.status_lbl.setText("Estado: error en lote")
+
     def on_cancel(self):
         if self._worker:
             self._worker.cancel()
             self.status_lbl.setText("Estado: cancelando...")
 
+    def _on_partial_result(self, start: int, res: pd.DataFrame):
+        """
+        Chunk terminado: contadores al instante; la tabla de warnings se refresca con throttle.
+        """
+        if self._partial is None:
+            return
+        self._partial.add(start, res)
+        self._update_counts(self._partial.counts)
+        if not self._live_timer.isActive():
+            self._live_timer.start()
+
+    def _refresh_live_view(self):
+        """
+        Muestra los warnings evaluados hasta ahora (DIRECT/POSSIBLE) sin perder el scroll.
+        """
+        if self._partial is None or self.df_result is not None:
+            return
+        frame = self._partial.warnings_frame()
+        first = self.table_model.frame is None or "flag" not in self.table_model.frame.columns
+        bar = self.table.verticalScrollBar()
+        pos = bar.value()
+
+        self._view_rows = np.arange(len(frame), dtype=np.int64)
+        self.table_model.set_frame(frame, show_flag_colors=True)
+        if first:
+            self.table.resizeColumnsToContents()
+        bar.setValue(pos)
+        self._update_page_label()
+        self.filter_lbl.setText(
+            f"Filtro: SOLO WARNINGS (en vivo: {self._partial.rows_done}/{len(self._partial.df)} filas evaluadas)"
+        )
+
     def on_finished(self, result: pd.DataFrame):
+        from app.engine.result_store import ResultStore
+        from app.engine.summary import SummaryCube
+
+        self._live_timer.stop()
+        self._partial = None
         self.df_result = result
+        self._result_store = ResultStore.from_result(result)
+        source = self.df_raw if self.df_raw is not None else self.df_ready
+        if self._summary is not None and self._summary_source is source and self._summary.n == len(result):
+            # Re-análisis del mismo dataset (p.ej. catálogo editado): solo se mueven las filas
+            # cuyo flag cambió
+            self._refresh_summary_flags(result["flag"])
+        else:
+            self._summary = SummaryCube(result)
+            self._summary_source = source
+            self.summary_panel.set_cube(self._summary)
+        self._record_memory("resultado", result)
         self.btn_export_excel.setEnabled(True)
         self.btn_export_csv.setEnabled(True)
         self.btn_ai.setEnabled(True)
@@ -431,19 +906,23 @@ class MainWindow(QMainWindow):
         self.btn_analyze.setEnabled(True)
         self.status_lbl.setText("Estado: terminado")
 
-        self._update_counts(result)
+        self._update_counts()
         self._reset_filters_and_paging()
         self._enable_table_controls(True)
 
         # Por defecto: SOLO WARNINGS (mejor UX)
         self._active_flag_filter = "WARNINGS"
         self.filter_lbl.setText("Filtro: SOLO WARNINGS — usa búsqueda/paginación")
-        self._recompute_view_and_render()
+        self._set_search_frame(result)
 
     def on_failed(self, msg: str):
         self.btn_cancel.setEnabled(False)
         self.btn_analyze.setEnabled(True)
         self.btn_ai.setEnabled(True)
+        # Cancelado / error: los warnings parciales quedan visibles para revisar
+        self._live_timer.stop()
+        self._refresh_live_view()
+        self._partial = None
         error(self, "Error", msg)
         self.status_lbl.setText("Estado: error")
 
@@ -452,6 +931,9 @@ class MainWindow(QMainWindow):
     # ---------------------------
 
     def on_ai_explain(self):
+        from app.ai.verdict_cache import DEFAULT_CACHE_NAME
+        from app.ui.ai_worker import AIWorker
+
         if self.df_result is None:
             warn(self, "IA", "Primero analiza el documento.")
             return
@@ -462,12 +944,17 @@ class MainWindow(QMainWindow):
 
         self._ai_thread = QThread()
         # Usa AIWorker con lógica de bucle interno
-        self._ai_worker = AIWorker(self.df_result, max_calls=200)
+        # veredictos ya conocidos (caché SQLite junto al catálogo): solo lo nuevo va a la red
+        cache_path = str(Path(self.catalog_path).with_name(DEFAULT_CACHE_NAME))
+        self._ai_source = self.df_result
+        self._ai_worker = AIWorker(self.df_result, max_calls=200, cache_path=cache_path)
         self._ai_worker.moveToThread(self._ai_thread)
 
         self._ai_thread.started.connect(self._ai_worker.run)
         self._ai_worker.progress.connect(self.progress.setValue)
         self._ai_worker.status.connect(lambda s: self.status_lbl.setText(f"Estado: {s}"))
+        self._ai_worker.run_stats.connect(self.statusBar().showMessage)
+        self._ai_worker.report.connect(self._on_ai_report)
         self._ai_worker.finished.connect(self.on_ai_finished)
         self._ai_worker.failed.connect(self.on_ai_failed)
 
@@ -477,13 +964,99 @@ class MainWindow(QMainWindow):
 
         self._ai_thread.start()
 
-    def on_ai_finished(self, df_with_ai: pd.DataFrame):
-        self.df_result = df_with_ai
-        self.status_lbl.setText("Estado: IA listo (explicaciones añadidas)")
+    def on_ai_finished(self, verdicts):
+        """
+        verdicts = AIVerdicts (por row-id). Las columnas ai_* se agregan sin copiar el resto
+        del resultado; flags y ResultStore no cambian (la IA solo recomienda) y el resumen
+        se re-sincroniza con los flags (no hace nada si ninguno cambió).
+        """
+        from app.ai.ai_explainer import AI_COLUMNS
+
         self.btn_ai.setEnabled(True)
+        if self.df_result is None or self.df_result is not self._ai_source:
+            self.status_lbl.setText("Estado: IA descartada (el resultado cambió durante la pasada)")
+            return
 
-        # Re-render con tu vista actual (filtro/paginación)
-        self._recompute_view_and_render()
+        rows = verdicts.rows()
+        old = self.df_result
+        self.df_result = verdicts.assign_to(old)
+        self._ai_source = None
+        self._refresh_summary_flags(self.df_result["flag"])
+        self.status_lbl.setText(f"Estado: IA listo ({len(rows)} filas con explicación)")
+
+        # Solo se releen las columnas ai_* y se repintan las filas afectadas de la vista
+        if self.table_model.frame is old:
+            self.table_model.update_columns(self.df_result, list(AI_COLUMNS), rows)
+        self._ensure_search_thread()
+        self.search_frame_updated.emit(self.df_result, rows)
+        if self._search_text or self._sort_column in AI_COLUMNS:
+            self._recompute_view_and_render()
+
+    def _refresh_summary_flags(self, flags: pd.Series):
+        """
+        Aplica un vector de flags nuevo al cubo de resumen; re-dibuja solo si algo cambió.
+        """
+        if self._summary is not None and self._summary.update_flags(flags):
+            self.summary_panel.refresh()
+
+    def _on_ai_report(self, report: dict):
+        self._ai_report = report
+        self.act_ai_report.setEnabled(True)
+
+    def on_show_ai_report(self):
+        from app.ai.telemetry import format_report
+
+        if self._ai_report is None:
+            return
+        info(self, "IA: reporte de la última pasada", format_report(self._ai_report))
+
+    def _export_ai_report(self, path: str) -> str:
+        """
+        Si hubo pasada de IA, deja su reporte JSON junto al archivo exportado.
+        """
+        from app.data.export import write_ai_report
+
+        if self._ai_report is None:
+            return ""
+        return f"\nReporte IA:\n{write_ai_report(self._ai_report, path)}"
+
+    def on_promote_ai_verdicts(self):
+        """
+        Lleva los veredictos consistentes de la caché de IA a la capa `learned_verdicts`
+        del catálogo (se revisan / editan en el diálogo del catálogo).
+        """
+        from app.ai.learned_verdicts import promote_cached_verdicts
+        from app.ai.verdict_cache import DEFAULT_CACHE_NAME, VerdictCache
+        from app.engine.catalog import save_catalog
+
+        cache_path = Path(self.catalog_path).with_name(DEFAULT_CACHE_NAME)
+        if not cache_path.exists():
+            warn(self, "Veredictos aprendidos", "Todavía no hay veredictos de IA en caché.")
+            return
+        cache = VerdictCache(str(cache_path))
+        try:
+            # solo veredictos del deployment configurado (y del prompt actual)
+            deployment = os.getenv("AZURE_FOUNDRY_MODEL", "").strip() or None
+            catalog, report = promote_cached_verdicts(cache, self.catalog, deployment=deployment)
+        finally:
+            cache.close()
+
+        if not report.changed:
+            info(self, "Veredictos aprendidos", f"No hay veredictos nuevos para promover.\n\n{report.text()}")
+            return
+        if not confirm(self, "Veredictos aprendidos",
+                       f"{report.text()}\n\n¿Guardar en el catálogo? "
+                       "Se aplican como reglas desde el próximo análisis."):
+            return
+        try:
+            save_catalog(catalog, self.catalog_path)
+        except Exception as e:
+            error(self, "Catálogo", f"No se pudo guardar el catálogo:\n{e}")
+            return
+        self.catalog = catalog
+        info(self, "Veredictos aprendidos",
+             f"{len(catalog.learned_verdicts)} veredictos en el catálogo. "
+             "Para revisarlos: Catálogo de reglas… (sección learned_verdicts, reviewed=true los fija).")
 
     def on_ai_failed(self, msg: str):
         self.btn_ai.setEnabled(True)
@@ -508,7 +1081,10 @@ class MainWindow(QMainWindow):
 
     def _reset_filters_and_paging(self):
         self._active_flag_filter = None
+        self._drill_rows = None
         self._search_text = ""
+        self._sort_column, self._sort_descending = None, False
+        self.table.horizontalHeader().setSortIndicatorShown(False)
         self.search_box.blockSignals(True)
         self.search_box.setText("")
         self.search_box.blockSignals(False)
@@ -520,6 +1096,8 @@ class MainWindow(QMainWindow):
             warn(self, "Aún no hay resultados", "Primero analiza el documento.")
             return
 
+        self._drill_rows = None  # salir del drill-down del resumen
+
         # toggle: si clickeas el mismo, lo quita
         if self._active_flag_filter == flag:
             self._active_flag_filter = None
@@ -539,7 +1117,7 @@ class MainWindow(QMainWindow):
     def on_search_changed(self, text: str):
         self._search_text = (text or "").strip()
         self.page_index = 0
-        self._recompute_view_and_render()
+        self._search_timer.start()  # reinicia la espera con cada tecla
 
     def on_clear_search(self):
         self.search_box.setText("")
@@ -565,98 +1143,135 @@ class MainWindow(QMainWindow):
             self._render_current_page()
 
     def _total_pages(self) -> int:
-        if self._view_df is None:
+        if self._view_rows is None:
             return 1
-        n = len(self._view_df)
+        n = len(self._view_rows)
         if n == 0:
             return 1
         return (n + self.page_size - 1) // self.page_size
 
     def _recompute_view_and_render(self):
         """
-        Aplica:
-        1) filtro por flag
-        2) búsqueda por texto
-        y luego renderiza página 0.
+        Pide al SearchWorker la vista (1) filtro por flag + (2) búsqueda por texto.
+        El resultado llega como row-ids en _on_view_rows; pedidos anteriores quedan obsoletos.
         """
         if self.df_result is None:
             return
 
-        base = self.df_result
-
-        # 1) filtro flag
-        f = self._active_flag_filter
-        if f == "OK":
-            base = base[base["flag"] == "OK"]
-        elif f == "POSSIBLE_WARN":
-            base = base[base["flag"] == "POSSIBLE_WARN"]
-        elif f == "DIRECT_WARN":
-            base = base[base["flag"] == "DIRECT_WARN"]
-        elif f == "WARNINGS":
-            base = base[base["flag"].isin(["DIRECT_WARN", "POSSIBLE_WARN"])]
-        elif f == "ALL" or f is None:
-            base = base
-
-        # 2) búsqueda
-        q = self._search_text.lower().strip()
-        if q:
-            cols_to_search = []
-            # si IA añadió columnas, también las buscamos
-            for c in ["merchant", "employee", "description", "mcc", "amount", "date", "ai_category", "ai_reason", "ai_web_evidence"]:
-                if c in base.columns:
-                    cols_to_search.append(c)
-
-            if cols_to_search:
-                hay = base[cols_to_search].astype(str).agg(" | ".join, axis=1).str.lower()
-                base = base[hay.str.contains(q, na=False)]
-
-        self._view_df = base.reset_index(drop=True)
+        self._ensure_search_thread()
+        self._search_timer.stop()
+        self._search_gen += 1
+        self._search_worker.supersede(self._search_gen)
+        self.search_requested.emit(
+            self._search_gen, self._active_flag_filter, self._search_text,
+            self._sort_column, self._sort_descending, self._drill_rows,
+        )
+
+    def _on_header_clicked(self, section: int):
+        """
+        Click en header: ascendente -> descendente -> sin orden. Se compone con filtro y búsqueda.
+        """
+        if self.df_result is None or self.table_model.frame is not self.df_result:
+            return
+        column = str(self.df_result.columns[section])
+        if self._sort_column != column:
+            self._sort_column, self._sort_descending = column, False
+        elif not self._sort_descending:
+            self._sort_descending = True
+        else:
+            self._sort_column, self._sort_descending = None, False
+        self._update_sort_indicator()
+        self.page_index = 0
+        self._recompute_view_and_render()
+
+    def _update_sort_indicator(self):
+        header = self.table.horizontalHeader()
+        if self._sort_column is None or self.df_result is None or self._sort_column not in self.df_result.columns:
+            header.setSortIndicatorShown(False)
+            return
+        order = Qt.DescendingOrder if self._sort_descending else Qt.AscendingOrder
+        header.setSortIndicator(self.df_result.columns.get_loc(self._sort_column), order)
+        header.setSortIndicatorShown(True)
+
+    def _on_view_rows(self, generation: int, rows: np.ndarray):
+        if generation != self._search_gen or self.df_result is None:
+            return  # respuesta de una búsqueda ya reemplazada
+
+        self._view_rows = rows
         self.page_index = min(self.page_index, max(0, self._total_pages() - 1))
+        if self.table_model.frame is self.df_result:
+            self.table_model.set_rows(rows)
+        else:
+            self.table_model.set_frame(self.df_result, row_ids=rows, show_flag_colors=True)
+            self.table.resizeColumnsToContents()
+            self._update_sort_indicator()
         self._render_current_page()
 
     def _render_current_page(self):
-        if self._view_df is None:
+        """
+        La tabla es virtual (scroll sobre toda la vista): "página" = saltar a su primera fila.
+        """
+        if self._view_rows is None:
             return
 
-        total = len(self._view_df)
+        start = self.page_index * self.page_size
+        if len(self._view_rows):
+            self.table.scrollTo(self.table_model.index(start, 0), QAbstractItemView.PositionAtTop)
+        self._update_page_label()
+
+    def _update_page_label(self):
+        total = len(self._view_rows) if self._view_rows is not None else 0
         total_pages = self._total_pages()
 
         if total == 0:
             self.page_lbl.setText("Página: 0/0 (0 filas)")
-            self._render_table(self._view_df, show_flag_colors=True, page_slice=(0, 0))
+            self.btn_prev.setEnabled(False)
+            self.btn_next.setEnabled(False)
             return
 
         start = self.page_index * self.page_size
         end = min(start + self.page_size, total)
-
         self.page_lbl.setText(f"Página: {self.page_index + 1}/{total_pages}  (filas {start+1}-{end} de {total})")
-        self._render_table(self._view_df, show_flag_colors=True, page_slice=(start, end))
 
         # habilitar/deshabilitar botones prev/next
         self.btn_prev.setEnabled(self.page_index > 0)
         self.btn_next.setEnabled(self.page_index + 1 < total_pages)
 
+    def _on_table_scrolled(self, _value: int):
+        # Scroll manual: la "página" sigue a la primera fila visible
+        if self._view_rows is None or not len(self._view_rows):
+            return
+        top = max(self.table.rowAt(0), 0)
+        page = min(top // self.page_size, self._total_pages() - 1)
+        if page != self.page_index:
+            self.page_index = page
+            self._update_page_label()
+
     # ---------------------------
     # Export
     # ---------------------------
 
     def on_export_excel(self):
+        from app.data.export import export_to_excel
+
         if self.df_result is None:
             return
         path, _ = QFileDialog.getSaveFileName(self, "Guardar Excel", "results.xlsx", "Excel (*.xlsx)")
         if not path:
             return
         export_to_excel(self.df_result, path)
-        info(self, "Exportado", f"Archivo generado:\n{path}")
+        info(self, "Exportado", f"Archivo generado:\n{path}{self._export_ai_report(path)}")
 
     def on_export_csv(self):
+        from app.data.export import export_to_csv
+
         if self.df_result is None:
             return
         path, _ = QFileDialog.getSaveFileName(self, "Guardar CSV", "results.csv", "CSV (*.csv)")
         if not path:
             return
         export_to_csv(self.df_result, path)
-        info(self, "Exportado", f"Archivo generado:\n{path}")
+        info(self, "Exportado", f"Archivo generado:\n{path}{self._export_ai_report(path)}")
 
     # ---------------------------
     # Counters + Rendering
@@ -667,8 +1282,9 @@ class MainWindow(QMainWindow):
         self.btn_possible.setText("POSSIBLE_WARN: 0")
         self.btn_direct.setText("DIRECT_WARN: 0")
 
-    def _update_counts(self, df: pd.DataFrame):
-        counts = df["flag"].value_counts(dropna=False).to_dict()
+    def _update_counts(self, counts: dict[str, int] | None = None):
+        if counts is None:
+            counts = self._result_store.counts() if self._result_store is not None else {}
         ok = int(counts.get("OK", 0))
         poss = int(counts.get("POSSIBLE_WARN", 0))
         direct = int(counts.get("DIRECT_WARN", 0))
@@ -677,58 +1293,13 @@ class MainWindow(QMainWindow):
         self.btn_possible.setText(f"POSSIBLE_WARN: {poss}")
         self.btn_direct.setText(f"DIRECT_WARN: {direct}")
 
-    def _render_table(self, df: pd.DataFrame, show_flag_colors: bool, page_slice: tuple[int, int] | None = None):
+    def _render_table(self, df: pd.DataFrame, show_flag_colors: bool):
         """
-        Renderiza:
-        - si page_slice = (start,end) => muestra esa página
-        - si no => muestra df completo (usar con df pequeño)
+        Apunta el modelo virtual al df: O(columnas), no O(celdas).
+        El color de fila sale del flag en data() (sin copiar el df).
         """
-        if page_slice is not None:
-            start, end = page_slice
-            view = df.iloc[start:end].copy()
-        else:
-            view = df.copy()
-
-        self.table.setSortingEnabled(False)
-        self.table.setUpdatesEnabled(False)
-        self.table.clear()
-
-        self.table.setRowCount(len(view))
-        self.table.setColumnCount(len(view.columns))
-        self.table.setHorizontalHeaderLabels([str(c) for c in view.columns])
-
-        flag_col_idx = None
-        if show_flag_colors:
-            for idx, col in enumerate(view.columns):
-                if str(col).lower() == "flag":
-                    flag_col_idx = idx
-                    break
-
-        def row_color(flag: str | None) -> QColor | None:
-            if flag == "DIRECT_WARN":
-                return QColor("#7f1d1d")
-            if flag == "POSSIBLE_WARN":
-                return QColor("#7c2d12")
-            if flag == "OK":
-                return QColor("#14532d")
-            return None
-
-        for r in range(len(view)):
-            flag_val = None
-            if show_flag_colors and flag_col_idx is not None:
-                flag_val = str(view.iloc[r, flag_col_idx])
-            bg = row_color(flag_val)
-
-            for c in range(len(view.columns)):
-                val = view.iat[r, c]
-                item = QTableWidgetItem("" if pd.isna(val) else str(val))
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                if bg is not None:
-                    item.setBackground(bg)
-                self.table.setItem(r, c, item)
-
-        self.table.resizeColumnsToContents()
-        self.table.setUpdatesEnabled(True)
+        self.table_model.set_frame(df, show_flag_colors=show_flag_colors)
+        self.table.resizeColumnsToContents()  # QTableView solo mide las filas visibles
 
     def closeEvent(self, event: QCloseEvent):
         """
@@ -737,7 +1308,7 @@ class MainWindow(QMainWindow):
         """
         try:
             # --- IA thread
-            if self._ai_thread and self._ai_thread.isRunning():
+            if _is_running(self._ai_thread):
                 if self._ai_worker:
                     # pide cancelación al worker (no bloquea)
                     if hasattr(self._ai_worker, "cancel"):
@@ -747,8 +1318,26 @@ class MainWindow(QMainWindow):
                 self._ai_thread.quit()
                 self._ai_thread.wait(5000)  # espera hasta 5s
 
+            # --- Batch ingest thread: las hojas en cola se cancelan, las que corren terminan
+            if _is_running(self._batch_thread):
+                if self._batch_worker:
+                    self._batch_worker.cancel()
+                self._batch_thread.quit()
+                self._batch_thread.wait(5000)
+
+            # --- Lectura por chunks (no cancelable: espera a que termine)
+            if _is_running(self._load_thread):
+                self._load_thread.quit()
+                self._load_thread.wait(5000)
+
+            # --- Search thread (persistente): corta el scan en curso y termina
+            if _is_running(self._search_thread):
+                self._invalidate_view()
+                self._search_thread.quit()
+                self._search_thread.wait(5000)
+
             # --- Processing thread (reglas)
-            if self._thread and self._thread.isRunning():
+            if _is_running(self._thread):
                 if self._worker and hasattr(self._worker, "cancel"):
                     self._worker.cancel()
                 self._thread.quit()
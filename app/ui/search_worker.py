@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import traceback
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Signal, Slot
+
+from app.engine.result_store import ResultStore
+from app.engine.search_index import SEARCH_COLUMNS, SearchIndex
+
+
+class SearchWorker(QObject):
+    """
+    Vive en un QThread persistente: construye el índice de búsqueda y resuelve
+    filtro de flag + búsqueda + orden fuera del hilo de la UI.
+    Cada pedido lleva una generación; si la UI ya pidió otra más nueva
+    (supersede), el pedido viejo se descarta o se corta a mitad del scan.
+    """
+    index_ready = Signal()
+    result = Signal(int, object)  # (generación, row-ids np.ndarray)
+    failed = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._df: pd.DataFrame | None = None
+        self._store: ResultStore | None = None
+        self._index: SearchIndex | None = None
+        self._latest = 0
+
+    def supersede(self, generation: int) -> None:
+        """
+        Llamado desde el hilo de la UI (asignación atómica): marca como obsoletos
+        los pedidos con generación menor.
+        """
+        self._latest = generation
+
+    def _stale(self, generation: int) -> bool:
+        return generation < self._latest
+
+    @Slot(object, object)
+    def set_frame(self, df: pd.DataFrame, store: ResultStore) -> None:
+        """
+        Cambia el dataset (resultado nuevo o enriquecido por IA). El índice se arma
+        después con build_index, así la primera vista (sin texto) no lo espera.
+        """
+        self._df = df
+        self._store = store
+        self._index = None
+
+    @Slot(object, object)
+    def update_frame(self, df: pd.DataFrame, rows: np.ndarray) -> None:
+        """
+        Mismo resultado con columnas ai_* nuevas para `rows`: no se rearma el índice,
+        solo se le agrega el texto de esas filas.
+        """
+        from app.ai.ai_explainer import AI_COLUMNS
+
+        self._df = df
+        if self._store is not None:
+            self._store.forget_orders(AI_COLUMNS)
+        if self._index is not None:
+            try:
+                self._index.add_rows(df, rows, [c for c in SEARCH_COLUMNS if c in AI_COLUMNS])
+            except Exception as e:
+                self.failed.emit(f"{e}\n\n{traceback.format_exc()}")
+
+    @Slot()
+    def build_index(self) -> None:
+        if self._df is None or self._index is not None:
+            return
+        try:
+            self._index = SearchIndex(self._df)
+            self.index_ready.emit()
+        except Exception as e:
+            self.failed.emit(f"{e}\n\n{traceback.format_exc()}")
+
+    @Slot(int, object, str, object, bool, object)
+    def search(
+        self,
+        generation: int,
+        flag_filter: str | None,
+        query: str,
+        sort_column: str | None = None,
+        descending: bool = False,
+        restrict: np.ndarray | None = None,
+    ) -> None:
+        if self._stale(generation) or self._df is None:
+            return
+        try:
+            hits = None
+            q = (query or "").strip()
+            if q:
+                if self._index is None:
+                    self._index = SearchIndex(self._df)
+                hits = self._index.search(q, cancelled=lambda: self._stale(generation))
+                if hits is None:
+                    return
+
+            rows = self._store.view(flag_filter, hits, restrict)
+            if sort_column and sort_column in self._df.columns:
+                rows = self._store.sorted_view(rows, sort_column, self._df[sort_column], descending)
+            if not self._stale(generation):
+                self.result.emit(generation, rows)
+        except Exception as e:
+            self.failed.emit(f"{e}\n\n{traceback.format_exc()}")
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QComboBox, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget, QHeaderView
+
+if TYPE_CHECKING:
+    from app.engine.summary import SummaryCube
+
+# (título, flag, métrica) — orden de columnas del pivot; la columna 0 (Grupo) = todos los flags
+_COLUMNS = [
+    ("DIRECT", "DIRECT_WARN", "n"),
+    ("DIRECT $", "DIRECT_WARN", "amount"),
+    ("POSSIBLE", "POSSIBLE_WARN", "n"),
+    ("POSSIBLE $", "POSSIBLE_WARN", "amount"),
+    ("OK", "OK", "n"),
+]
+
+
+class SummaryPanel(QWidget):
+    """
+    Pivots de warnings (empleado / categoría / MCC). Click en una celda = drill-down:
+    emite los row-ids del grupo (y del flag de esa columna) para filtrar la tabla principal.
+    """
+    drill_requested = Signal(object, str)  # (row-ids, descripción para el label de filtro)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cube: SummaryCube | None = None
+        self._group_codes: list[int] = []
+
+        layout = QVBoxLayout(self)
+        self.dim_combo = QComboBox()
+        self.dim_combo.currentIndexChanged.connect(self.refresh)
+        layout.addWidget(QLabel("Agrupar por:"))
+        layout.addWidget(self.dim_combo)
+
+        self.table = QTableWidget(0, len(_COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(["Grupo"] + [c[0] for c in _COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectItems)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.cellClicked.connect(self._on_cell_clicked)
+        layout.addWidget(self.table, 1)
+
+        self.hint_lbl = QLabel("Click en una celda: filtra la tabla por ese grupo / flag.")
+        self.hint_lbl.setWordWrap(True)
+        layout.addWidget(self.hint_lbl)
+
+    def set_cube(self, cube: SummaryCube | None):
+        from app.engine.summary import SUMMARY_DIMENSIONS
+
+        self._cube = cube
+        current = self.dim_combo.currentData()
+        self.dim_combo.blockSignals(True)
+        self.dim_combo.clear()
+        for dim in (cube.dimensions if cube is not None else []):
+            self.dim_combo.addItem(SUMMARY_DIMENSIONS[dim], dim)
+        idx = self.dim_combo.findData(current)
+        self.dim_combo.setCurrentIndex(max(idx, 0))
+        self.dim_combo.blockSignals(False)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-dibuja el pivot de la dimensión elegida (pocas filas: top por warnings).
+        """
+        from app.ui.table_model import FLAG_ORDER, FLAG_COLORS
+
+        dim = self.dim_combo.currentData()
+        if self._cube is None or dim is None:
+            self.table.setRowCount(0)
+            self._group_codes = []
+            return
+
+        t = self._cube.table(dim)
+        self._group_codes = [int(c) for c in t["group_code"]]
+        self.table.setRowCount(len(t))
+        for r, row in enumerate(t.itertuples(index=False)):
+            values = row._asdict()
+            self.table.setItem(r, 0, QTableWidgetItem(str(values["group"])))
+            for c, (_, flag, metric) in enumerate(_COLUMNS, start=1):
+                v = values[f"{metric}_{flag}"]
+                item = QTableWidgetItem(f"{v:,.2f}" if metric == "amount" else f"{int(v)}")
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if v and flag != "OK":
+                    item.setBackground(FLAG_COLORS[FLAG_ORDER.index(flag)])
+                self.table.setItem(r, c, item)
+        self.table.resizeColumnsToContents()
+
+    def _on_cell_clicked(self, row: int, column: int):
+        if self._cube is None or row >= len(self._group_codes):
+            return
+        dim = self.dim_combo.currentData()
+        flag = _COLUMNS[column - 1][1] if column > 0 else None
+        group = self.table.item(row, 0).text()
+        rows = self._cube.rows_for(dim, self._group_codes[row], flag)
+        label = f"{self.dim_combo.currentText()} = {group}" + (f" ({flag})" if flag else "")
+        self.drill_requested.emit(rows, label)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor
+
+from app.data.schema import MCC_WIDTH
+
+# Orden = código de flag usado por el modelo (-1 = sin flag / sin color)
+FLAG_ORDER = ["OK", "POSSIBLE_WARN", "DIRECT_WARN"]
+FLAG_COLORS = [QColor("#14532d"), QColor("#7c2d12"), QColor("#7f1d1d")]
+
+
+def flag_codes(flags: pd.Series) -> np.ndarray:
+    """
+    flag (texto o categorical) -> int8: 0=OK, 1=POSSIBLE_WARN, 2=DIRECT_WARN, -1=otro.
+    """
+    return pd.Categorical(flags.astype(str), categories=FLAG_ORDER).codes.astype(np.int8)
+
+
+class _Column:
+    """
+    Acceso a una columna por posición sin materializar strings:
+    categoricals via códigos, MCC compacto re-rellenado, fechas como Timestamp.
+    """
+
+    def __init__(self, s: pd.Series):
+        self.categories = None
+        self.zfill = 0
+        self.is_datetime = pd.api.types.is_datetime64_any_dtype(s)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            self.values = s.cat.codes.to_numpy()
+            self.categories = s.cat.categories.to_numpy()
+        else:
+            self.values = s.to_numpy()
+            if s.name == "mcc" and pd.api.types.is_integer_dtype(s):
+                self.zfill = MCC_WIDTH
+
+    def text(self, row: int) -> str:
+        v = self.values[row]
+        if self.categories is not None:
+            return "" if v < 0 else str(self.categories[v])
+        if self.zfill:
+            return str(v).zfill(self.zfill)
+        if self.is_datetime:
+            return "" if pd.isna(v) else str(pd.Timestamp(v))
+        return "" if pd.isna(v) else str(v)
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Modelo virtual sobre un DataFrame: Qt solo pide las celdas visibles,
+    así que el costo de pintar/scrollear no depende del total de filas.
+    row_ids (opcional) = posiciones del df que forman la vista (filtros/búsqueda).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._frame: pd.DataFrame | None = None
+        self._columns: list[str] = []
+        self._data: list[_Column] = []
+        self._rows: np.ndarray | None = None
+        self._n = 0
+        self._flags: np.ndarray | None = None
+
+    def set_frame(self, df: pd.DataFrame | None, row_ids: np.ndarray | None = None, show_flag_colors: bool = True):
+        self.beginResetModel()
+        self._frame = df
+        if df is None:
+            self._columns, self._data, self._flags, self._n = [], [], None, 0
+        else:
+            self._columns = [str(c) for c in df.columns]
+            self._data = [_Column(df.iloc[:, i]) for i in range(df.shape[1])]
+            self._n = len(df)
+            self._flags = flag_codes(df["flag"]) if show_flag_colors and "flag" in df.columns else None
+        self._rows = row_ids
+        self.endResetModel()
+
+    def update_columns(self, df: pd.DataFrame, columns: list[str], changed_rows: np.ndarray):
+        """
+        df = el mismo resultado con algunas columnas nuevas o actualizadas (p.ej. ai_*):
+        solo esas se vuelven a leer, y solo se repintan las filas de la vista que cambiaron.
+        """
+        self._frame = df
+        new = [c for c in columns if c in df.columns and c not in self._columns]
+        if new:
+            first = len(self._columns)
+            self.beginInsertColumns(QModelIndex(), first, first + len(new) - 1)
+            self._columns += new
+            self._data += [_Column(df[c]) for c in new]
+            self.endInsertColumns()
+        for c in columns:
+            if c in df.columns and c not in new:
+                self._data[self._columns.index(c)] = _Column(df[c])
+
+        if not len(changed_rows) or not columns:
+            return
+        if self._rows is None:
+            view_pos = changed_rows
+        else:
+            view_pos = np.flatnonzero(np.isin(self._rows, changed_rows))
+            if not len(view_pos):
+                return
+        # un dataChanged por tramo de columnas contiguas: las del medio no se repintan
+        cols = np.unique([self._columns.index(c) for c in columns if c in self._columns])
+        top, bottom = int(view_pos.min()), int(view_pos.max())
+        for run in np.split(cols, np.flatnonzero(np.diff(cols) > 1) + 1):
+            self.dataChanged.emit(self.index(top, int(run[0])), self.index(bottom, int(run[-1])), [Qt.DisplayRole])
+
+    @property
+    def frame(self) -> pd.DataFrame | None:
+        return self._frame
+
+    def set_rows(self, row_ids: np.ndarray | None):
+        """
+        Cambia solo la vista (filtro/búsqueda) sin reconstruir las columnas.
+        """
+        self.beginResetModel()
+        self._rows = row_ids
+        self.endResetModel()
+
+    def source_row(self, view_row: int) -> int:
+        return int(self._rows[view_row]) if self._rows is not None else view_row
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._rows is not None else self._n
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.source_row(index.row())
+        if role == Qt.DisplayRole:
+            return self._data[index.column()].text(row)
+        if role == Qt.BackgroundRole and self._flags is not None:
+            code = self._flags[row]
+            return FLAG_COLORS[code] if code >= 0 else None
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
@@ -1,20 +1,24 @@
 from __future__ import annotations
+import time
 from PySide6.QtCore import QObject, Signal, Slot
 import pandas as pd
-from app.engine.rules import apply_rules
+from app.engine.chunking import AdaptiveChunker
+from app.engine.rules import apply_rules, evaluate_rules
 from app.core.models import Catalog
 
 class ProcessingWorker(QObject):
     progress = Signal(int)
     status = Signal(str)
+    partial = Signal(int, object)  # (fila inicial, flag/reasons del chunk) apenas termina cada chunk
     finished = Signal(pd.DataFrame)
     failed = Signal(str)
 
-    def __init__(self, df: pd.DataFrame, catalog: Catalog, chunk_size: int = 5000):
+    def __init__(self, df: pd.DataFrame, catalog: Catalog, chunk_size: int = 5000, adaptive: bool = True):
         super().__init__()
         self.df = df
         self.catalog = catalog
-        self.chunk_size = chunk_size
+        self.chunk_size = chunk_size  # tamaño inicial; con adaptive se ajusta a ~150 ms por chunk
+        self.adaptive = adaptive
         self._cancel = False
 
     @Slot()
@@ -22,22 +26,33 @@ class ProcessingWorker(QObject):
         try:
             n = len(self.df)
             if n == 0:
-                self.finished.emit(self.df.copy())
+                self.finished.emit(apply_rules(self.df, self.catalog))
                 return
 
             self.status.emit("Procesando reglas...")
+            # Cada chunk devuelve solo flag/reasons; el dataset limpio no se copia
             results = []
-            for i in range(0, n, self.chunk_size):
+            chunker = AdaptiveChunker(initial=self.chunk_size) if self.adaptive else None
+            i = 0
+            while i < n:
                 if self._cancel:
                     self.failed.emit("Proceso cancelado por el usuario.")
                     return
-                chunk = self.df.iloc[i:i + self.chunk_size]
-                results.append(apply_rules(chunk, self.catalog))
-
-                pct = int(((i + len(chunk)) / n) * 100)
+                size = chunker.next_size() if chunker else self.chunk_size
+                chunk = self.df.iloc[i:i + size]
+                t0 = time.perf_counter()
+                res = evaluate_rules(chunk, self.catalog)
+                if chunker:
+                    chunker.record(len(chunk), time.perf_counter() - t0)
+                results.append(res)
+                self.partial.emit(i, res)
+
+                i += len(chunk)
+                pct = int((i / n) * 100)
                 self.progress.emit(min(pct, 100))
 
-            result_df = pd.concat(results, ignore_index=True)
+            flags = pd.concat(results)
+            result_df = self.df.assign(flag=flags["flag"], reasons=flags["reasons"]).reset_index(drop=True)
             self.status.emit("Listo.")
             self.finished.emit(result_df)
 
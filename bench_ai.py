@@ -0,0 +1,151 @@
+"""
+Benchmark offline de la pasada de IA contra mock_azure_server (no usa Azure real):
+
+    python bench_ai.py                      # escenarios por defecto
+    python bench_ai.py --rows 2000 --latency-ms 800 --rpm 300
+
+Mide, por escenario: tiempo total, transacciones/s, latencia por request (p50/p95/p99,
+de la telemetría de la pasada), requests que llegaron al servidor, 429 / 500 recibidos,
+reintentos, tokens, costo estimado y aciertos de caché.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.pandas_options import enable_copy_on_write
+from mock_azure_server import MockAzureServer, MockConfig
+
+
+def make_dataset(rows: int, merchants: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Transacciones sintéticas que pasan should_send_to_ai: merchants repetidos (para dedupe),
+    montos log-normales y mezcla de DIRECT / POSSIBLE.
+    """
+    rng = np.random.default_rng(seed)
+    kinds = ["Casino", "Cafe", "Estadio", "Netflix", "Grill", "Tienda", "Hotel", "Bar"]
+    names = [f"{kinds[i % len(kinds)]} {i:04d}" for i in range(merchants)]
+    mccs = ["5812", "7995", "7941", "5815", "7011"]
+    pick = rng.integers(0, merchants, rows)
+    return pd.DataFrame({
+        "merchant": [names[i] for i in pick],
+        "description": [f"COMPRA {names[i].upper()}" for i in pick],
+        "mcc": [mccs[i % len(mccs)] for i in pick],
+        "amount": np.round(rng.lognormal(4, 1.2, rows), 2),
+        "date": pd.Timestamp("2024-05-01"),
+        "flag": rng.choice(["DIRECT_WARN", "POSSIBLE_WARN"], rows, p=[0.4, 0.6]),
+        "reasons": "bench",
+    })
+
+
+def ms(report: dict, key: str) -> str:
+    v = report.get(key)
+    return f"{v * 1000:7.0f}" if v is not None else "      -"
+
+
+def run_scenario(name, server, df, concurrency, batch_size, max_calls, cache=None, via_worker=False, rpm=0):
+    from app.ai.ai_explainer import apply_ai_explanations
+    from app.ai.concurrency import AIConcurrencyConfig
+    from app.ai.scheduler import AIBudget
+    from app.ai.telemetry import AITelemetry
+
+    server.reset_stats()
+    config = AIConcurrencyConfig(concurrency=concurrency, batch_size=batch_size, rpm=rpm, backoff_base=0.5)
+    budget = AIBudget(max_calls=max_calls)
+    telemetry = AITelemetry()
+    t = time.perf_counter()
+    if via_worker:
+        out, report = _run_worker(df, max_calls, concurrency, batch_size)
+    else:
+        out = apply_ai_explanations(df, config=config, cache=cache, budget=budget, telemetry=telemetry)
+        report = telemetry.report()
+    elapsed = time.perf_counter() - t
+
+    evaluated = int((out["ai_category"] != "").sum())
+    s = server.stats
+    hits = f"{cache.hits}/{cache.hits + cache.misses}" if cache is not None else "-"
+    print(
+        f"{name:<28} {elapsed:7.2f} s {evaluated / elapsed:8.1f} tx/s "
+        f"{ms(report, 'latency_p50_s')} {ms(report, 'latency_p95_s')} {ms(report, 'latency_p99_s')} ms "
+        f"{s.requests:6d} req {s.status.get(429, 0):5d} x429 {s.status.get(500, 0):4d} x500 "
+        f"{report['retries']:4d} reint. {report['prompt_tokens'] + report['completion_tokens']:8d} tok "
+        f"US$ {report['estimated_cost_usd']:.4f}  caché {hits}"
+    )
+    return out
+
+
+def _run_worker(df: pd.DataFrame, max_calls: int, concurrency: int, batch_size: int) -> tuple[pd.DataFrame, dict]:
+    """
+    Corre el AIWorker de la UI en este thread (conexiones directas, sin event loop).
+    """
+    from app.ui.ai_worker import AIWorker
+
+    os.environ["AZURE_FOUNDRY_CONCURRENCY"] = str(concurrency)
+    os.environ["AZURE_FOUNDRY_BATCH_SIZE"] = str(batch_size)
+    worker = AIWorker(df, max_calls=max_calls)
+    result: dict[str, object] = {}
+    worker.finished.connect(lambda verdicts: result.setdefault("out", verdicts.assign_to(df)))
+    worker.failed.connect(lambda msg: result.setdefault("error", msg))
+    worker.report.connect(lambda report: result.setdefault("report", report))
+    worker.run()
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result["out"], result["report"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark offline de la pasada de IA (mock de Azure).")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--merchants", type=int, default=300)
+    parser.add_argument("--max-calls", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--rpm", type=int, default=600, help="límite del mock en los escenarios de throttling")
+    args = parser.parse_args()
+    enable_copy_on_write()  # igual que app/main.py
+
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 3, error_rate=args.error_rate)
+    with MockAzureServer(config) as server:
+        os.environ.update({
+            "AZURE_FOUNDRY_ENDPOINT": server.endpoint,
+            "AZURE_FOUNDRY_API_KEY": "mock",
+            "AZURE_FOUNDRY_MODEL": "mock-gpt",
+        })
+        df = make_dataset(args.rows, args.merchants)
+        print(f"dataset: {len(df)} filas, {df['merchant'].nunique()} merchants | mock: {server.endpoint}, "
+              f"latencia {args.latency_ms:.0f} ms, error {args.error_rate:.0%}")
+        print(f"{'escenario':<28} {'total':>9} {'throughput':>13} {'p50':>7} {'p95':>7} {'p99':>7}")
+
+        run_scenario("secuencial (1 x 1)", server, df, 1, 1, args.max_calls)
+        run_scenario("concurrente (8 x 1)", server, df, 8, 1, args.max_calls)
+        run_scenario("batch (4 x 20)", server, df, 4, 20, args.max_calls)
+        run_scenario("AIWorker UI (4 x 20)", server, df, 4, 20, args.max_calls, via_worker=True)
+
+        server.config.drop_rate = 0.1
+        run_scenario("batch con 10% items perdidos", server, df, 4, 20, args.max_calls)
+        server.config.drop_rate = 0.0
+
+        # 429 reactivo (Retry-After + jitter) vs. limitador propio con la cuota conocida
+        server.config.rpm = args.rpm
+        run_scenario(f"mock {args.rpm} rpm, sin limitador", server, df, 8, 1, args.max_calls)
+        run_scenario(f"mock {args.rpm} rpm, limitador", server, df, 8, 1, args.max_calls, rpm=args.rpm)
+        server.config.rpm = 0
+
+        from app.ai.verdict_cache import VerdictCache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "bench.sqlite")
+            for label in ("caché fría (4 x 20)", "caché caliente (4 x 20)"):
+                cache = VerdictCache(path)
+                run_scenario(label, server, df, 4, 20, args.max_calls, cache=cache)
+                cache.close()
+
+
+if __name__ == "__main__":
+    main()
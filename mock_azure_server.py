@@ -0,0 +1,281 @@
+"""
+Servidor local que imita el endpoint de chat completions de Azure OpenAI, para probar
+la pasada de IA sin gastar cuota:
+
+    python mock_azure_server.py --port 8765 --latency-ms 800 --rpm 120 --error-rate 0.02
+
+y en .env (o el entorno):
+
+    AZURE_FOUNDRY_ENDPOINT=http://127.0.0.1:8765
+    AZURE_FOUNDRY_API_KEY=mock
+    AZURE_FOUNDRY_MODEL=mock-gpt
+
+Veredictos deterministas (mismo merchant -> mismo resultado), latencia configurable,
+errores 500 aleatorios y 429 con Retry-After al pasar el límite de requests/min
+(como Azure, el límite se aplica en ventanas de 10 s: rpm / 6 requests por ventana).
+Entiende el modo individual (DATA: {...}) y el batch (DATA: [{id, ...}, ...]).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+# (palabras clave, severity, category) — primera que aparezca en merchant / descripción gana
+CANNED_RULES = [
+    (("casino", "bet", "apuesta", "poker"), "DIRECT_WARN", "Apuestas"),
+    (("netflix", "spotify", "steam", "xbox", "playstation"), "DIRECT_WARN", "Bienes Digitales"),
+    (("stadium", "estadio", "ticket", "jersey"), "DIRECT_WARN", "Deportes"),
+    (("cafe", "coffee", "starbucks", "restaurant", "diner", "bar", "grill"), "OK", "Alimentación"),
+    (("hotel", "airline", "uber", "taxi"), "OK", "Viajes"),
+]
+FALLBACK = [("OK", "General"), ("POSSIBLE_WARN", "Revisar"), ("DIRECT_WARN", "No permitido")]
+
+
+def canned_verdict(item: dict[str, Any]) -> dict[str, str]:
+    text = f"{item.get('merchant', '')} {item.get('description', '')}".lower()
+    for words, severity, category in CANNED_RULES:
+        if any(w in text for w in words):
+            return {"category": category, "severity": severity, "reason": f"mock: coincide '{category}'"}
+    h = int(hashlib.sha1(str(item.get("merchant", "")).lower().encode("utf-8")).hexdigest(), 16)
+    severity, category = FALLBACK[h % len(FALLBACK)]
+    return {"category": category, "severity": severity, "reason": "mock: veredicto por hash del merchant"}
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 300.0      # latencia base por request
+    per_item_ms: float = 40.0      # extra por item en requests batch (generación más larga)
+    jitter_ms: float = 100.0       # desvío (gaussiano, truncado en 0)
+    error_rate: float = 0.0        # fracción de requests que responden 500
+    rpm: int = 0                   # límite de requests por minuto (0 = sin límite) -> 429
+    window_s: float = 10.0         # ventana en la que se evalúa el límite
+    drop_rate: float = 0.0         # fracción de items que se "olvidan" en respuestas batch
+    seed: int = 0
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    items: int = 0
+    status: Counter = field(default_factory=Counter)
+    latencies: list[float] = field(default_factory=list)
+
+
+class MockAzureServer:
+    """
+    Servidor en un thread propio: `with MockAzureServer(config) as srv: srv.endpoint`.
+    """
+
+    def __init__(self, config: MockConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._window: deque[float] = deque()
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> MockAzureServer:
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-azure", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> MockAzureServer:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = MockStats()
+            self._window.clear()
+
+    # --- lógica de cada request (se llama desde los threads del servidor) ---
+
+    def admit(self) -> tuple[int, float]:
+        """
+        (status, retry_after_s): 429 si se pasó el límite, 500 al azar, 200 si no.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.stats.requests += 1
+            if self.config.rpm > 0:
+                window = self.config.window_s
+                limit = max(1, round(self.config.rpm * window / 60.0))
+                while self._window and now - self._window[0] >= window:
+                    self._window.popleft()
+                if len(self._window) >= limit:
+                    return 429, window - (now - self._window[0])
+                self._window.append(now)
+            if self._rng.random() < self.config.error_rate:
+                return 500, 0.0
+            return 200, 0.0
+
+    def latency(self, items: int) -> float:
+        with self._lock:
+            jitter = self._rng.gauss(0.0, self.config.jitter_ms)
+        ms = self.config.latency_ms + self.config.per_item_ms * max(items - 1, 0) + jitter
+        return max(ms, 0.0) / 1000.0
+
+    def dropped(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.config.drop_rate
+
+    def record(self, status: int, items: int, seconds: float) -> None:
+        with self._lock:
+            self.stats.status[status] += 1
+            if status == 200:
+                self.stats.items += items
+                self.stats.latencies.append(seconds)
+
+
+def _parse_data(messages: list[dict[str, Any]]) -> Any:
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    pos = user.find("DATA:")
+    if pos == -1:
+        return {}
+    try:
+        return json.loads(user[pos + len("DATA:"):].strip())
+    except ValueError:
+        return {}
+
+
+def _make_handler(server: MockAzureServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:  # silencioso: el benchmark imprime su propio resumen
+            pass
+
+        def _send(self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self) -> None:
+            if self.path.startswith("/openai/deployments"):
+                self._send(200, {"data": [{"id": "mock-gpt", "model": "mock-gpt", "status": "succeeded"}]})
+            else:
+                self._send(404, {"error": {"code": "NotFound", "message": self.path}})
+
+        def do_POST(self) -> None:
+            t0 = time.perf_counter()
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": {"code": "BadRequest", "message": "JSON inválido"}})
+                return
+            if "/chat/completions" not in self.path:
+                self._send(404, {"error": {"code": "NotFound", "message": self.path}})
+                return
+
+            messages = body.get("messages") or []
+            data = _parse_data(messages)
+            items = len(data) if isinstance(data, list) else 1
+
+            status, retry_after = server.admit()
+            if status == 429:
+                server.record(429, items, time.perf_counter() - t0)
+                self._send(429, {"error": {"code": "429", "message": "Rate limit del mock"}}, {
+                    "retry-after-ms": str(int(retry_after * 1000)),
+                    "retry-after": str(max(1, round(retry_after))),
+                })
+                return
+
+            time.sleep(server.latency(items))
+            if status == 500:
+                server.record(500, items, time.perf_counter() - t0)
+                self._send(500, {"error": {"code": "InternalServerError", "message": "Error simulado"}})
+                return
+
+            if isinstance(data, list):
+                content = json.dumps({"results": [
+                    {"id": item.get("id"), **canned_verdict(item)} for item in data if not server.dropped()
+                ]}, ensure_ascii=False)
+            else:
+                content = json.dumps(canned_verdict(data), ensure_ascii=False)
+
+            prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+            completion_tokens = len(content) // 4
+            server.record(200, items, time.perf_counter() - t0)
+            self._send(200, {
+                "id": f"chatcmpl-mock-{server.stats.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock-gpt"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock local del endpoint de Azure OpenAI (chat completions).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--per-item-ms", type=float, default=MockConfig.per_item_ms)
+    parser.add_argument("--jitter-ms", type=float, default=MockConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--rpm", type=int, default=MockConfig.rpm)
+    parser.add_argument("--drop-rate", type=float, default=MockConfig.drop_rate)
+    parser.add_argument("--seed", type=int, default=MockConfig.seed)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        per_item_ms=args.per_item_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rpm=args.rpm,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    server = MockAzureServer(config, args.host, args.port)
+    print(f"Mock Azure escuchando en {server.endpoint} (Ctrl+C para salir)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        s = server.stats
+        print(f"requests: {s.requests} | items: {s.items} | status: {dict(s.status)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+from app.core.pandas_options import enable_copy_on_write
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Igual que app/main.py: el pipeline asume Copy-on-Write
+enable_copy_on_write()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
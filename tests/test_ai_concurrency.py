@@ -0,0 +1,70 @@
+import threading
+import time
+
+from app.ai.concurrency import AIConcurrencyConfig, TokenBucket, backoff_delay, run_concurrent
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    class response:
+        headers = {"retry-after-ms": "50"}
+
+
+def test_run_concurrent_overlaps_calls_and_retries_429():
+    calls: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def call(payload):
+        with lock:
+            calls[payload["i"]] = calls.get(payload["i"], 0) + 1
+            first = calls[payload["i"]] == 1
+        if payload["i"] == 3 and first:
+            raise _RateLimited()
+        time.sleep(0.05)
+        return payload["i"] * 10
+
+    results = []
+    config = AIConcurrencyConfig(concurrency=8, backoff_base=0.01)
+    t = time.perf_counter()
+    n = run_concurrent(((i, {"i": i}) for i in range(16)), call, lambda k, r: results.append((k, r)), config)
+    elapsed = time.perf_counter() - t
+
+    assert n == 16
+    assert sorted(results) == [(i, i * 10) for i in range(16)]
+    assert calls[3] == 2
+    assert elapsed < 0.5  # secuencial serían 16 x 0.05 = 0.8 s
+
+
+def test_token_bucket_and_backoff():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10/s
+    assert bucket.reserve(1) == 0 and bucket.reserve(1) == 0
+    assert abs(bucket.reserve(1) - 0.1) < 0.02  # tercer token: esperar ~1/10 s
+
+    assert backoff_delay(0, base=1.0, retry_after=5.0) >= 5.0
+    assert all(0 <= backoff_delay(10, base=1.0, cap=30.0) <= 30.0 for _ in range(50))
+
+
+def test_parse_json_items_recovers_truncated_batch_response():
+    from app.ai.azure_foundry_client import parse_json_items
+
+    text = '```json\n{"results": [{"id": "1", "severity": "OK"}, {"id": "2" ROTO}, {"id": "3", "reason": "x {y}"}, {"id": "4", "sev'
+    assert [d["id"] for d in parse_json_items(text)] == ["1", "3"]
+    assert [d["id"] for d in parse_json_items('[{"id": "a"}, {"id": "b"}]')] == ["a", "b"]
+
+
+def test_failed_call_is_reported_and_the_rest_still_arrive():
+    def call(payload):
+        if payload["i"] == 2:
+            raise ValueError("content filter")
+        return payload["i"]
+
+    results, errors = [], []
+    n = run_concurrent(
+        ((i, {"i": i}) for i in range(6)), call, lambda k, r: results.append(k), AIConcurrencyConfig(concurrency=3),
+        on_error=lambda k, e: errors.append((k, str(e))),
+    )
+
+    assert n == 5
+    assert sorted(results) == [0, 1, 3, 4, 5]
+    assert errors == [(2, "content filter")]
@@ -0,0 +1,141 @@
+import pandas as pd
+
+import app.ai.ai_explainer as ai_explainer
+from app.ai.azure_foundry_client import AIResult
+from app.ai.concurrency import AIConcurrencyConfig
+
+
+class _FakeClient:
+    model = "gpt-test"
+    payloads: list = []
+    batches: list = []
+
+    def __init__(self, max_retries=None):
+        pass
+
+    def evaluate_batch(self, rows):
+        _FakeClient.batches.append([r["id"] for r in rows])
+        # el modelo "se olvida" del último item de cada batch
+        return {str(r["id"]): AIResult(category=f"batch {r['merchant']}", severity="OK", reason="r") for r in rows[:-1]}
+
+    def evaluate_transaction(self, payload):
+        _FakeClient.payloads.append(payload)
+        return AIResult(category=f"cat {payload['merchant']}", severity="OK", reason="r")
+
+
+def test_duplicate_merchants_share_one_call_and_budget_counts_groups(monkeypatch):
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _FakeClient)
+    _FakeClient.payloads = []
+    df = pd.DataFrame({
+        "merchant": ["STARBUCKS #1234"] * 300 + ["starbucks  #1234"] + [f"Casino {i}" for i in range(5)],
+        "mcc": ["5814"] * 301 + ["7995"] * 5,
+        "description": [""] * 306,
+        "amount": range(306),
+        "flag": ["POSSIBLE_WARN"] * 306,
+    })
+
+    out = ai_explainer.apply_ai_explanations(df, max_calls=4, config=AIConcurrencyConfig(concurrency=2, batch_size=1))
+
+    assert len(_FakeClient.payloads) == 4  # 1 starbucks + 3 casinos (presupuesto = grupos)
+    assert (out["ai_category"].iloc[:301] == "cat STARBUCKS #1234").all()
+    assert (out["ai_category"].iloc[301:] != "").sum() == 3
+
+
+def test_batches_pack_groups_and_fall_back_to_single_requests(monkeypatch):
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _FakeClient)
+    _FakeClient.payloads, _FakeClient.batches = [], []
+    df = pd.DataFrame({"merchant": [f"Casino {i}" for i in range(25)], "flag": ["DIRECT_WARN"] * 25})
+
+    out = ai_explainer.apply_ai_explanations(df, config=AIConcurrencyConfig(concurrency=2, batch_size=10))
+
+    assert sorted(len(b) for b in _FakeClient.batches) == [5, 10, 10]
+    assert len(_FakeClient.payloads) == 3  # un item perdido por batch -> request individual
+    assert (out["ai_category"] != "").all()
+    assert (out["ai_category"].str.startswith("batch")).sum() == 22
+
+
+def test_budget_goes_to_highest_priority_and_rerun_resumes(monkeypatch):
+    from app.ai.scheduler import AIBudget
+
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _FakeClient)
+    _FakeClient.payloads = []
+    df = pd.DataFrame({
+        "merchant": ["Cafe Norte", "Bar Sur", "Estadio Centro"],
+        "amount": [5.0, 40.0, 9000.0],
+        "flag": ["POSSIBLE_WARN", "POSSIBLE_WARN", "DIRECT_WARN"],
+    })
+    config = AIConcurrencyConfig(concurrency=1, batch_size=1)
+
+    budget = AIBudget(max_calls=1)
+    out = ai_explainer.apply_ai_explanations(df, config=config, budget=budget)
+    assert [p["merchant"] for p in _FakeClient.payloads] == ["Estadio Centro"]
+    assert budget.spent_calls == 1 and budget.pending == 2
+
+    out = ai_explainer.apply_ai_explanations(out, config=config, budget=AIBudget(max_calls=5))
+    assert [p["merchant"] for p in _FakeClient.payloads] == ["Estadio Centro", "Bar Sur", "Cafe Norte"]
+    assert (out["ai_category"] != "").all()
+
+
+def test_candidate_mask_matches_row_rule_and_verdicts_stay_sparse(monkeypatch):
+    import numpy as np
+
+    df = pd.DataFrame({
+        "merchant": pd.Categorical(["Cafe Central", "BAR", " Uber ", None, "Estadio Norte", "Casino"]),
+        "flag": ["OK", "OK", "OK", "OK", "DIRECT_WARN", "OK"],
+    })
+    expected = [ai_explainer.should_send_to_ai(row) for _, row in df.iterrows()]
+    assert ai_explainer.ai_candidate_mask(df).tolist() == expected
+
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _FakeClient)
+    config = AIConcurrencyConfig(concurrency=1, batch_size=1)
+    verdicts = ai_explainer.evaluate_ai_candidates(df, config=config)
+    assert verdicts.candidates == sum(expected)
+    assert verdicts.rows().tolist() == list(np.flatnonzero(expected))
+    assert "ai_category" not in df.columns  # el df de entrada no se toca
+
+    out = verdicts.assign_to(df)
+    assert out["ai_category"].tolist() == ["", "cat BAR", "cat  Uber ", "cat None", "cat Estadio Norte", "cat Casino"]
+    # segunda pasada: nada pendiente, las columnas no cambian
+    again = ai_explainer.evaluate_ai_candidates(out, config=config)
+    assert again.candidates == 0
+    assert again.assign_to(out)["ai_category"].tolist() == out["ai_category"].tolist()
+
+
+def test_rows_differing_only_by_flag_get_separate_prompts(monkeypatch):
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _FakeClient)
+    _FakeClient.payloads = []
+    df = pd.DataFrame({
+        "merchant": ["Estadio Norte"] * 4,
+        "mcc": ["7941"] * 4,
+        "mcc_description": ["Sports Clubs", "Sports Clubs", "Sports Clubs", None],
+        "flag": ["DIRECT_WARN", "DIRECT_WARN", "POSSIBLE_WARN", "DIRECT_WARN"],
+        "reasons": ["kw", "kw", "kw", "kw"],
+    })
+
+    ai_explainer.apply_ai_explanations(df, config=AIConcurrencyConfig(concurrency=1, batch_size=1))
+
+    assert len(_FakeClient.payloads) == 3
+    assert sorted(p["flag"] for p in _FakeClient.payloads) == ["DIRECT_WARN", "DIRECT_WARN", "POSSIBLE_WARN"]
+    assert all(p["reasons"] == "kw" for p in _FakeClient.payloads)
+    assert {p["mcc_description"] for p in _FakeClient.payloads} == {"Sports Clubs", None}
+
+
+def test_failed_call_keeps_the_other_verdicts_and_is_counted(monkeypatch):
+    from app.ai.telemetry import AITelemetry
+
+    class _Flaky(_FakeClient):
+        def evaluate_transaction(self, payload):
+            if payload["merchant"] == "Casino 1":
+                raise ValueError("content filter")
+            return super().evaluate_transaction(payload)
+
+    monkeypatch.setattr(ai_explainer, "AzureFoundryClient", _Flaky)
+    df = pd.DataFrame({"merchant": [f"Casino {i}" for i in range(4)], "flag": ["DIRECT_WARN"] * 4})
+    telemetry = AITelemetry()
+
+    verdicts = ai_explainer.evaluate_ai_candidates(
+        df, config=AIConcurrencyConfig(concurrency=2, batch_size=1), telemetry=telemetry,
+    )
+
+    assert verdicts.rows().tolist() == [0, 2, 3]
+    assert telemetry.report()["failed_jobs"] == 1
@@ -0,0 +1,31 @@
+from app.data.batch_ingest import discover_sources, ingest_batch, iter_batch, plan_batch
+
+def _write(path, merchants):
+    rows = ["Transaction Date,Clean Merchant Name,MCC,Total Transaction Amount,Purchase Category"]
+    rows += [f"2024-01-01,{m},5812,10,Dining" for m in merchants]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+def test_batch_tags_sources_and_reports_bad_files(tmp_path):
+    _write(tmp_path / "a.csv", ["Cafe", "Cafe"])
+    _write(tmp_path / "b.csv", ["Hotel"])
+    (tmp_path / "broken.parquet").write_bytes(b"not parquet")
+
+    res = ingest_batch(str(tmp_path), max_workers=2, registry_path=str(tmp_path / "layouts.json"))
+
+    assert len(res.df) == 3
+    assert sorted(res.df["source_file"].astype(str).map(lambda p: p[-5:]).unique()) == ["a.csv", "b.csv"]
+    assert [e.path[-14:] for e in res.errors] == ["broken.parquet"]
+    assert (tmp_path / "layouts.json").exists()
+
+def test_cancel_stops_between_sheets_and_skips_queued_ones(tmp_path):
+    for i in range(8):
+        _write(tmp_path / f"f{i}.csv", ["Cafe"])
+    tasks, _ = plan_batch(discover_sources(str(tmp_path)))
+
+    seen = []
+    for part in iter_batch(tasks, max_workers=1, cancelled=lambda: bool(seen)):
+        seen.append(part)
+    assert 1 <= len(seen) < len(tasks)
+
+    res = ingest_batch(str(tmp_path), max_workers=1, registry_path=str(tmp_path / "layouts.json"), cancelled=lambda: True)
+    assert res.df.empty and not (tmp_path / "layouts.json").exists()
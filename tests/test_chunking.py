@@ -0,0 +1,16 @@
+from app.engine.chunking import AdaptiveChunker
+
+def test_chunk_grows_toward_target_latency_with_bounded_steps():
+    chunker = AdaptiveChunker(initial=1000, target_seconds=0.1, max_rows=1_000_000)
+    chunker.record(1000, 0.001)  # 1M filas/s -> querría 100k
+    assert chunker.next_size() == 4000  # crecimiento acotado x4
+    for _ in range(10):
+        chunker.record(chunker.next_size(), chunker.next_size() / 1_000_000)
+    assert chunker.next_size() == 100_000
+
+def test_chunk_shrinks_for_slow_catalog_and_respects_min():
+    chunker = AdaptiveChunker(initial=5000, target_seconds=0.2, min_rows=500)
+    chunker.record(5000, 2.0)  # 2500 filas/s -> 500 filas por 0.2 s
+    assert chunker.next_size() == 500
+    chunker.record(500, 10.0)
+    assert chunker.next_size() == 500
@@ -0,0 +1,48 @@
+import pandas as pd
+from app.core.models import Catalog
+from app.data.cleaning import validate_and_clean
+from app.data.export import export_to_csv
+from app.engine.rules import apply_rules
+
+def test_compact_schema_keeps_rules_and_export():
+    df = pd.DataFrame({
+        "merchant": ["Nice Casino", "Cafe", "Cafe", "Cafe", "Cafe"],
+        "mcc": ["0742", "5812", "5812", "5812", "5812"],
+        "amount": ["10.5", "-3", "4", "5", "6"],
+        "date": ["2024-01-01"] * 5,
+    })
+    cat = Catalog(
+        mcc_rules=[{"mcc": "0742", "severity": "POSSIBLE_WARN", "reason": "vet"}],
+        keyword_rules=[{"pattern": "(?i)casino", "severity": "DIRECT_WARN", "reason": "casino"}],
+    )
+    plain, _ = validate_and_clean(df)
+    compact, _ = validate_and_clean(df, compact=True)
+
+    assert compact["mcc"].dtype == "uint16"
+    assert compact["amount"].dtype == "float64"
+    assert isinstance(compact["merchant"].dtype, pd.CategoricalDtype)
+
+    a = apply_rules(plain, cat)
+    b = apply_rules(compact, cat)
+    assert a["flag"].tolist() == b["flag"].tolist()
+    assert a["reasons"].tolist() == b["reasons"].tolist()
+
+def test_compact_export_keeps_mcc_leading_zeros(tmp_path):
+    df = pd.DataFrame({"merchant": ["A", "A", "A"], "mcc": ["0742"] * 3, "amount": [1, 2, 3], "date": ["2024-01-01"] * 3})
+    compact, _ = validate_and_clean(df, compact=True)
+    path = tmp_path / "out.csv"
+    export_to_csv(compact, str(path))
+    assert pd.read_csv(path, dtype=str)["mcc"].tolist() == ["0742"] * 3
+
+def test_compact_amount_round_trips_exactly(tmp_path):
+    from app.engine.search_index import SearchIndex
+
+    df = pd.DataFrame({"merchant": ["A"] * 3, "mcc": ["5812"] * 3, "amount": ["1234567.89", "10.1", "3"],
+                       "date": ["2024-01-01"] * 3})
+    compact, _ = validate_and_clean(df, compact=True)
+    assert compact["amount"].tolist() == [1234567.89, 10.1, 3.0]
+
+    path = tmp_path / "out.csv"
+    export_to_csv(compact, str(path))
+    assert pd.read_csv(path, dtype=str)["amount"].tolist() == ["1234567.89", "10.1", "3.0"]
+    assert SearchIndex(compact).search("1234567.89").tolist() == [0]
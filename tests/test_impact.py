@@ -0,0 +1,25 @@
+import pandas as pd
+from app.core.models import Catalog
+from app.engine.impact import estimate_catalog_impact, stratified_sample
+
+def test_stratified_sample_keeps_rare_flags():
+    flags = pd.Series(["OK"] * 9900 + ["DIRECT_WARN"] * 100)
+    rows = stratified_sample(flags, max_rows=1000)
+    picked = flags.iloc[rows]
+    assert (picked == "DIRECT_WARN").sum() == 100
+    assert len(rows) < 1200
+    assert list(rows) == sorted(rows)
+
+def test_impact_counts_flag_changes_and_merchants():
+    df = pd.DataFrame({
+        "merchant": ["Nice Casino", "Cafe", "Casino Royal", "Hotel"],
+        "mcc": ["7995", "5812", "7995", "7011"],
+        "amount": [10, 5, 20, 100],
+        "flag": ["OK", "OK", "OK", "OK"],
+    })
+    cat = Catalog(keyword_rules=[{"pattern": "(?i)casino", "severity": "DIRECT_WARN", "reason": "casino"}])
+    impact = estimate_catalog_impact(df, df["flag"], cat, total_rows=len(df))
+    assert impact.exact
+    assert impact.changed_sample == impact.changed_estimate == 2
+    assert impact.transitions == {("OK", "DIRECT_WARN"): 2}
+    assert dict(impact.top_merchants) == {"Nice Casino": 1, "Casino Royal": 1}
@@ -0,0 +1,54 @@
+import pandas as pd
+from app.data.ingest import load_canonical
+import app.data.readers as readers
+from app.data.readers import iter_body_chunks, read_head_noheader
+
+def _write_csv(path):
+    rows = ["Extracto enero;;;", "Transaction Date;Clean Merchant Name;MCC;Total Transaction Amount"]
+    merchants = ["Cafe", "Casino", "Hotel"]
+    for i in range(9):
+        rows.append(f"2024-01-0{i % 9 + 1};{merchants[i % 3]};{5812 + i % 2};{i}.5")
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+def test_csv_chunks_match_single_read(tmp_path):
+    path = tmp_path / "feed.csv"
+    _write_csv(path)
+    head = read_head_noheader(str(path))
+    assert head.iloc[1, 1] == "Clean Merchant Name"
+
+    mapping = {"date": 0, "merchant": 1, "mcc": 2, "amount": 3}
+    whole, _ = load_canonical(str(path), None, 1, mapping, compact=True, chunksize=100)
+    chunked, _ = load_canonical(str(path), None, 1, mapping, compact=True, chunksize=2)
+
+    assert len(chunked) == 9
+    assert isinstance(chunked["merchant"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        whole.astype({"merchant": str}), chunked.astype({"merchant": str}), check_categorical=False
+    )
+
+
+def test_latin1_csv_falls_back_without_losing_or_repeating_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(readers, "CSV_BLOCK_SIZE", 64)  # el byte inválido cae después del primer bloque
+    path = tmp_path / "latin1.csv"
+    rows = ["Fecha;Comercio;MCC;Monto"] + [f"2024-01-01;Cafe {i};5812;{i}" for i in range(20)] + ["2024-01-02;Café Olé;5812;99"]
+    path.write_bytes(("\n".join(rows) + "\n").encode("latin-1"))
+
+    assert read_head_noheader(str(path)).iloc[0, 1] == "Comercio"
+    body = pd.concat(iter_body_chunks(str(path), None, 0, chunksize=4), ignore_index=True)
+
+    assert len(body) == 21
+    assert body["Comercio"].iloc[:20].tolist() == [f"Cafe {i}" for i in range(20)]
+    assert body["Comercio"].iloc[20] == "Caf\ufffd Ol\ufffd"
+
+def test_chunked_issues_are_reported_once_with_the_file_total(tmp_path, monkeypatch):
+    monkeypatch.setattr(readers, "CSV_BLOCK_SIZE", 64)  # varios chunks aun con pyarrow
+    path = tmp_path / "feed.csv"
+    rows = ["Transaction Date;Clean Merchant Name;MCC;Total Transaction Amount"]
+    rows += [f"2024-01-01;{'' if i % 2 else 'Cafe'};5812;1" for i in range(10)]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    mapping = {"date": 0, "merchant": 1, "mcc": 2, "amount": 3}
+    assert len(list(iter_body_chunks(str(path), None, 0, chunksize=3))) > 1
+    _, chunked = load_canonical(str(path), None, 0, mapping, chunksize=3)
+    _, whole = load_canonical(str(path), None, 0, mapping, chunksize=100)
+    assert chunked == whole == ["5 filas sin merchant (rellenado)"]
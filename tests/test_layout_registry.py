@@ -0,0 +1,40 @@
+import json
+import pandas as pd
+from app.data.layout_registry import LayoutRegistry, probe_layout
+
+def _sheet(title: str) -> pd.DataFrame:
+    return pd.DataFrame([
+        [title, None, None],
+        ["Transaction Date", "Clean Merchant Name", "MCC"],
+        ["2024-01-01", "Cafe", 5812],
+    ])
+
+def test_learned_layout_is_matched_after_reload(tmp_path):
+    path = str(tmp_path / "layouts.json")
+    reg = LayoutRegistry.load(path)
+    assert reg.match(_sheet("Enero")) is None
+
+    reg.learn(probe_layout(_sheet("Enero"), 1), {"date": 0, "merchant": 1, "mcc": 2})
+    reg.save()
+
+    layout = LayoutRegistry.load(path).match(_sheet("Febrero"))
+    assert layout is not None
+    assert layout.header_row == 1
+    assert layout.mapping == {"date": 0, "merchant": 1, "mcc": 2}
+
+def test_different_headers_do_not_match(tmp_path):
+    reg = LayoutRegistry(str(tmp_path / "layouts.json"))
+    reg.learn(probe_layout(_sheet("x"), 1), {"date": 0})
+    other = _sheet("x")
+    other.iloc[1, 2] = "Amount"
+    assert reg.match(other) is None
+
+def test_registry_files_with_the_old_hits_field_still_load(tmp_path):
+    path = tmp_path / "layouts.json"
+    layout = probe_layout(_sheet("x"), 1).model_dump() | {"mapping": {"date": 0}, "hits": 7}
+    path.write_text(json.dumps({"layouts": [layout]}), encoding="utf-8")
+    assert LayoutRegistry.load(str(path)).match(_sheet("y")) is not None
+
+def test_header_tokens_are_normalized_like_saved_fingerprints():
+    sheet = pd.DataFrame([[" Transaction\tDate ", None, float("nan"), pd.NaT], ["2024-01-01", "Cafe", 1, 2]])
+    assert probe_layout(sheet, 0).header_tokens == ["transaction date", "", "", ""]
@@ -0,0 +1,69 @@
+from datetime import date
+
+from app.ai.azure_foundry_client import AIResult
+from app.ai.learned_verdicts import promote_cached_verdicts
+from app.ai.verdict_cache import VerdictCache, cache_key
+from app.core.models import Catalog, LearnedVerdict
+
+
+def _put(cache, merchant, description, severity, category="Deportes"):
+    payload = {"merchant": merchant, "description": description}
+    cache.put(cache_key(payload, "gpt-test"), AIResult(category=category, severity=severity, reason="r"),
+              merchant, "gpt-test")
+
+
+def test_promotes_only_unanimous_merchants_and_keeps_reviewed(tmp_path):
+    cache = VerdictCache(str(tmp_path / "cache.sqlite"))
+    _put(cache, "Estadio Norte", "entrada", "DIRECT_WARN")
+    _put(cache, "estadio  norte", "camiseta", "DIRECT_WARN")
+    _put(cache, "Hotel Sur", "noche", "OK", "Viajes")
+    _put(cache, "Hotel Sur", "minibar", "POSSIBLE_WARN", "Viajes")
+    _put(cache, "Bar Uno", "x", "DIRECT_WARN")
+    _put(cache, "Bar Uno", "y", "DIRECT_WARN", "Uncategorized")
+    _put(cache, "Casino Real", "a", "OK")
+    _put(cache, "Casino Real", "b", "OK")
+
+    reviewed = LearnedVerdict(merchant="casino real", severity="DIRECT_WARN", reason="auditor",
+                              source="manual", learned_at="2024-01-01", expires="2099-01-01", reviewed=True)
+    catalog = Catalog(learned_verdicts=[reviewed])
+    new, report = promote_cached_verdicts(cache, catalog, min_samples=2, ttl_days=30, today=date(2024, 5, 1))
+    cache.close()
+
+    by_merchant = {v.merchant: v for v in new.learned_verdicts}
+    assert report.added == ["estadio norte"]
+    assert report.conflicting == ["hotel sur"]
+    assert report.too_few == 1                       # bar uno: el fallback no cuenta como muestra
+    assert by_merchant["casino real"] == reviewed    # lo revisado no se pisa
+    learned = by_merchant["estadio norte"]
+    assert (learned.severity, learned.samples, learned.source) == ("DIRECT_WARN", 2, "ai:gpt-test/tx-v1")
+    assert learned.expires == "2024-05-31"
+    assert catalog.learned_verdicts == [reviewed]    # el catálogo original no se modifica
+
+
+def test_skips_verdicts_from_other_prompt_or_deployment(tmp_path):
+    cache = VerdictCache(str(tmp_path / "cache.sqlite"))
+    for description in ("a", "b"):
+        payload = {"merchant": "Estadio Norte", "description": description}
+        result = AIResult(category="Deportes", severity="DIRECT_WARN", reason="r")
+        cache.put(cache_key(payload, "gpt-test", "tx-v0"), result, "Estadio Norte", "gpt-test", prompt_version="tx-v0")
+        cache.put(cache_key(payload, "otro"), result, "Estadio Norte", "otro")
+
+    new, report = promote_cached_verdicts(cache, Catalog(), deployment="gpt-test")
+    cache.close()
+    assert new.learned_verdicts == []
+    assert report.stale == 4
+
+
+def test_promoted_verdict_matches_rule_rows_normalized_like_the_cache(tmp_path):
+    import pandas as pd
+
+    from app.engine.rules import evaluate_rules
+
+    cache = VerdictCache(str(tmp_path / "cache.sqlite"))
+    _put(cache, "ESTADIO\tNorte ", "entrada", "DIRECT_WARN")
+    _put(cache, "Estadio  norte", "camiseta", "DIRECT_WARN")
+    new, _ = promote_cached_verdicts(cache, Catalog())
+    cache.close()
+
+    df = pd.DataFrame({"merchant": ["  estadio   NORTE", "Otro"], "mcc": ["7941", "5411"], "amount": [10, 1]})
+    assert evaluate_rules(df, new)["flag"].tolist() == ["DIRECT_WARN", "OK"]
@@ -0,0 +1,77 @@
+import shutil
+import time
+
+import pandas as pd
+
+import app.ui.main_window as main_window
+from app.ui.main_window import MainWindow
+
+
+def _result(flags):
+    return pd.DataFrame({
+        "employee": pd.Categorical(["ana", "ana", "luis"]),
+        "amount": [10.0, 5.0, 20.0],
+        "flag": flags,
+    })
+
+
+def test_reanalysis_and_ai_pass_update_the_summary_in_place(qapp):
+    win = MainWindow(catalog_path="catalog/catalog.json")
+    win.df_ready = _result(["OK"] * 3)
+
+    win.on_finished(_result(["DIRECT_WARN", "OK", "OK"]))
+    cube = win._summary
+    assert cube.table("employee").set_index("group").loc["ana", "n_DIRECT_WARN"] == 1
+    assert win.summary_panel.table.item(0, 0).text() == "ana"
+
+    # mismo dataset re-analizado con otro catálogo: el cubo se actualiza, no se rearma
+    win.on_finished(_result(["OK", "OK", "POSSIBLE_WARN"]))
+    assert win._summary is cube
+    t = cube.table("employee").set_index("group")
+    assert t.loc["ana", "n_DIRECT_WARN"] == 0 and t.loc["luis", "n_POSSIBLE_WARN"] == 1
+    assert win.summary_panel.table.item(0, 0).text() == "luis"  # el panel se re-dibujó
+
+    class _Verdicts:
+        def rows(self):
+            return []
+
+        def assign_to(self, df):
+            return df.assign(flag=["DIRECT_WARN", "DIRECT_WARN", "POSSIBLE_WARN"])
+
+    win._ai_source = win.df_result
+    win.on_ai_finished(_Verdicts())
+    assert cube.table("employee").set_index("group").loc["ana", "n_DIRECT_WARN"] == 2
+    assert win.summary_panel.table.item(0, 0).text() == "ana"
+
+    # dataset nuevo: cubo nuevo
+    win.df_ready = _result(["OK"] * 3)
+    win.on_finished(_result(["OK"] * 3))
+    assert win._summary is not cube
+    win.close()
+
+
+def test_streamed_file_is_read_in_a_worker(qapp, tmp_path, monkeypatch):
+    for name in ("info", "warn", "error"):
+        monkeypatch.setattr(main_window, name, lambda *a, **k: None)
+    catalog = tmp_path / "catalog.json"
+    shutil.copy("catalog/catalog.json", catalog)
+    csv = tmp_path / "feed.csv"
+    rows = ["Transaction Date;Clean Merchant Name;MCC;Total Transaction Amount;Purchase Category"]
+    rows += [f"2024-01-0{i + 1};Casino {i};7995;{i}.5;Ocio" for i in range(6)]
+    csv.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    win = MainWindow(catalog_path=str(catalog))
+    win.excel_path = str(csv)
+    win.sheet_combo.addItem("")
+    win.on_load_sheet()
+    win.on_analyze()
+    assert win.df_ready is None  # la lectura no bloqueó el hilo de la UI
+    assert not win.btn_analyze.isEnabled()
+
+    deadline = time.monotonic() + 30
+    while win.df_result is None and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert len(win.df_result) == 6
+    assert win._profile[1].rows == 6  # el perfil salió de la misma lectura
+    win.close()
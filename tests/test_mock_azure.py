@@ -0,0 +1,41 @@
+import pandas as pd
+
+from app.ai.ai_explainer import apply_ai_explanations
+from app.ai.concurrency import AIConcurrencyConfig
+from app.ai.scheduler import AIBudget
+from app.ai.telemetry import AITelemetry
+from mock_azure_server import MockAzureServer, MockConfig
+
+
+def test_ai_pass_against_mock_survives_429_and_lost_batch_items(monkeypatch):
+    # ventana de 0.2 s con 1 request: casi todo choca con 429 y vuelve con Retry-After
+    config = MockConfig(latency_ms=5, jitter_ms=0, rpm=300, window_s=0.2, drop_rate=0.3)
+    with MockAzureServer(config) as server:
+        monkeypatch.setenv("AZURE_FOUNDRY_ENDPOINT", server.endpoint)
+        monkeypatch.setenv("AZURE_FOUNDRY_API_KEY", "mock")
+        monkeypatch.setenv("AZURE_FOUNDRY_MODEL", "mock-gpt")
+        df = pd.DataFrame({
+            "merchant": ["Casino Royal", "Cafe Central", "Estadio Norte", "Tienda X"] * 2,
+            "amount": [10.0] * 8,
+            "flag": ["POSSIBLE_WARN"] * 8,
+        })
+        budget = AIBudget(max_calls=10)
+        telemetry = AITelemetry()
+        out = apply_ai_explanations(
+            df,
+            config=AIConcurrencyConfig(concurrency=4, batch_size=2, backoff_base=0.05),
+            budget=budget,
+            telemetry=telemetry,
+        )
+
+    assert server.stats.status[429] > 0
+    assert (out["ai_category"] != "").all()
+    assert out.loc[0, "ai_severity"] == "DIRECT_WARN" and out.loc[1, "ai_category"] == "Alimentación"
+    assert budget.spent_calls == 4 and budget.spent_tokens > 0
+
+    report = telemetry.report()
+    assert report["deployment"] == "mock-gpt"
+    assert report["errors"].get("429", 0) == server.stats.status[429] == report["retries"]
+    assert report["transactions_evaluated"] == 4
+    assert report["latency_p50_s"] <= report["latency_p99_s"]
+    assert report["estimated_cost_usd"] > 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from app.core.models import Catalog
+from app.data.profile import DatasetProfile, HeavyHitters, HyperLogLog
+from app.engine.catalog_prune import prune_catalog_for_dataset
+
+
+def _df(n=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "merchant": pd.Categorical(rng.zipf(1.5, n).astype(str)),
+        "mcc": rng.choice([5812, 7995, 742], n).astype("uint16"),
+        "amount": rng.lognormal(4, 1.2, n),
+    })
+
+
+def test_chunked_profile_matches_exact_stats_and_merges():
+    df = _df()
+    profile = DatasetProfile.from_frame(df, chunk_rows=30_000)
+
+    assert profile.rows == len(df)
+    assert profile.mcc_counts == {"5812": int((df["mcc"] == 5812).sum()), "7995": int((df["mcc"] == 7995).sum()),
+                                  "0742": int((df["mcc"] == 742).sum())}
+    for q in (0.01, 0.5, 0.9, 0.99):
+        exact = df["amount"].quantile(q)
+        assert abs(profile.quantile(q) - exact) / exact < 0.01
+    top = df["merchant"].astype(str).value_counts().head(5)
+    assert profile.merchants.top(5) == list(zip(top.index, top.tolist()))
+    assert abs(profile.distinct_merchants() - df["merchant"].nunique()) / df["merchant"].nunique() < 0.03
+
+    # perfiles de partes distintas se combinan en el del total
+    a = DatasetProfile.from_frame(df.iloc[:70_000])
+    b = DatasetProfile.from_frame(df.iloc[70_000:])
+    a.merge(b)
+    assert a.rows == profile.rows and a.mcc_counts == profile.mcc_counts
+    assert abs(a.quantile(0.9) - profile.quantile(0.9)) / profile.quantile(0.9) < 0.005
+
+
+def test_sketches_stay_bounded():
+    hh = HeavyHitters(capacity=100)
+    hh.update(pd.Series(["frecuente"] * 1000 + [f"m{i}" for i in range(5000)]))
+    assert len(hh.counts) == 100 and not hh.exact
+    assert hh.top(1) == [("frecuente", 1000)]
+
+    hll = HyperLogLog()
+    for start in range(0, 100_000, 25_000):
+        hll.update(pd.Series([f"merchant {i}" for i in range(start, start + 25_000)]))
+    assert abs(hll.estimate() - 100_000) < 3_000
+    assert hll.registers.nbytes == 16384
+
+
+def test_prune_reuses_profile():
+    df = pd.DataFrame({"merchant": ["Nice Casino", "Cafe"], "mcc": ["7995", "5812"], "amount": [1.0, 2.0]})
+    cat = Catalog(
+        mcc_rules=[{"mcc": "7995", "severity": "DIRECT_WARN", "reason": "x"},
+                   {"mcc": "1234", "severity": "DIRECT_WARN", "reason": "y"}],
+        keyword_rules=[{"pattern": "(?i)casino", "severity": "DIRECT_WARN", "reason": "c"},
+                       {"pattern": "(?i)estadio", "severity": "DIRECT_WARN", "reason": "e"}],
+    )
+    from_df = prune_catalog_for_dataset(cat, df)
+    from_profile = prune_catalog_for_dataset(cat, DatasetProfile.from_frame(df))
+    assert from_df == from_profile
+    assert from_profile[1][:2] == [
+        "Info: 1 reglas MCC no se dispararon en este dataset (se mantienen activas).",
+        "Info: 1 reglas de Keyword no se dispararon (se mantienen activas).",
+    ]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from app.engine.result_store import ResultStore
+
+def test_rows_by_flag_and_counts():
+    flags = pd.Series(["OK", "DIRECT_WARN", "POSSIBLE_WARN", "OK", "DIRECT_WARN"], dtype="category")
+    store = ResultStore.from_result(pd.DataFrame({"flag": flags}))
+    assert store.counts() == {"OK": 2, "POSSIBLE_WARN": 1, "DIRECT_WARN": 2}
+    assert store.rows("OK").tolist() == [0, 3]
+    assert store.rows("WARNINGS").tolist() == [1, 2, 4]
+    assert store.rows("ALL") is None
+    assert store.view(None).tolist() == [0, 1, 2, 3, 4]
+
+def test_view_intersects_search_hits():
+    store = ResultStore(pd.Series(["OK", "DIRECT_WARN", "POSSIBLE_WARN", "OK", "DIRECT_WARN"]))
+    hits = np.array([0, 1, 3], dtype=np.int64)
+    assert store.view("WARNINGS", hits).tolist() == [1]
+    assert store.view("OK", hits).tolist() == [0, 3]
+    assert store.view("ALL", hits).tolist() == [0, 1, 3]
+
+def test_partial_results_accumulate_chunks():
+    from app.engine.result_store import PartialResults
+
+    df = pd.DataFrame({"merchant": ["a", "b", "c", "d"]})
+    partial = PartialResults(df)
+    partial.add(0, pd.DataFrame({"flag": ["OK", "DIRECT_WARN"], "reasons": ["", "x"]}, index=[0, 1]))
+    partial.add(2, pd.DataFrame({"flag": ["POSSIBLE_WARN", "OK"], "reasons": ["y", ""]}, index=[2, 3]))
+    assert partial.counts == {"OK": 2, "POSSIBLE_WARN": 1, "DIRECT_WARN": 1}
+    assert partial.rows_done == 4
+    live = partial.warnings_frame()
+    assert live["merchant"].tolist() == ["b", "c"]
+    assert live["flag"].tolist() == ["DIRECT_WARN", "POSSIBLE_WARN"]
+
+def test_sorted_view_composes_with_filter_and_keeps_missing_last():
+    df = pd.DataFrame({
+        "flag": ["OK", "DIRECT_WARN", "DIRECT_WARN", "POSSIBLE_WARN", "DIRECT_WARN"],
+        "amount": [5.0, 30.0, None, 10.0, 20.0],
+        "merchant": pd.Categorical(["b", "c", "a", None, "b"]),
+    })
+    store = ResultStore.from_result(df)
+    direct = store.view("DIRECT_WARN")
+    assert store.sorted_view(direct, "amount", df["amount"]).tolist() == [4, 1, 2]
+    assert store.sorted_view(direct, "amount", df["amount"], descending=True).tolist() == [1, 4, 2]
+    assert store.sorted_view(store.view(None), "merchant", df["merchant"]).tolist() == [2, 0, 4, 1, 3]
+    assert store.sorted_view(store.view(None), "flag", df["flag"], descending=True).tolist()[:3] == [4, 2, 1]
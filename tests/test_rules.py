@@ -1,6 +1,6 @@
 import pandas as pd
 from app.core.models import Catalog
-from app.engine.rules import apply_rules
+from app.engine.rules import apply_rules, evaluate_rules
 
 def test_keyword_rule_flags():
     cat = Catalog(
@@ -10,3 +10,51 @@ def test_keyword_rule_flags():
     out = apply_rules(df, cat)
     assert out.loc[0, "flag"] == "DIRECT_WARN"
     assert "casino" in out.loc[0, "reasons"]
+
+def test_evaluate_rules_returns_only_new_columns():
+    cat = Catalog(
+        keyword_rules=[{"pattern":"(?i)casino","severity":"DIRECT_WARN","reason":"casino"}]
+    )
+    df = pd.DataFrame({"merchant":["Nice Casino","Cafe"],"mcc":["1234","5812"],"amount":[10,5]})
+    res = evaluate_rules(df, cat)
+    assert list(res.columns) == ["flag", "reasons"]
+    assert res["flag"].tolist() == ["DIRECT_WARN", "OK"]
+    assert "flag" not in df.columns
+
+def test_learned_verdicts_lookup_by_normalized_merchant():
+    learned = {"merchant": "estadio  norte", "severity": "DIRECT_WARN", "category": "Deportes",
+               "reason": "entradas", "source": "ai:gpt/tx-v1", "learned_at": "2024-01-01",
+               "expires": "2099-01-01"}
+    cat = Catalog(
+        allowlist_merchants=["cafe"],
+        learned_verdicts=[
+            learned,
+            {**learned, "merchant": "tienda sur", "severity": "OK", "expires": "2000-01-01"},
+            {**learned, "merchant": "cafe central", "severity": "DIRECT_WARN"},
+        ],
+    )
+    df = pd.DataFrame({
+        "merchant": [" ESTADIO NORTE", "Tienda Sur", "Cafe Central", "Otro"],
+        "mcc": ["7941", "5311", "5812", "5411"],
+        "amount": [10, 20, 5, 1],
+    })
+    res = evaluate_rules(df, cat)
+    # aplicado con el merchant normalizado; vencido ignorado; allowlist manda
+    assert res["flag"].tolist() == ["DIRECT_WARN", "OK", "OK", "OK"]
+    assert res.loc[0, "reasons"] == "IA aprendida -> DIRECT_WARN: Deportes"
+    assert res.loc[1, "reasons"] == ""
+
+def test_unreviewed_learned_verdict_never_lowers_a_rule_flag():
+    learned = {"merchant": "nice casino", "severity": "OK", "category": "Hotel", "reason": "r",
+               "source": "ai:gpt/tx-v1", "learned_at": "2024-01-01", "expires": "2099-01-01"}
+    rules = {"keyword_rules": [{"pattern": "(?i)casino", "severity": "DIRECT_WARN", "reason": "casino"}]}
+    df = pd.DataFrame({"merchant": ["Nice Casino"], "mcc": ["7995"], "amount": [10]})
+
+    res = evaluate_rules(df, Catalog(**rules, learned_verdicts=[learned]))
+    assert res.loc[0, "flag"] == "DIRECT_WARN"
+    assert res.loc[0, "reasons"] == "casino"
+
+    # revisado por un auditor: reemplaza el flag y la razón lo dice
+    res = evaluate_rules(df, Catalog(**rules, learned_verdicts=[{**learned, "reviewed": True}]))
+    assert res.loc[0, "flag"] == "OK"
+    assert res.loc[0, "reasons"] == "casino | IA aprendida (revisada) -> OK: Hotel"
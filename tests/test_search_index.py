@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from app.engine.search_index import SearchIndex
+
+def _df():
+    return pd.DataFrame({
+        "merchant": pd.Categorical(["Nice Casino", "Cafe (Centro)", "CASINO Royal", "Hotel"]),
+        "mcc": np.array([7995, 5812, 7995, 7011], dtype="uint16"),
+        "amount": [10.5, 3.0, 99.0, 120.0],
+        "description": ["", "linea\nnueva", None, "Hotel"],
+    })
+
+def test_search_is_literal_and_case_insensitive():
+    idx = SearchIndex(_df())
+    assert idx.search("casino").tolist() == [0, 2]
+    assert idx.search("(centro)").tolist() == [1]
+    assert idx.search("0799").tolist() == []
+    assert idx.search("7995").tolist() == [0, 2]
+    assert idx.search("").tolist() == [0, 1, 2, 3]
+    assert idx.search("linea nueva").tolist() == [1]
+
+def test_refinement_matches_fresh_scan():
+    idx = SearchIndex(_df())
+    idx.search("ca")
+    refined = idx.search("casino r")
+    assert refined.tolist() == SearchIndex(_df()).search("casino r").tolist() == [2]
+
+def test_cancelled_search_returns_none_and_is_not_cached():
+    df = pd.DataFrame({"merchant": [f"Casino {i}" for i in range(3000)]})
+    idx = SearchIndex(df)
+    assert idx.search("casino", cancelled=lambda: True) is None
+    assert len(idx.search("casino 1")) == 1111
+
+def test_add_rows_indexes_new_columns_without_rebuilding():
+    df = _df()
+    idx = SearchIndex(df)
+    assert idx.search("apuestas").tolist() == []
+    ai = df.assign(ai_category=["Apuestas", "", "Apuestas online", ""])
+    idx.add_rows(ai, np.array([0, 2]), ["ai_category"])
+    assert idx.search("apuestas").tolist() == [0, 2]
+    assert idx.search("apuestas on").tolist() == [2]
+    assert idx.search("casino").tolist() == [0, 2]
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_main_window_import_does_not_load_heavy_modules():
+    code = (
+        "import sys, app.ui.main_window\n"
+        "print(','.join(m for m in ('pandas', 'openai', 'openpyxl') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_copy_on_write_is_enabled_explicitly_not_on_import():
+    code = (
+        "import os, sys\n"
+        "os.environ.pop('PANDAS_COPY_ON_WRITE', None)\n"
+        "import app.data, app.engine, pandas as pd\n"
+        "before = pd.get_option('mode.copy_on_write')\n"
+        "from app.core.pandas_options import enable_copy_on_write\n"
+        "enable_copy_on_write()\n"
+        "print(before, pd.get_option('mode.copy_on_write'), os.environ['PANDAS_COPY_ON_WRITE'])\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "True", "1"]
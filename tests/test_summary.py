@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from app.engine.summary import SummaryCube
+
+def _df():
+    return pd.DataFrame({
+        "employee": pd.Categorical(["ana", "ana", "luis", None]),
+        "mcc": np.array([7995, 5812, 7995, 7995], dtype="uint16"),
+        "amount": [10.0, 5.0, 20.0, 1.0],
+        "flag": ["DIRECT_WARN", "OK", "POSSIBLE_WARN", "DIRECT_WARN"],
+    })
+
+def test_pivot_counts_and_sums_per_flag():
+    cube = SummaryCube(_df())
+    assert cube.dimensions == ["employee", "mcc"]
+    t = cube.table("mcc").set_index("group")
+    assert t.loc["7995", "n_DIRECT_WARN"] == 2
+    assert t.loc["7995", "amount_DIRECT_WARN"] == 11.0
+    assert t.loc["5812", "n_OK"] == 1
+    emp = cube.table("employee")
+    assert emp["group"].tolist()[0] in ("ana", "(vacío)")
+    code = int(emp.set_index("group").loc["ana", "group_code"])
+    assert cube.rows_for("employee", code).tolist() == [0, 1]
+    assert cube.rows_for("employee", code, "DIRECT_WARN").tolist() == [0]
+
+def test_incremental_update_matches_rebuild():
+    df = _df()
+    cube = SummaryCube(df)
+    new_flags = pd.Series(["OK", "OK", "DIRECT_WARN", "DIRECT_WARN"])
+    assert cube.update_flags(new_flags) == 2
+    rebuilt = SummaryCube(df.assign(flag=new_flags))
+    for dim in cube.dimensions:
+        pd.testing.assert_frame_equal(cube.table(dim), rebuilt.table(dim))
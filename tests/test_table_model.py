@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt
+
+from app.ui.table_model import FLAG_COLORS, DataFrameTableModel, flag_codes
+
+
+def _df():
+    return pd.DataFrame({
+        "merchant": pd.Categorical(["Cafe", None, "Casino", "Hotel"]),
+        "mcc": np.array([5812, 7995, 7995, 7011], dtype="uint16"),
+        "amount": [1.5, 2.0, np.nan, 4.0],
+        "flag": ["OK", "POSSIBLE_WARN", "DIRECT_WARN", "???"],
+    })
+
+
+def _cell(model, row, col, role=Qt.DisplayRole):
+    return model.data(model.index(row, col), role)
+
+
+def test_data_reads_compact_columns_and_colours_by_flag(qapp):
+    model = DataFrameTableModel()
+    model.set_frame(_df())
+    assert (model.rowCount(), model.columnCount()) == (4, 4)
+    assert [_cell(model, r, 0) for r in range(4)] == ["Cafe", "", "Casino", "Hotel"]
+    assert _cell(model, 0, 1) == "5812" and _cell(model, 2, 2) == ""
+    assert flag_codes(_df()["flag"]).tolist() == [0, 1, 2, -1]
+    assert [_cell(model, r, 0, Qt.BackgroundRole) for r in range(4)] == FLAG_COLORS + [None]
+
+    model.set_frame(_df(), show_flag_colors=False)
+    assert _cell(model, 2, 0, Qt.BackgroundRole) is None
+
+
+def test_set_rows_with_filtered_and_empty_views(qapp):
+    model = DataFrameTableModel()
+    model.set_frame(_df())
+    model.set_rows(np.array([3, 1], dtype=np.int64))
+    assert model.rowCount() == 2
+    assert [_cell(model, r, 0) for r in range(2)] == ["Hotel", ""]
+    assert _cell(model, 1, 0, Qt.BackgroundRole) == FLAG_COLORS[1]  # color de la fila de origen
+
+    model.set_rows(np.array([], dtype=np.int64))
+    assert model.rowCount() == 0 and model.columnCount() == 4
+    model.set_rows(None)
+    assert model.rowCount() == 4
+
+
+def test_update_columns_repaints_only_touched_columns_and_visible_rows(qapp):
+    df = _df()
+    model = DataFrameTableModel()
+    model.set_frame(df, row_ids=np.array([0, 2, 3], dtype=np.int64))
+    changed = []
+    model.dataChanged.connect(lambda tl, br, roles: changed.append((tl.row(), tl.column(), br.row(), br.column())))
+    inserted = []
+    model.columnsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    out = df.assign(merchant=df["merchant"].cat.rename_categories(str.upper), ai_category=["a", "", "c", ""])
+    model.update_columns(out, ["merchant", "ai_category"], np.array([2, 3]))
+
+    assert inserted == [(4, 4)]
+    assert changed == [(1, 0, 2, 0), (1, 4, 2, 4)]  # filas de vista 1..2, sin tocar mcc/amount/flag
+    assert _cell(model, 1, 0) == "CASINO" and _cell(model, 1, 4) == "c"
+
+    changed.clear()
+    model.update_columns(out, ["ai_category"], np.array([1]))  # fila fuera de la vista
+    assert changed == []
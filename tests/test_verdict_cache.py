@@ -0,0 +1,83 @@
+import time
+
+from app.ai.azure_foundry_client import AIResult, _result_from_data
+from app.ai.verdict_cache import CachedClient, VerdictCache, cache_key
+
+
+class _FakeClient:
+    model = "gpt-test"
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_transaction(self, payload):
+        self.calls += 1
+        return AIResult(category="Deportes", severity="DIRECT_WARN", reason=f"call {self.calls}")
+
+
+def test_normalized_inputs_share_a_verdict_across_sessions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    a = {"merchant": "Real  Madrid CF ", "mcc": 7941, "flag": "DIRECT_WARN", "reasons": "kw"}
+    b = {"merchant": "real madrid cf", "mcc": "7941", "flag": "DIRECT_WARN", "reasons": "KW"}
+    assert cache_key(a, "gpt-test") == cache_key(b, "gpt-test")
+    assert cache_key(a, "gpt-test") != cache_key(a, "otro-deployment")
+    assert cache_key(a, "gpt-test") != cache_key(a, "gpt-test", prompt_version="otro")
+
+    client = _FakeClient()
+    cached = CachedClient(client, VerdictCache(path))
+    assert cached.lookup(a) is None
+    cached.evaluate_transaction(a)
+    cached.cache.close()
+
+    reopened = CachedClient(client, VerdictCache(path))
+    hit = reopened.lookup(b)
+    assert hit is not None and hit.reason == "call 1" and client.calls == 1
+    assert reopened.cache.hit_rate == 1.0
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = VerdictCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    res = AIResult(category="c", severity="OK", reason="r")
+    for i in range(3):
+        cache.put(f"k{i}", res, merchant=f"m{i}", deployment="d")
+        time.sleep(0.01)
+    cache.get("k0")  # k0 usado hace poco: sobrevive, se va k1
+    assert cache.evict() == 1
+    assert cache.get("k1") is None and cache.get("k0") is not None
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("k2") is None
+    assert cache.evict() == 2 and len(cache) == 0
+
+
+def test_unparseable_replies_are_not_cached(tmp_path):
+    class _BrokenClient(_FakeClient):
+        def evaluate_transaction(self, payload):
+            self.calls += 1
+            return _result_from_data({})
+
+    placeholder = _result_from_data({})
+    assert not placeholder.parsed and placeholder.category == "Uncategorized"
+    assert _result_from_data({"category": "Hotel", "severity": "ok", "reason": "r"}).parsed
+
+    client = _BrokenClient()
+    cached = CachedClient(client, VerdictCache(str(tmp_path / "cache.sqlite")))
+    payload = {"merchant": "Hotel Sol", "mcc": "7011"}
+    cached.evaluate_transaction(payload)
+    assert cached.lookup(payload) is None and len(cached.cache) == 0
+    cached.evaluate_transaction(payload)
+    assert client.calls == 2
+    cached.cache.close()
+
+
+def test_known_merchants_ignores_expired_verdicts(tmp_path):
+    cache = VerdictCache(str(tmp_path / "cache.sqlite"))
+    res = AIResult(category="c", severity="OK", reason="r")
+    cache.put("k0", res, merchant="Hotel Sol", deployment="d")
+    assert cache.known_merchants() == {"hotel sol"}
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.known_merchants() == set()
+    cache.close()